@@ -4,5 +4,6 @@ This module contains the multilspy API
 
 from . import multilspy_types as Types
 from .language_server import LanguageServer, SyncLanguageServer
+from .language_server_pool import LanguageServerPool, SyncLanguageServerPool
 
-__all__ = ["LanguageServer", "Types", "SyncLanguageServer"]
+__all__ = ["LanguageServer", "Types", "SyncLanguageServer", "LanguageServerPool", "SyncLanguageServerPool"]
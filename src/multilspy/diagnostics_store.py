@@ -0,0 +1,102 @@
+"""
+This module provides the store of the diagnostics reported by a language server, pushed through
+textDocument/publishDiagnostics or pulled through textDocument/diagnostic.
+"""
+
+import asyncio
+import dataclasses
+from typing import Dict, List, Union
+
+from . import multilspy_types
+
+
+@dataclasses.dataclass
+class DiagnosticsEntry:
+    """
+    The latest diagnostics of a document
+    """
+
+    # Version of the document the diagnostics were computed for, None if unknown
+    version: Union[int, None]
+
+    diagnostics: List[multilspy_types.Diagnostic]
+
+    # Identifier of the report, passed back to the server when pulling diagnostics again
+    result_id: Union[str, None] = None
+
+    # For diagnostics reported without a version, the version of the document when they were received. They may
+    # have been computed for an earlier version, if the server had not processed the latest changes yet.
+    received_at_version: Union[int, None] = None
+
+
+class DiagnosticsStore:
+    """
+    Keeps the latest diagnostics of each document, replacing them as newer ones arrive so that memory stays bounded
+    by the number of documents, and lets callers wait for the diagnostics of a given document version.
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, DiagnosticsEntry] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+
+    def update(
+        self,
+        uri: str,
+        version: Union[int, None],
+        diagnostics: List[multilspy_types.Diagnostic],
+        result_id: Union[str, None] = None,
+        received_at_version: Union[int, None] = None,
+    ) -> None:
+        """
+        Replaces the diagnostics of the document, unless they are older than the stored ones
+        """
+        entry = self.entries.get(uri)
+        if entry is not None and version is not None and entry.version is not None and version < entry.version:
+            return
+        self.entries[uri] = DiagnosticsEntry(version, diagnostics, result_id, received_at_version)
+        for future in self._waiters.pop(uri, []):
+            if not future.done():
+                future.set_result(None)
+
+    def discard(self, uri: str) -> None:
+        """
+        Forgets the diagnostics of the document
+        """
+        self.entries.pop(uri, None)
+
+    def get(self, uri: str) -> Union[DiagnosticsEntry, None]:
+        """
+        Returns the latest diagnostics of the document, None if the server has not reported any
+        """
+        return self.entries.get(uri)
+
+    @staticmethod
+    def _is_up_to_date(entry: DiagnosticsEntry, version: Union[int, None], accept_unversioned: bool) -> bool:
+        if version is None:
+            return True
+        if entry.version is not None:
+            return entry.version >= version
+        return accept_unversioned and entry.received_at_version is not None and entry.received_at_version >= version
+
+    async def wait_for(
+        self, uri: str, version: Union[int, None], accept_unversioned: bool = False
+    ) -> DiagnosticsEntry:
+        """
+        Waits until the server has reported diagnostics for the given version of the document, or a later one.
+        Diagnostics reported without a version only count if accept_unversioned is set, in which case they are
+        taken to be for the version of the document when they were received, which they may predate.
+        """
+        while True:
+            entry = self.entries.get(uri)
+            if entry is not None and self._is_up_to_date(entry, version, accept_unversioned):
+                return entry
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(uri, []).append(future)
+            try:
+                await future
+            finally:
+                waiters = self._waiters.get(uri)
+                if waiters is not None and future in waiters:
+                    waiters.remove(future)
+                    if not waiters:
+                        del self._waiters[uri]
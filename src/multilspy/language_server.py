@@ -6,32 +6,44 @@ The details of Language Specific configuration are not exposed to the user.
 """
 
 import asyncio
+import copy
 import dataclasses
 import json
 import time
 import logging
 import os
-import pathlib
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager, contextmanager
 from .lsp_protocol_handler.lsp_constants import LSPConstants
 from  .lsp_protocol_handler import lsp_types as LSPTypes
 
 from . import multilspy_types
 from .multilspy_logger import MultilspyLogger
+from .lsp_protocol_handler.lsp_metrics import LSPMetrics
+from .lsp_protocol_handler.lsp_recorder import LSPRecorder
 from .lsp_protocol_handler.server import (
     LanguageServerHandler,
     ProcessLaunchInfo,
 )
-from .multilspy_config import MultilspyConfig, Language
+from .multilspy_config import LSPTraceConfig, MultilspyConfig, Language
 from .multilspy_exceptions import MultilspyException
-from .multilspy_utils import PathUtils, FileUtils, TextUtils
+from .multilspy_utils import FileUtils, TextUtils, LineIndex, TextRope, UriPathCache
+from .diagnostics_store import DiagnosticsStore
+from .location_list import LocationList
+from .lsp_trace import LSPTracer
+from .progress import ProgressTracker
+from .readiness import ReadinessLevel, ServerReadiness, requires_readiness
+from .response_cache import ResponseCache
+from .symbol_index import SymbolIndex
+from .symbol_tree import SymbolTree
 from pathlib import PurePath
-from typing import AsyncIterator, Iterator, List, Dict, Union, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Dict, Union, Tuple
 from .type_helpers import ensure_all_methods_implemented
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(init=False)
 class LSPFileBuffer:
     """
     This class is used to store the contents of an open LSP file in memory.
@@ -40,9 +52,6 @@ class LSPFileBuffer:
     # uri of the file
     uri: str
 
-    # The contents of the file
-    contents: str
-
     # The version of the file
     version: int
 
@@ -52,6 +61,144 @@ class LSPFileBuffer:
     # reference count of the file
     ref_count: int
 
+    # The contents of the file, stored as a rope so that edits do not copy the whole contents
+    text: TextRope = dataclasses.field(init=False, repr=False)
+
+    # The offsets at which the lines of the contents start, kept up to date on every edit
+    line_index: LineIndex = dataclasses.field(init=False, repr=False)
+
+    # The contents of the file as a string, materialized lazily from the rope
+    _contents: Union[str, None] = dataclasses.field(init=False, repr=False)
+
+    def __init__(self, uri: str, contents: str, version: int, language_id: str, ref_count: int) -> None:
+        self.uri = uri
+        self.contents = contents
+        self.version = version
+        self.language_id = language_id
+        self.ref_count = ref_count
+
+    @property
+    def contents(self) -> str:
+        """
+        The contents of the file
+        """
+        if self._contents is None:
+            self._contents = str(self.text)
+        return self._contents
+
+    @contents.setter
+    def contents(self, contents: str) -> None:
+        self.text = TextRope(contents)
+        self.line_index = LineIndex(contents)
+        self._contents = contents
+
+    def insert_text(self, index: int, text: str) -> None:
+        """
+        Insert the given text at the given offset in the contents
+        """
+        self.text.insert(index, text)
+        self.line_index.insert(index, text)
+        self._contents = None
+
+    def delete_text(self, start: int, end: int) -> str:
+        """
+        Delete the text between the given offsets in the contents and return it
+        """
+        deleted_text = self.text.delete(start, end)
+        self.line_index.delete(start, end)
+        self._contents = None
+        return deleted_text
+
+
+class DidChangeBatcher:
+    """
+    Buffers the content changes made to open documents, and sends the changes of each document as a
+    single textDocument/didChange notification with a single version bump, instead of one notification per edit.
+
+    The buffered changes of a document are flushed before the next request on it, when it is closed, and,
+    if a debounce is configured, at most debounce seconds after the first buffered change.
+    """
+
+    def __init__(self, server: LanguageServerHandler, debounce: Union[float, None]) -> None:
+        self.server = server
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[LSPFileBuffer, List[LSPTypes.TextDocumentContentChangeEvent]]] = {}
+
+    def add(self, file_buffer: LSPFileBuffer, change: LSPTypes.TextDocumentContentChangeEvent) -> None:
+        """
+        Buffer the given change to the given document
+        """
+        with self._lock:
+            pending = self._pending.get(file_buffer.uri)
+            if pending is not None:
+                pending[1].append(change)
+                return
+            self._pending[file_buffer.uri] = (file_buffer, [change])
+
+        if self.debounce is None:
+            return
+        try:
+            asyncio.get_running_loop().call_later(self.debounce, self.flush, file_buffer.uri)
+        except RuntimeError:
+            # Edits made through SyncLanguageServer come from outside the event loop thread
+            loop = self.server.loop
+            if loop is not None:
+                loop.call_soon_threadsafe(loop.call_later, self.debounce, self.flush, file_buffer.uri)
+
+    def flush(self, uri: str) -> None:
+        """
+        Send the buffered changes to the given document, if any
+        """
+        with self._lock:
+            pending = self._pending.pop(uri, None)
+            if pending is None:
+                return
+            file_buffer, changes = pending
+            file_buffer.version += 1
+            self.server.notify.did_change_text_document(
+                {
+                    LSPConstants.TEXT_DOCUMENT: {
+                        LSPConstants.VERSION: file_buffer.version,
+                        LSPConstants.URI: file_buffer.uri,
+                    },
+                    LSPConstants.CONTENT_CHANGES: changes,
+                }
+            )
+
+    def flush_all(self) -> None:
+        """
+        Send the buffered changes to all the documents
+        """
+        for uri in list(self._pending):
+            self.flush(uri)
+
+
+def _to_diagnostic(diagnostic: LSPTypes.Diagnostic) -> multilspy_types.Diagnostic:
+    """
+    Converts a diagnostic reported by the server to a multilspy_types.Diagnostic
+    """
+    ret: multilspy_types.Diagnostic = {"range": diagnostic["range"], "message": diagnostic["message"]}
+    for key in ["severity", "code", "source"]:
+        if key in diagnostic:
+            ret[key] = diagnostic[key]
+    return ret
+
+
+# File extensions of the source files of each language, by language id
+SOURCE_FILE_EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "java": (".java",),
+    "python": (".py",),
+    "rust": (".rs",),
+    "csharp": (".cs",),
+    "typescript": (".ts", ".tsx"),
+    "javascript": (".js", ".jsx"),
+}
+
+
+# A position queried in a batch request: (relative_file_path, line, column)
+QueryPosition = Tuple[str, int, int]
+
 
 class LanguageServer:
     """
@@ -59,6 +206,10 @@ class LanguageServer:
     It is used to communicate with Language Servers of different programming languages.
     """
 
+    # Whether the language specific subclass reports the readiness levels of the server as it starts. Language Servers
+    # that do not are considered fully ready as soon as they are started.
+    reports_readiness = False
+
     @classmethod
     def create(cls, config: MultilspyConfig, logger: MultilspyLogger, repository_root_path: str) -> "LanguageServer":
         """
@@ -112,25 +263,75 @@ class LanguageServer:
         self.logger = logger
         self.server_started = False
         self.repository_root_path: str = repository_root_path
+        # Conversions between the URIs and the paths of the files of the repository
+        self.uri_path_cache = UriPathCache(repository_root_path, config.uri_path_cache_size)
         self.completions_available = asyncio.Event()
 
+        # Sampled and truncated trace of the messages exchanged with the server, if enabled
+        self.lsp_tracer: Union[LSPTracer, None] = None
         if config.trace_lsp_communication:
-
-            def logging_fn(source, target, msg):
-                self.logger.log(f"LSP: {source} -> {target}: {str(msg)}", logging.DEBUG)
-
-        else:
-
-            def logging_fn(source, target, msg):
-                pass
+            self.lsp_tracer = LSPTracer(
+                config.lsp_trace_config if config.lsp_trace_config is not None else LSPTraceConfig(), self.logger
+            )
 
         # cmd is obtained from the child classes, which provide the language specific command to start the language server
         # LanguageServerHandler provides the functionality to start the language server and communicate with it
-        self.server: LanguageServerHandler = LanguageServerHandler(process_launch_info, logger=logging_fn)
+        self.lsp_recorder: Union[LSPRecorder, None] = None
+        if config.lsp_recording_path is not None:
+            self.lsp_recorder = LSPRecorder(config.lsp_recording_path)
+        # Per method metrics of the messages exchanged with the server, exported with snapshot() or to_prometheus_text()
+        self.lsp_metrics: Union[LSPMetrics, None] = LSPMetrics() if config.collect_lsp_metrics else None
+        self.server: LanguageServerHandler = LanguageServerHandler(
+            process_launch_info, logger=self.lsp_tracer, recorder=self.lsp_recorder, metrics=self.lsp_metrics
+        )
 
         self.language_id = language_id
         self.open_file_buffers: Dict[str, LSPFileBuffer] = {}
 
+        # Incremented on every change to the contents of the workspace, to invalidate the cached responses
+        self.workspace_generation = 0
+        self.response_cache: Union[ResponseCache, None] = None
+        if config.response_cache_size > 0:
+            self.response_cache = ResponseCache(config.response_cache_size, config.response_cache_ttl)
+
+        self.did_change_batcher: Union[DidChangeBatcher, None] = None
+        if config.did_change_batching:
+            self.did_change_batcher = DidChangeBatcher(self.server, config.did_change_debounce)
+
+        # Whether start_server returns as soon as the server is initialized, leaving requests to wait for the
+        # readiness level they need
+        self.staged_readiness = config.staged_readiness
+        self.readiness = ServerReadiness()
+        # Work done progress and status notifications reported by the server since it was started
+        self.progress = ProgressTracker()
+
+        # The client-side index of the workspace symbols, if built with build_symbol_index
+        self.symbol_index: Union[SymbolIndex, None] = None
+
+        # The capabilities returned by the server in response to the initialize request
+        self.server_capabilities: Dict[str, Any] = {}
+
+        # The latest diagnostics of each document
+        self.diagnostics = DiagnosticsStore()
+
+        async def publish_diagnostics_handler(params: LSPTypes.PublishDiagnosticsParams) -> None:
+            uri = params["uri"]
+            file_buffer = self.open_file_buffers.get(uri)
+            if not params["diagnostics"] and file_buffer is None:
+                # No entry is kept for the closed documents without diagnostics
+                self.diagnostics.discard(uri)
+                return
+            # Diagnostics published without a version are kept unversioned, with the version of the document when
+            # they were received, as the server may have computed them before processing the latest changes
+            self.diagnostics.update(
+                uri,
+                params.get("version"),
+                [_to_diagnostic(d) for d in params["diagnostics"]],
+                received_at_version=file_buffer.version if file_buffer is not None else None,
+            )
+
+        self.server.on_notification("textDocument/publishDiagnostics", publish_diagnostics_handler)
+
     @asynccontextmanager
     async def start_server(self) -> AsyncIterator["LanguageServer"]:
         """
@@ -147,17 +348,80 @@ class LanguageServer:
         ```
         """
         self.server_started = True
-        yield self
-        self.server_started = False
+        self.progress.reset()
+        if self.lsp_tracer is not None:
+            self.lsp_tracer.start()
+        if self.lsp_recorder is not None:
+            self.lsp_recorder.start()
+        if not self.reports_readiness:
+            self.readiness.set_level(ReadinessLevel.SERVICE_READY)
+        try:
+            yield self
+        finally:
+            self.server_started = False
+            self.readiness.reset()
+            if self.lsp_tracer is not None:
+                self.lsp_tracer.close()
+            if self.lsp_recorder is not None:
+                self.lsp_recorder.close()
+
+    async def wait_for_readiness(self, level: ReadinessLevel) -> None:
+        """
+        Wait until the Language Server has reached the given readiness level.
+
+        Request methods already wait for the readiness level they need. This is useful to start work only once
+        the Language Server is fully ready, when start_server returns early because staged readiness is enabled.
+
+        :param level: The readiness level to wait for
+        """
+        await self.readiness.wait_for_level(level)
+
+    def _response_cache_key(
+        self, method: str, relative_file_path: str, line: int = None, column: int = None
+    ) -> Union[Tuple, None]:
+        """
+        Returns the key under which the response to the given query is cached, or None if the response cache is
+        disabled. The key captures the version of the queried document and the generation of the workspace, so that
+        any edit makes the previously cached responses unreachable.
+        """
+        if self.response_cache is None:
+            return None
+        uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
+        file_buffer = self.open_file_buffers.get(uri)
+        version = file_buffer.version if file_buffer is not None else None
+        return (method, uri, line, column, version, self.workspace_generation)
+
+    def _symbol_with_location(
+        self, relative_file_path: str, symbol: multilspy_types.UnifiedSymbolInformation
+    ) -> multilspy_types.UnifiedSymbolInformation:
+        """
+        Returns the given document symbol, with the location of its name in the given file
+        """
+        absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
+        ret = multilspy_types.UnifiedSymbolInformation(**symbol)
+        if "selectionRange" in symbol:
+            symbol_range = symbol["selectionRange"]
+        elif "range" in symbol:
+            symbol_range = symbol["range"]
+        else:
+            symbol_range = symbol["location"]["range"]
+        ret["location"] = multilspy_types.Location(
+            uri=self.uri_path_cache.uri_for_relative_path(relative_file_path),
+            range=symbol_range,
+            absolutePath=absolute_file_path,
+            relativePath=relative_file_path,
+        )
+        return ret
 
     # TODO: Add support for more LSP features
 
     @contextmanager
-    def open_file(self, relative_file_path: str) -> Iterator[None]:
+    def open_file(self, relative_file_path: str, contents: Union[str, None] = None) -> Iterator[None]:
         """
         Open a file in the Language Server. This is required before making any requests to the Language Server.
 
         :param relative_file_path: The relative path of the file to open.
+        :param contents: The contents of the file, if already read. Defaults to reading the file. Ignored if the file is already open.
         """
         if not self.server_started:
             self.logger.log(
@@ -167,17 +431,22 @@ class LanguageServer:
             raise MultilspyException("Language Server not started")
 
         absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
-        uri = pathlib.Path(absolute_file_path).as_uri()
+        uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
 
         if uri in self.open_file_buffers:
             assert self.open_file_buffers[uri].uri == uri
             assert self.open_file_buffers[uri].ref_count >= 1
 
+            # The server must see all the edits made so far before serving requests on the file
+            if self.did_change_batcher is not None:
+                self.did_change_batcher.flush(uri)
+
             self.open_file_buffers[uri].ref_count += 1
             yield
             self.open_file_buffers[uri].ref_count -= 1
         else:
-            contents = FileUtils.read_file(self.logger, absolute_file_path)
+            if contents is None:
+                contents = FileUtils.read_file(self.logger, absolute_file_path)
 
             version = 0
             self.open_file_buffers[uri] = LSPFileBuffer(uri, contents, version, self.language_id, 1)
@@ -196,6 +465,8 @@ class LanguageServer:
             self.open_file_buffers[uri].ref_count -= 1
 
         if self.open_file_buffers[uri].ref_count == 0:
+            if self.did_change_batcher is not None:
+                self.did_change_batcher.flush(uri)
             self.server.notify.did_close_text_document(
                 {
                     LSPConstants.TEXT_DOCUMENT: {
@@ -224,35 +495,37 @@ class LanguageServer:
             )
             raise MultilspyException("Language Server not started")
 
-        absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
-        uri = pathlib.Path(absolute_file_path).as_uri()
+        uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
 
         # Ensure the file is open
         assert uri in self.open_file_buffers
 
         file_buffer = self.open_file_buffers[uri]
-        file_buffer.version += 1
-        change_index = TextUtils.get_index_from_line_col(file_buffer.contents, line, column)
-        file_buffer.contents = (
-            file_buffer.contents[:change_index] + text_to_be_inserted + file_buffer.contents[change_index:]
-        )
-        self.server.notify.did_change_text_document(
-            {
-                LSPConstants.TEXT_DOCUMENT: {
-                    LSPConstants.VERSION: file_buffer.version,
-                    LSPConstants.URI: file_buffer.uri,
-                },
-                LSPConstants.CONTENT_CHANGES: [
-                    {
-                        LSPConstants.RANGE: {
-                            "start": {"line": line, "character": column},
-                            "end": {"line": line, "character": column},
-                        },
-                        "text": text_to_be_inserted,
-                    }
-                ],
-            }
-        )
+        self.workspace_generation += 1
+        if self.symbol_index is not None:
+            self.symbol_index.mark_stale(str(PurePath(relative_file_path)))
+        change_index = file_buffer.line_index.get_index_from_line_col(line, column)
+        file_buffer.insert_text(change_index, text_to_be_inserted)
+        change = {
+            LSPConstants.RANGE: {
+                "start": {"line": line, "character": column},
+                "end": {"line": line, "character": column},
+            },
+            "text": text_to_be_inserted,
+        }
+        if self.did_change_batcher is not None:
+            self.did_change_batcher.add(file_buffer, change)
+        else:
+            file_buffer.version += 1
+            self.server.notify.did_change_text_document(
+                {
+                    LSPConstants.TEXT_DOCUMENT: {
+                        LSPConstants.VERSION: file_buffer.version,
+                        LSPConstants.URI: file_buffer.uri,
+                    },
+                    LSPConstants.CONTENT_CHANGES: [change],
+                }
+            )
         new_l, new_c = TextUtils.get_updated_position_from_line_and_column_and_edit(line, column, text_to_be_inserted)
         return multilspy_types.Position(line=new_l, character=new_c)
 
@@ -272,29 +545,56 @@ class LanguageServer:
             )
             raise MultilspyException("Language Server not started")
 
-        absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
-        uri = pathlib.Path(absolute_file_path).as_uri()
+        uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
 
         # Ensure the file is open
         assert uri in self.open_file_buffers
 
         file_buffer = self.open_file_buffers[uri]
-        file_buffer.version += 1
-        del_start_idx = TextUtils.get_index_from_line_col(file_buffer.contents, start["line"], start["character"])
-        del_end_idx = TextUtils.get_index_from_line_col(file_buffer.contents, end["line"], end["character"])
-        deleted_text = file_buffer.contents[del_start_idx:del_end_idx]
-        file_buffer.contents = file_buffer.contents[:del_start_idx] + file_buffer.contents[del_end_idx:]
-        self.server.notify.did_change_text_document(
-            {
-                LSPConstants.TEXT_DOCUMENT: {
-                    LSPConstants.VERSION: file_buffer.version,
-                    LSPConstants.URI: file_buffer.uri,
-                },
-                LSPConstants.CONTENT_CHANGES: [{LSPConstants.RANGE: {"start": start, "end": end}, "text": ""}],
-            }
-        )
+        self.workspace_generation += 1
+        if self.symbol_index is not None:
+            self.symbol_index.mark_stale(str(PurePath(relative_file_path)))
+        del_start_idx = file_buffer.line_index.get_index_from_line_col(start["line"], start["character"])
+        del_end_idx = file_buffer.line_index.get_index_from_line_col(end["line"], end["character"])
+        deleted_text = file_buffer.delete_text(del_start_idx, del_end_idx)
+        change = {LSPConstants.RANGE: {"start": start, "end": end}, "text": ""}
+        if self.did_change_batcher is not None:
+            self.did_change_batcher.add(file_buffer, change)
+        else:
+            file_buffer.version += 1
+            self.server.notify.did_change_text_document(
+                {
+                    LSPConstants.TEXT_DOCUMENT: {
+                        LSPConstants.VERSION: file_buffer.version,
+                        LSPConstants.URI: file_buffer.uri,
+                    },
+                    LSPConstants.CONTENT_CHANGES: [change],
+                }
+            )
         return deleted_text
 
+    def notify_did_change_watched_files(self, changes: List[LSPTypes.FileEvent]) -> None:
+        """
+        Raise a [workspace/didChangeWatchedFiles](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#workspace_didChangeWatchedFiles) notification
+        to inform the Language Server about files changed outside of the client, and invalidate the cached responses.
+
+        :param changes: The file events, each with the uri of the file and the type of the change.
+        """
+        if not self.server_started:
+            self.logger.log(
+                "notify_did_change_watched_files called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        self.workspace_generation += 1
+        if self.symbol_index is not None:
+            for change in changes:
+                absolute_file_path, relative_file_path = self.uri_path_cache.paths_for_uri(change["uri"])
+                if absolute_file_path.endswith(SOURCE_FILE_EXTENSIONS.get(self.language_id, ())):
+                    self.symbol_index.mark_stale(relative_file_path)
+        self.server.notify.did_change_watched_files({"changes": changes})
+
     def get_open_file_text(self, relative_file_path: str) -> str:
         """
         Get the contents of the given opened file as per the Language Server.
@@ -308,8 +608,7 @@ class LanguageServer:
             )
             raise MultilspyException("Language Server not started")
 
-        absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
-        uri = pathlib.Path(absolute_file_path).as_uri()
+        uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
 
         # Ensure the file is open
         assert uri in self.open_file_buffers
@@ -317,6 +616,7 @@ class LanguageServer:
         file_buffer = self.open_file_buffers[uri]
         return file_buffer.contents
 
+    @requires_readiness(ReadinessLevel.PROJECTS_IMPORTED)
     async def request_definition(
         self, relative_file_path: str, line: int, column: int
     ) -> List[multilspy_types.Location]:
@@ -338,14 +638,40 @@ class LanguageServer:
             )
             raise MultilspyException("Language Server not started")
 
+        return (await self.request_definition_location_list(relative_file_path, line, column)).to_locations()
+
+    @requires_readiness(ReadinessLevel.PROJECTS_IMPORTED)
+    async def request_definition_location_list(self, relative_file_path: str, line: int, column: int) -> LocationList:
+        """
+        Raise a [textDocument/definition](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_definition) request to the Language Server
+        for the symbol at the given line and column in the given file. Wait for the response and return the result as a LocationList,
+        which stores each distinct file once and only builds the Location dicts when accessed.
+
+        :param relative_file_path: The relative path of the file that has the symbol for which definition should be looked up
+        :param line: The line number of the symbol
+        :param column: The column number of the symbol
+
+        :return LocationList: The locations where the symbol is defined
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_definition_location_list called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        cache_key = self._response_cache_key("textDocument/definition", relative_file_path, line, column)
+        if cache_key is not None:
+            is_cached, cached_response = self.response_cache.get(cache_key)
+            if is_cached:
+                return cached_response
+
         with self.open_file(relative_file_path):
             # sending request to the language server and waiting for response
             response = await self.server.send.definition(
                 {
                     LSPConstants.TEXT_DOCUMENT: {
-                        LSPConstants.URI: pathlib.Path(
-                            str(PurePath(self.repository_root_path, relative_file_path))
-                        ).as_uri()
+                        LSPConstants.URI: self.uri_path_cache.uri_for_relative_path(relative_file_path)
                     },
                     LSPConstants.POSITION: {
                         LSPConstants.LINE: line,
@@ -354,52 +680,15 @@ class LanguageServer:
                 }
             )
 
-        ret: List[multilspy_types.Location] = []
-        if isinstance(response, list):
-            # response is either of type Location[] or LocationLink[]
-            for item in response:
-                assert isinstance(item, dict)
-                if LSPConstants.URI in item and LSPConstants.RANGE in item:
-                    new_item: multilspy_types.Location = {}
-                    new_item.update(item)
-                    new_item["absolutePath"] = PathUtils.uri_to_path(new_item["uri"])
-                    new_item["relativePath"] = str(
-                        PurePath(os.path.relpath(new_item["absolutePath"], self.repository_root_path))
-                    )
-                    ret.append(multilspy_types.Location(new_item))
-                elif (
-                    LSPConstants.ORIGIN_SELECTION_RANGE in item
-                    and LSPConstants.TARGET_URI in item
-                    and LSPConstants.TARGET_RANGE in item
-                    and LSPConstants.TARGET_SELECTION_RANGE in item
-                ):
-                    new_item: multilspy_types.Location = {}
-                    new_item["uri"] = item[LSPConstants.TARGET_URI]
-                    new_item["absolutePath"] = PathUtils.uri_to_path(new_item["uri"])
-                    new_item["relativePath"] = str(
-                        PurePath(os.path.relpath(new_item["absolutePath"], self.repository_root_path))
-                    )
-                    new_item["range"] = item[LSPConstants.TARGET_SELECTION_RANGE]
-                    ret.append(multilspy_types.Location(**new_item))
-                else:
-                    assert False, f"Unexpected response from Language Server: {item}"
-        elif isinstance(response, dict):
-            # response is of type Location
-            assert LSPConstants.URI in response
-            assert LSPConstants.RANGE in response
-
-            new_item: multilspy_types.Location = {}
-            new_item.update(response)
-            new_item["absolutePath"] = PathUtils.uri_to_path(new_item["uri"])
-            new_item["relativePath"] = str(
-                PurePath(os.path.relpath(new_item["absolutePath"], self.repository_root_path))
-            )
-            ret.append(multilspy_types.Location(**new_item))
-        else:
-            assert False, f"Unexpected response from Language Server: {response}"
+        # response is either of type Location, Location[] or LocationLink[]
+        assert isinstance(response, (list, dict)), f"Unexpected response from Language Server: {response}"
+        ret = LocationList.from_lsp_response(response, self.uri_path_cache)
 
+        if cache_key is not None:
+            self.response_cache.put(cache_key, ret)
         return ret
 
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
     async def request_references(
         self, relative_file_path: str, line: int, column: int
     ) -> List[multilspy_types.Location]:
@@ -421,35 +710,158 @@ class LanguageServer:
             )
             raise MultilspyException("Language Server not started")
 
+        return (await self.request_references_location_list(relative_file_path, line, column)).to_locations()
+
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
+    async def request_references_location_list(self, relative_file_path: str, line: int, column: int) -> LocationList:
+        """
+        Raise a [textDocument/references](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_references) request to the Language Server
+        to find references to the symbol at the given line and column in the given file. Wait for the response and return the result
+        as a LocationList, which stores each distinct file once and only builds the Location dicts when accessed.
+
+        :param relative_file_path: The relative path of the file that has the symbol for which references should be looked up
+        :param line: The line number of the symbol
+        :param column: The column number of the symbol
+
+        :return LocationList: The locations where the symbol is referenced
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_references_location_list called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        cache_key = self._response_cache_key("textDocument/references", relative_file_path, line, column)
+        if cache_key is not None:
+            is_cached, cached_response = self.response_cache.get(cache_key)
+            if is_cached:
+                return cached_response
+
         with self.open_file(relative_file_path):
             # sending request to the language server and waiting for response
             response = await self.server.send.references(
                 {
                     "context": {"includeDeclaration": False},
                     "textDocument": {
-                        "uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()
+                        "uri": self.uri_path_cache.uri_for_relative_path(relative_file_path)
                     },
                     "position": {"line": line, "character": column},
                 }
             )
 
-        ret: List[multilspy_types.Location] = []
         assert isinstance(response, list)
-        for item in response:
-            assert isinstance(item, dict)
-            assert LSPConstants.URI in item
-            assert LSPConstants.RANGE in item
+        ret = LocationList.from_lsp_response(response, self.uri_path_cache)
 
-            new_item: multilspy_types.Location = {}
-            new_item.update(item)
-            new_item["absolutePath"] = PathUtils.uri_to_path(new_item["uri"])
-            new_item["relativePath"] = str(
-                PurePath(os.path.relpath(new_item["absolutePath"], self.repository_root_path))
+        if cache_key is not None:
+            self.response_cache.put(cache_key, ret)
+        return ret
+
+    async def _pipeline_position_queries(
+        self,
+        positions: Iterable[QueryPosition],
+        query: Callable[[str, int, int], Awaitable[Any]],
+        max_in_flight: int,
+    ) -> AsyncIterator[Tuple[QueryPosition, Any]]:
+        """
+        Runs query for each of the given positions, keeping at most max_in_flight queries outstanding,
+        and yields (position, result) pairs in the order in which the queries complete.
+
+        Positions are grouped by file, and every file is opened once for all the queries on it. A file is
+        closed as soon as the last query on it completes, so that only the files with outstanding queries are open.
+        """
+        if max_in_flight < 1:
+            raise MultilspyException("max_in_flight must be at least 1")
+
+        positions_by_file: Dict[str, List[QueryPosition]] = {}
+        for position in positions:
+            positions_by_file.setdefault(position[0], []).append(position)
+        pending_positions = iter([position for file_positions in positions_by_file.values() for position in file_positions])
+        remaining_by_file = {file_path: len(file_positions) for file_path, file_positions in positions_by_file.items()}
+
+        open_files: Dict[str, Any] = {}
+        in_flight: Dict[asyncio.Task, QueryPosition] = {}
+
+        def schedule_next() -> bool:
+            position = next(pending_positions, None)
+            if position is None:
+                return False
+            relative_file_path, line, column = position
+            if relative_file_path not in open_files:
+                open_file_ctx = self.open_file(relative_file_path)
+                open_file_ctx.__enter__()
+                open_files[relative_file_path] = open_file_ctx
+            in_flight[asyncio.ensure_future(query(relative_file_path, line, column))] = position
+            return True
+
+        try:
+            while len(in_flight) < max_in_flight and schedule_next():
+                pass
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position = in_flight.pop(task)
+                    remaining_by_file[position[0]] -= 1
+                    if remaining_by_file[position[0]] == 0:
+                        open_files.pop(position[0]).__exit__(None, None, None)
+                    result = task.result()
+                    schedule_next()
+                    yield position, result
+        finally:
+            for task in in_flight:
+                task.cancel()
+            for open_file_ctx in open_files.values():
+                open_file_ctx.__exit__(None, None, None)
+
+    @requires_readiness(ReadinessLevel.PROJECTS_IMPORTED)
+    async def request_definitions_batch(
+        self, positions: Iterable[QueryPosition], max_in_flight: int = 16
+    ) -> AsyncIterator[Tuple[QueryPosition, List[multilspy_types.Location]]]:
+        """
+        Raise [textDocument/definition](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_definition) requests to the Language Server
+        for the symbols at each of the given positions, keeping at most max_in_flight requests outstanding. Each file is opened once
+        for all the positions in it. Results are yielded as soon as they arrive, in completion order.
+
+        :param positions: An iterable of (relative_file_path, line, column) tuples
+        :param max_in_flight: The maximum number of requests awaiting a response at any time
+
+        :return AsyncIterator[Tuple[QueryPosition, List[multilspy_types.Location]]]: (position, locations where the symbol is defined) pairs
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_definitions_batch called before Language Server started",
+                logging.ERROR,
             )
-            ret.append(multilspy_types.Location(**new_item))
+            raise MultilspyException("Language Server not started")
 
-        return ret
+        async for position, result in self._pipeline_position_queries(positions, self.request_definition, max_in_flight):
+            yield position, result
+
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
+    async def request_references_batch(
+        self, positions: Iterable[QueryPosition], max_in_flight: int = 16
+    ) -> AsyncIterator[Tuple[QueryPosition, List[multilspy_types.Location]]]:
+        """
+        Raise [textDocument/references](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_references) requests to the Language Server
+        for the symbols at each of the given positions, keeping at most max_in_flight requests outstanding. Each file is opened once
+        for all the positions in it. Results are yielded as soon as they arrive, in completion order.
+
+        :param positions: An iterable of (relative_file_path, line, column) tuples
+        :param max_in_flight: The maximum number of requests awaiting a response at any time
+
+        :return AsyncIterator[Tuple[QueryPosition, List[multilspy_types.Location]]]: (position, locations where the symbol is referenced) pairs
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_references_batch called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        async for position, result in self._pipeline_position_queries(positions, self.request_references, max_in_flight):
+            yield position, result
 
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
     async def request_completions(
         self, relative_file_path: str, line: int, column: int, allow_incomplete: bool = False
     ) -> List[multilspy_types.CompletionItem]:
@@ -464,9 +876,7 @@ class LanguageServer:
         :return List[multilspy_types.CompletionItem]: A list of completions
         """
         with self.open_file(relative_file_path):
-            open_file_buffer = self.open_file_buffers[
-                pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()
-            ]
+            open_file_buffer = self.open_file_buffers[self.uri_path_cache.uri_for_relative_path(relative_file_path)]
             completion_params: LSPTypes.CompletionParams = {
                 "position": {"line": line, "character": column},
                 "textDocument": {"uri": open_file_buffer.uri},
@@ -544,6 +954,7 @@ class LanguageServer:
                 for json_repr in set([json.dumps(item, sort_keys=True) for item in completions_list])
             ]
 
+    @requires_readiness(ReadinessLevel.INITIALIZED)
     async def request_document_symbols(self, relative_file_path: str) -> Tuple[List[multilspy_types.UnifiedSymbolInformation], Union[List[multilspy_types.TreeRepr], None]]:
         """
         Raise a [textDocument/documentSymbol](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_documentSymbol) request to the Language Server
@@ -551,44 +962,246 @@ class LanguageServer:
 
         :param relative_file_path: The relative path of the file that has the symbols
 
-        :return Tuple[List[multilspy_types.UnifiedSymbolInformation], Union[List[multilspy_types.TreeRepr], None]]: A list of symbols in the file, and the tree representation of the symbols
+        :return Tuple[List[multilspy_types.UnifiedSymbolInformation], Union[List[multilspy_types.TreeRepr], None]]: A list of symbols in the file in preorder, and the tree representation of the symbols, which is None if the Language Server returned flat symbols
+        """
+        tree = await self.request_document_symbol_tree(relative_file_path)
+        symbols = tree.symbols
+        if self.response_cache is not None:
+            # The tree may be shared with the response cache, so the caller gets its own copy of the symbols
+            symbols = copy.deepcopy(symbols)
+        return symbols, tree.to_tree_repr() if tree.is_hierarchical else None
+
+    @requires_readiness(ReadinessLevel.INITIALIZED)
+    async def request_document_symbol_tree(self, relative_file_path: str) -> SymbolTree:
         """
+        Raise a [textDocument/documentSymbol](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_documentSymbol) request to the Language Server
+        to find symbols in the given file. Wait for the response and return the symbols along with their hierarchy.
+
+        :param relative_file_path: The relative path of the file that has the symbols
+
+        :return SymbolTree: The symbols in the file in preorder, with the index of the parent of each symbol. The tree may be
+        shared with the response cache, and must not be mutated.
+        """
+        cache_key = self._response_cache_key("textDocument/documentSymbol", relative_file_path)
+        if cache_key is not None:
+            is_cached, cached_response = self.response_cache.get(cache_key)
+            if is_cached:
+                return cached_response
+
         with self.open_file(relative_file_path):
             response = await self.server.send.document_symbol(
                 {
                     "textDocument": {
-                        "uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()
+                        "uri": self.uri_path_cache.uri_for_relative_path(relative_file_path)
                     }
                 }
             )
-        
-        ret: List[multilspy_types.UnifiedSymbolInformation] = []
-        l_tree = None
+
         assert isinstance(response, list)
         for item in response:
             assert isinstance(item, dict)
             assert LSPConstants.NAME in item
             assert LSPConstants.KIND in item
+        ret = SymbolTree.from_document_symbols(response)
 
-            if LSPConstants.CHILDREN in item:
-                # TODO: l_tree should be a list of TreeRepr. Define the following function to return TreeRepr as well
-                
-                def visit_tree_nodes_and_build_tree_repr(tree: LSPTypes.DocumentSymbol) -> List[multilspy_types.UnifiedSymbolInformation]:
-                    l: List[multilspy_types.UnifiedSymbolInformation] = []
-                    children = tree['children'] if 'children' in tree else []
-                    if 'children' in tree:
-                        del tree['children']
-                    l.append(multilspy_types.UnifiedSymbolInformation(**tree))
-                    for child in children:
-                        l.extend(visit_tree_nodes_and_build_tree_repr(child))
-                    return l
-                
-                ret.extend(visit_tree_nodes_and_build_tree_repr(item))
-            else:
-                ret.append(multilspy_types.UnifiedSymbolInformation(**item))
+        if cache_key is not None:
+            self.response_cache.put(cache_key, ret)
+        return ret
+
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
+    async def request_workspace_symbols(self, query: str) -> List[multilspy_types.UnifiedSymbolInformation]:
+        """
+        Find the symbols of the workspace whose name matches the given query.
+
+        If the symbol index has been built with build_symbol_index, it answers the query after re-indexing the files
+        changed since, and the symbols whose name contains the query (ignoring case) are returned. Otherwise, a
+        [workspace/symbol](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#workspace_symbol)
+        request is raised to the Language Server, which decides how the query is matched.
+
+        :param query: The query to match the symbol names against
+
+        :return List[multilspy_types.UnifiedSymbolInformation]: A list of matching symbols, with their location
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_workspace_symbols called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        if self.symbol_index is not None:
+            await self.update_symbol_index(sorted(self.symbol_index.stale_files))
+            return self.symbol_index.search(query)
+
+        response = await self.server.send.workspace_symbol({"query": query})
+        ret: List[multilspy_types.UnifiedSymbolInformation] = []
+        for item in response or []:
+            assert isinstance(item, dict)
+            assert LSPConstants.NAME in item
+            assert LSPConstants.KIND in item
+
+            new_item: multilspy_types.UnifiedSymbolInformation = {}
+            new_item.update(item)
+            if "location" in new_item and LSPConstants.URI in new_item["location"]:
+                location = dict(new_item["location"])
+                location["absolutePath"], location["relativePath"] = self.uri_path_cache.paths_for_uri(location["uri"])
+                new_item["location"] = location
+            ret.append(multilspy_types.UnifiedSymbolInformation(**new_item))
+        return ret
+
+    async def _crawl_document_symbols(
+        self,
+        relative_file_paths: Iterable[str],
+        max_in_flight: int,
+        checkpoint_path: Union[str, None],
+        read_workers: int,
+    ) -> AsyncIterator[Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]]:
+        """
+        Requests the document symbols of each of the given files, keeping at most max_in_flight files outstanding,
+        and yields (relative_file_path, symbols) pairs in the order in which the requests complete.
+
+        Files are read in a pool of read_workers threads, so that reading the next files overlaps with the requests
+        in flight. If checkpoint_path is given, the files already listed in it are skipped, and each file is appended
+        to it once its result has been consumed.
+        """
+        if max_in_flight < 1:
+            raise MultilspyException("max_in_flight must be at least 1")
+
+        done_file_paths = set()
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                done_file_paths = {json.loads(line) for line in f if line.strip()}
+        pending_file_paths = iter([p for p in relative_file_paths if p not in done_file_paths])
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=read_workers)
+
+        async def crawl_file(relative_file_path: str) -> Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]:
+            absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
+            contents = await loop.run_in_executor(executor, FileUtils.read_file, self.logger, absolute_file_path)
+            with self.open_file(relative_file_path, contents):
+                symbols, _ = await self.request_document_symbols(relative_file_path)
+            return relative_file_path, symbols
+
+        in_flight = set()
+
+        def schedule_next() -> bool:
+            relative_file_path = next(pending_file_paths, None)
+            if relative_file_path is None:
+                return False
+            in_flight.add(asyncio.ensure_future(crawl_file(relative_file_path)))
+            return True
+
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path is not None else None
+        try:
+            while len(in_flight) < max_in_flight and schedule_next():
+                pass
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    in_flight.remove(task)
+                    relative_file_path, symbols = task.result()
+                    yield relative_file_path, symbols
+                    if checkpoint is not None:
+                        checkpoint.write(json.dumps(relative_file_path) + "\n")
+                        checkpoint.flush()
+                    schedule_next()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            executor.shutdown(wait=False)
+            if checkpoint is not None:
+                checkpoint.close()
+
+    async def crawl_document_symbols(
+        self,
+        relative_file_paths: Union[Iterable[str], None] = None,
+        max_in_flight: int = 32,
+        checkpoint_path: Union[str, None] = None,
+        read_workers: int = 4,
+    ) -> AsyncIterator[Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]]:
+        """
+        Request the document symbols of every source file of the repository, keeping at most max_in_flight
+        [textDocument/documentSymbol](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_documentSymbol)
+        requests outstanding, while the next files are read in a thread pool. Results are yielded per file as soon as they arrive,
+        in completion order.
 
-        return ret, l_tree
-    
+        The crawl can be resumed: with a checkpoint_path, each file is recorded in the checkpoint file once its result has been
+        consumed, and the files recorded by a previous crawl are skipped.
+
+        :param relative_file_paths: The files to crawl. Defaults to all the source files of the repository.
+        :param max_in_flight: The maximum number of files being read or awaiting a response at any time
+        :param checkpoint_path: The path of the checkpoint file, None to not checkpoint the crawl
+        :param read_workers: The number of threads reading the files
+
+        :return AsyncIterator[Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]]: (relative_file_path, symbols in the file) pairs
+        """
+        if not self.server_started:
+            self.logger.log(
+                "crawl_document_symbols called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
+
+        if relative_file_paths is None:
+            relative_file_paths = FileUtils.list_source_files(
+                self.repository_root_path, SOURCE_FILE_EXTENSIONS.get(self.language_id, ())
+            )
+        async for relative_file_path, symbols in self._crawl_document_symbols(
+            relative_file_paths, max_in_flight, checkpoint_path, read_workers
+        ):
+            yield relative_file_path, symbols
+
+    async def build_symbol_index(
+        self, relative_file_paths: Union[Iterable[str], None] = None, max_in_flight: int = 16
+    ) -> SymbolIndex:
+        """
+        Build the client-side index of the workspace symbols used by request_workspace_symbols, from the document
+        symbols of the given files. The index is kept up to date with the edits made through this LanguageServer
+        and the changes notified with notify_did_change_watched_files.
+
+        :param relative_file_paths: The files to index. Defaults to all the source files of the repository.
+        :param max_in_flight: The maximum number of documentSymbol requests awaiting a response at any time
+
+        :return SymbolIndex: The symbol index
+        """
+        symbol_index = SymbolIndex()
+        async for relative_file_path, symbols in self.crawl_document_symbols(relative_file_paths, max_in_flight):
+            relative_file_path = str(PurePath(relative_file_path))
+            symbol_index.set_file_symbols(
+                relative_file_path, [self._symbol_with_location(relative_file_path, symbol) for symbol in symbols]
+            )
+        self.symbol_index = symbol_index
+        return symbol_index
+
+    async def update_symbol_index(self, relative_file_paths: Iterable[str], max_in_flight: int = 16) -> None:
+        """
+        Re-index the symbols of the given files in the symbol index, removing the files which no longer exist
+
+        :param relative_file_paths: The files to re-index
+        :param max_in_flight: The maximum number of documentSymbol requests awaiting a response at any time
+        """
+        if self.symbol_index is None:
+            self.logger.log("update_symbol_index called before build_symbol_index", logging.ERROR)
+            raise MultilspyException("Symbol index not built")
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+        symbol_index = self.symbol_index
+
+        async def index_file(relative_file_path: str) -> None:
+            relative_file_path = str(PurePath(relative_file_path))
+            if not os.path.exists(os.path.join(self.repository_root_path, relative_file_path)):
+                symbol_index.remove_file(relative_file_path)
+                return
+            async with semaphore:
+                symbols, _ = await self.request_document_symbols(relative_file_path)
+            symbol_index.set_file_symbols(
+                relative_file_path, [self._symbol_with_location(relative_file_path, symbol) for symbol in symbols]
+            )
+
+        await asyncio.gather(*[index_file(relative_file_path) for relative_file_path in relative_file_paths])
+
+    @requires_readiness(ReadinessLevel.INITIALIZED)
     async def request_hover(self, relative_file_path: str, line: int, column: int) -> Union[multilspy_types.Hover, None]:
         """
         Raise a [textDocument/hover](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_hover) request to the Language Server
@@ -600,11 +1213,17 @@ class LanguageServer:
 
         :return None
         """
+        cache_key = self._response_cache_key("textDocument/hover", relative_file_path, line, column)
+        if cache_key is not None:
+            is_cached, cached_response = self.response_cache.get(cache_key)
+            if is_cached:
+                return copy.deepcopy(cached_response)
+
         with self.open_file(relative_file_path):
             response = await self.server.send.hover(
                 {
                     "textDocument": {
-                        "uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()
+                        "uri": self.uri_path_cache.uri_for_relative_path(relative_file_path)
                     },
                     "position": {
                         "line": line,
@@ -614,12 +1233,65 @@ class LanguageServer:
             )
         
         if response is None:
-            return None
+            ret = None
+        else:
+            assert isinstance(response, dict)
+            ret = multilspy_types.Hover(**response)
 
-        assert isinstance(response, dict)
+        if cache_key is not None:
+            # The cached hover is shared by the later lookups, so the caller gets its own copy
+            self.response_cache.put(cache_key, ret)
+            return copy.deepcopy(ret)
+        return ret
 
-        return multilspy_types.Hover(**response)
+    @requires_readiness(ReadinessLevel.PROJECTS_IMPORTED)
+    async def request_diagnostics(
+        self, relative_file_path: str, wait_for_version: Union[int, None] = None, timeout: Union[float, None] = None
+    ) -> List[multilspy_types.Diagnostic]:
+        """
+        Return the diagnostics (e.g. compile errors) of the given file, once the Language Server has reported them for
+        the given version of the file. The diagnostics are pulled with a [textDocument/diagnostic](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_diagnostic)
+        request if the Language Server supports it, and are otherwise those it pushed with textDocument/publishDiagnostics.
+
+        :param relative_file_path: The relative path of the file
+        :param wait_for_version: The version of the open file to wait diagnostics for. Only diagnostics reported for
+            that version or a later one are returned. Defaults to the current version, in which case diagnostics
+            published without a version are also accepted once received after the latest change of the file, even
+            though the Language Server may have computed them before processing that change.
+        :param timeout: The maximum number of seconds to wait for the diagnostics, None to wait indefinitely
+
+        :return List[multilspy_types.Diagnostic]: The diagnostics of the file
+        """
+        if not self.server_started:
+            self.logger.log(
+                "request_diagnostics called before Language Server started",
+                logging.ERROR,
+            )
+            raise MultilspyException("Language Server not started")
 
+        with self.open_file(relative_file_path):
+            uri = self.uri_path_cache.uri_for_relative_path(relative_file_path)
+            file_buffer = self.open_file_buffers[uri]
+            accept_unversioned = wait_for_version is None
+            if wait_for_version is None:
+                wait_for_version = file_buffer.version
+
+            if "diagnosticProvider" in self.server_capabilities:
+                entry = self.diagnostics.get(uri)
+                params: LSPTypes.DocumentDiagnosticParams = {"textDocument": {"uri": uri}}
+                if entry is not None and entry.result_id is not None:
+                    params["previousResultId"] = entry.result_id
+                report = await self.server.send.text_document_diagnostic(params)
+                if report["kind"] == "full":
+                    diagnostics = [_to_diagnostic(d) for d in report["items"]]
+                else:
+                    diagnostics = entry.diagnostics if entry is not None else []
+                self.diagnostics.update(uri, file_buffer.version, diagnostics, report.get("resultId"))
+
+            entry = await asyncio.wait_for(self.diagnostics.wait_for(uri, wait_for_version, accept_unversioned), timeout)
+            return list(entry.diagnostics)
+
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
     async def request_prepare_call_hierarchy(self, relative_file_path: str, line: int, column: int) -> List[multilspy_types.CallHierarchyItem]:
         """
         Raise a [textDocument/prepareCallHierarchy](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_prepareCallHierarchy) request to the Language Server
@@ -635,7 +1307,7 @@ class LanguageServer:
             response = await self.server.send.prepare_call_hierarchy(
                 {
                     "textDocument": {
-                        "uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()
+                        "uri": self.uri_path_cache.uri_for_relative_path(relative_file_path)
                     },
                     "position": {
                         "line": line,
@@ -651,6 +1323,7 @@ class LanguageServer:
 
         return [multilspy_types.CallHierarchyItem(**item) for item in response]
 
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
     async def request_incoming_calls(self, req_call_item: multilspy_types.CallHierarchyItem) -> List[multilspy_types.CallHierarchyItem]:
         """
         Raise a [callHierarchy/incomingCalls](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#callHierarchy_incomingCalls) request to the Language Server
@@ -671,6 +1344,7 @@ class LanguageServer:
 
         return [multilspy_types.CallHierarchyItem(**item["from"]) for item in incoming_call_response]
 
+    @requires_readiness(ReadinessLevel.SERVICE_READY)
     async def request_outgoing_calls(self, req_call_item: multilspy_types.CallHierarchyItem) -> List[multilspy_types.CallHierarchyItem]:
         """
         Request outgoing calls for a given call hierarchy item.
@@ -720,13 +1394,14 @@ class SyncLanguageServer:
         return SyncLanguageServer(LanguageServer.create(config, logger, repository_root_path))
 
     @contextmanager
-    def open_file(self, relative_file_path: str) -> Iterator[None]:
+    def open_file(self, relative_file_path: str, contents: Union[str, None] = None) -> Iterator[None]:
         """
         Open a file in the Language Server. This is required before making any requests to the Language Server.
 
         :param relative_file_path: The relative path of the file to open.
+        :param contents: The contents of the file, if already read. Defaults to reading the file. Ignored if the file is already open.
         """
-        with self.language_server.open_file(relative_file_path):
+        with self.language_server.open_file(relative_file_path, contents):
             yield
 
     def insert_text_at_position(
@@ -754,6 +1429,15 @@ class SyncLanguageServer:
         """
         return self.language_server.delete_text_between_positions(relative_file_path, start, end)
 
+    def notify_did_change_watched_files(self, changes: List[LSPTypes.FileEvent]) -> None:
+        """
+        Raise a [workspace/didChangeWatchedFiles](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#workspace_didChangeWatchedFiles) notification
+        to inform the Language Server about files changed outside of the client, and invalidate the cached responses.
+
+        :param changes: The file events, each with the uri of the file and the type of the change.
+        """
+        self.language_server.notify_did_change_watched_files(changes)
+
     def get_open_file_text(self, relative_file_path: str) -> str:
         """
         Get the contents of the given opened file as per the Language Server.
@@ -762,6 +1446,35 @@ class SyncLanguageServer:
         """
         return self.language_server.get_open_file_text(relative_file_path)
    
+    def _iterate_threadsafe(self, async_iterator: AsyncIterator[Any]) -> Iterator[Any]:
+        """
+        Drives the given async iterator on the event loop thread, and yields its items in the calling thread as they arrive.
+        """
+        items: queue.Queue = queue.Queue()
+        end_of_items = object()
+
+        async def pump() -> None:
+            try:
+                async for item in async_iterator:
+                    items.put((item, None))
+                items.put((end_of_items, None))
+            except Exception as exc:
+                items.put((end_of_items, exc))
+            finally:
+                await async_iterator.aclose()
+
+        pump_future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item, exc = items.get()
+                if exc is not None:
+                    raise exc
+                if item is end_of_items:
+                    break
+                yield item
+        finally:
+            pump_future.cancel()
+
     @contextmanager
     def start_server(self) -> Iterator["SyncLanguageServer"]:
         """
@@ -779,6 +1492,15 @@ class SyncLanguageServer:
         self.loop.call_soon_threadsafe(self.loop.stop)
         loop_thread.join()
 
+    def wait_for_readiness(self, level: ReadinessLevel, timeout: Union[float, None] = None) -> None:
+        """
+        Wait until the Language Server has reached the given readiness level.
+
+        :param level: The readiness level to wait for
+        :param timeout: The maximum number of seconds to wait, None to wait indefinitely
+        """
+        asyncio.run_coroutine_threadsafe(self.language_server.wait_for_readiness(level), self.loop).result(timeout)
+
     def request_definition(self, file_path: str, line: int, column: int) -> List[multilspy_types.Location]:
         """
         Raise a [textDocument/definition](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_definition) request to the Language Server
@@ -795,6 +1517,22 @@ class SyncLanguageServer:
         ).result()
         return result
 
+    def request_definition_location_list(self, relative_file_path: str, line: int, column: int) -> LocationList:
+        """
+        Raise a [textDocument/definition](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_definition) request to the Language Server
+        for the symbol at the given line and column in the given file. Wait for the response and return the result as a LocationList.
+
+        :param relative_file_path: The relative path of the file that has the symbol for which definition should be looked up
+        :param line: The line number of the symbol
+        :param column: The column number of the symbol
+
+        :return LocationList: The locations where the symbol is defined
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.request_definition_location_list(relative_file_path, line, column), self.loop
+        ).result()
+        return result
+
     def request_references(self, file_path: str, line: int, column: int) -> List[multilspy_types.Location]:
         """
         Raise a [textDocument/references](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_references) request to the Language Server
@@ -811,6 +1549,52 @@ class SyncLanguageServer:
         ).result()
         return result
 
+    def request_references_location_list(self, relative_file_path: str, line: int, column: int) -> LocationList:
+        """
+        Raise a [textDocument/references](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_references) request to the Language Server
+        to find references to the symbol at the given line and column in the given file. Wait for the response and return the result as a LocationList.
+
+        :param relative_file_path: The relative path of the file that has the symbol for which references should be looked up
+        :param line: The line number of the symbol
+        :param column: The column number of the symbol
+
+        :return LocationList: The locations where the symbol is referenced
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.request_references_location_list(relative_file_path, line, column), self.loop
+        ).result()
+        return result
+
+    def request_definitions_batch(
+        self, positions: Iterable[QueryPosition], max_in_flight: int = 16
+    ) -> Iterator[Tuple[QueryPosition, List[multilspy_types.Location]]]:
+        """
+        Raise [textDocument/definition](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_definition) requests to the Language Server
+        for the symbols at each of the given positions, keeping at most max_in_flight requests outstanding. Each file is opened once
+        for all the positions in it. Results are yielded as soon as they arrive, in completion order.
+
+        :param positions: An iterable of (relative_file_path, line, column) tuples
+        :param max_in_flight: The maximum number of requests awaiting a response at any time
+
+        :return Iterator[Tuple[QueryPosition, List[multilspy_types.Location]]]: (position, locations where the symbol is defined) pairs
+        """
+        yield from self._iterate_threadsafe(self.language_server.request_definitions_batch(positions, max_in_flight))
+
+    def request_references_batch(
+        self, positions: Iterable[QueryPosition], max_in_flight: int = 16
+    ) -> Iterator[Tuple[QueryPosition, List[multilspy_types.Location]]]:
+        """
+        Raise [textDocument/references](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_references) requests to the Language Server
+        for the symbols at each of the given positions, keeping at most max_in_flight requests outstanding. Each file is opened once
+        for all the positions in it. Results are yielded as soon as they arrive, in completion order.
+
+        :param positions: An iterable of (relative_file_path, line, column) tuples
+        :param max_in_flight: The maximum number of requests awaiting a response at any time
+
+        :return Iterator[Tuple[QueryPosition, List[multilspy_types.Location]]]: (position, locations where the symbol is referenced) pairs
+        """
+        yield from self._iterate_threadsafe(self.language_server.request_references_batch(positions, max_in_flight))
+
     def request_completions(
         self, relative_file_path: str, line: int, column: int, allow_incomplete: bool = False
     ) -> List[multilspy_types.CompletionItem]:
@@ -844,6 +1628,85 @@ class SyncLanguageServer:
         ).result()
         return result
 
+    def request_workspace_symbols(self, query: str) -> List[multilspy_types.UnifiedSymbolInformation]:
+        """
+        Find the symbols of the workspace whose name matches the given query, using the symbol index if it has been
+        built with build_symbol_index, and a workspace/symbol request to the Language Server otherwise.
+
+        :param query: The query to match the symbol names against
+
+        :return List[multilspy_types.UnifiedSymbolInformation]: A list of matching symbols, with their location
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.request_workspace_symbols(query), self.loop
+        ).result()
+        return result
+
+    def crawl_document_symbols(
+        self,
+        relative_file_paths: Union[Iterable[str], None] = None,
+        max_in_flight: int = 32,
+        checkpoint_path: Union[str, None] = None,
+        read_workers: int = 4,
+    ) -> Iterator[Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]]:
+        """
+        Request the document symbols of every source file of the repository, keeping at most max_in_flight requests
+        outstanding, while the next files are read in a thread pool. Results are yielded per file as soon as they arrive.
+        With a checkpoint_path, the files whose results have been consumed are recorded, and skipped when the crawl is resumed.
+
+        :param relative_file_paths: The files to crawl. Defaults to all the source files of the repository.
+        :param max_in_flight: The maximum number of files being read or awaiting a response at any time
+        :param checkpoint_path: The path of the checkpoint file, None to not checkpoint the crawl
+        :param read_workers: The number of threads reading the files
+
+        :return Iterator[Tuple[str, List[multilspy_types.UnifiedSymbolInformation]]]: (relative_file_path, symbols in the file) pairs
+        """
+        yield from self._iterate_threadsafe(
+            self.language_server.crawl_document_symbols(relative_file_paths, max_in_flight, checkpoint_path, read_workers)
+        )
+
+    def build_symbol_index(
+        self, relative_file_paths: Union[Iterable[str], None] = None, max_in_flight: int = 16
+    ) -> SymbolIndex:
+        """
+        Build the client-side index of the workspace symbols used by request_workspace_symbols, from the document
+        symbols of the given files, or of all the source files of the repository.
+
+        :param relative_file_paths: The files to index. Defaults to all the source files of the repository.
+        :param max_in_flight: The maximum number of documentSymbol requests awaiting a response at any time
+
+        :return SymbolIndex: The symbol index
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.build_symbol_index(relative_file_paths, max_in_flight), self.loop
+        ).result()
+        return result
+
+    def update_symbol_index(self, relative_file_paths: Iterable[str], max_in_flight: int = 16) -> None:
+        """
+        Re-index the symbols of the given files in the symbol index, removing the files which no longer exist
+
+        :param relative_file_paths: The files to re-index
+        :param max_in_flight: The maximum number of documentSymbol requests awaiting a response at any time
+        """
+        asyncio.run_coroutine_threadsafe(
+            self.language_server.update_symbol_index(relative_file_paths, max_in_flight), self.loop
+        ).result()
+
+    def request_document_symbol_tree(self, relative_file_path: str) -> SymbolTree:
+        """
+        Raise a [textDocument/documentSymbol](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_documentSymbol) request to the Language Server
+        to find symbols in the given file. Wait for the response and return the symbols along with their hierarchy.
+
+        :param relative_file_path: The relative path of the file that has the symbols
+
+        :return SymbolTree: The symbols in the file in preorder, with the index of the parent of each symbol
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.request_document_symbol_tree(relative_file_path), self.loop
+        ).result()
+        return result
+
     def request_hover(self, relative_file_path: str, line: int, column: int) -> Union[multilspy_types.Hover, None]:
         """
         Raise a [textDocument/hover](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_hover) request to the Language Server
@@ -860,6 +1723,27 @@ class SyncLanguageServer:
         ).result()
         return result
 
+    def request_diagnostics(
+        self, relative_file_path: str, wait_for_version: Union[int, None] = None, timeout: Union[float, None] = None
+    ) -> List[multilspy_types.Diagnostic]:
+        """
+        Return the diagnostics (e.g. compile errors) of the given file, once the Language Server has reported them for
+        the given version of the file.
+
+        :param relative_file_path: The relative path of the file
+        :param wait_for_version: The version of the open file to wait diagnostics for. Only diagnostics reported for
+            that version or a later one are returned. Defaults to the current version, in which case diagnostics
+            published without a version are also accepted once received after the latest change of the file, even
+            though the Language Server may have computed them before processing that change.
+        :param timeout: The maximum number of seconds to wait for the diagnostics, None to wait indefinitely
+
+        :return List[multilspy_types.Diagnostic]: The diagnostics of the file
+        """
+        result = asyncio.run_coroutine_threadsafe(
+            self.language_server.request_diagnostics(relative_file_path, wait_for_version, timeout), self.loop
+        ).result()
+        return result
+
     def request_prepare_call_hierarchy(self, relative_file_path: str, line: int, column: int) -> List[multilspy_types.CallHierarchyItem]:
         """
         Raise a [textDocument/prepareCallHierarchy](https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_prepareCallHierarchy) request to the Language Server
@@ -0,0 +1,322 @@
+"""
+This file provides a pool of pre-initialized language servers, which hides the cost of starting
+a language server (process launch, initialization, project import) from short-lived users.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import threading
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Union
+
+from .language_server import LanguageServer, SyncLanguageServer
+from .multilspy_config import MultilspyConfig
+from .multilspy_exceptions import MultilspyException
+from .multilspy_logger import MultilspyLogger
+
+
+@dataclasses.dataclass
+class PooledLanguageServer:
+    """
+    A started language server owned by a LanguageServerPool
+    """
+
+    # The started language server
+    language_server: LanguageServer
+
+    # Exits the start_server context of the language server
+    exit_stack: AsyncExitStack
+
+    # The repository the language server was started for
+    repository_root_path: str
+
+    # Number of times the language server has been leased
+    num_leases: int = 0
+
+    # time.monotonic() at which the language server was last returned to the pool
+    last_used: float = dataclasses.field(default_factory=time.monotonic)
+
+
+def get_available_memory_mb() -> Union[int, None]:
+    """
+    Returns the memory available for new processes in MiB, or None if it cannot be determined on this platform
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class LanguageServerPool:
+    """
+    Keeps started language servers warm and leases them out per repository.
+
+    Usage:
+    ```
+    async with LanguageServerPool(config, logger, max_servers=4) as pool:
+        await pool.prewarm(repository_root_path)
+        async with pool.lease(repository_root_path) as lsp:
+            await lsp.request_definition(...)
+    ```
+    """
+
+    def __init__(
+        self,
+        config: MultilspyConfig,
+        logger: MultilspyLogger,
+        max_servers: int = 4,
+        max_leases_per_server: Union[int, None] = None,
+        min_available_memory_mb: Union[int, None] = None,
+    ) -> None:
+        """
+        :param config: The Multilspy configuration used to create the language servers.
+        :param logger: The logger to use.
+        :param max_servers: The maximum number of language servers, leased or idle, alive at any time.
+        :param max_leases_per_server: The number of leases after which a language server is recycled. None means never.
+        :param min_available_memory_mb: When a language server is leased, returned or prewarmed while the available
+            memory of the machine is below this threshold, idle language servers are stopped, least recently used
+            first, until it is not, and prewarm does not start language servers. None disables the check.
+        """
+        if max_servers < 1:
+            raise MultilspyException("max_servers must be at least 1")
+        self.config = config
+        self.logger = logger
+        self.max_servers = max_servers
+        self.max_leases_per_server = max_leases_per_server
+        self.min_available_memory_mb = min_available_memory_mb
+
+        self._idle: Dict[str, List[PooledLanguageServer]] = {}
+        # Number of language servers alive or being started, leased or not
+        self._num_servers = 0
+        self._cv = asyncio.Condition()
+        self._closed = False
+
+    async def __aenter__(self) -> "LanguageServerPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _under_memory_pressure(self) -> bool:
+        if self.min_available_memory_mb is None:
+            return False
+        available = get_available_memory_mb()
+        return available is not None and available < self.min_available_memory_mb
+
+    def _pop_least_recently_used_idle(self) -> Union[PooledLanguageServer, None]:
+        candidates = [server for servers in self._idle.values() for server in servers]
+        if not candidates:
+            return None
+        server = min(candidates, key=lambda server: server.last_used)
+        self._idle[server.repository_root_path].remove(server)
+        return server
+
+    async def _relieve_memory_pressure(self) -> None:
+        """
+        Stops the least recently used idle language servers while the available memory is below the threshold
+        """
+        while self._under_memory_pressure():
+            async with self._cv:
+                server = self._pop_least_recently_used_idle()
+            if server is None:
+                return
+            await self._stop(server)
+
+    async def _start(self, repository_root_path: str) -> PooledLanguageServer:
+        self.logger.log(f"Starting a language server for {repository_root_path} in the pool", logging.INFO)
+        language_server = LanguageServer.create(self.config, self.logger, repository_root_path)
+        exit_stack = AsyncExitStack()
+        await exit_stack.enter_async_context(language_server.start_server())
+        return PooledLanguageServer(language_server, exit_stack, repository_root_path)
+
+    async def _stop(self, server: PooledLanguageServer) -> None:
+        self.logger.log(f"Stopping a pooled language server for {server.repository_root_path}", logging.INFO)
+        try:
+            await server.exit_stack.aclose()
+        except Exception as exc:
+            self.logger.log(f"Error while stopping a pooled language server: {exc}", logging.ERROR)
+        async with self._cv:
+            self._num_servers -= 1
+            self._cv.notify_all()
+
+    @staticmethod
+    def is_healthy(server: PooledLanguageServer) -> bool:
+        """
+        Returns whether the given language server can be leased again
+        """
+        language_server = server.language_server
+        process = language_server.server.process
+        return (
+            language_server.server_started
+            and process is not None
+            and process.returncode is None
+            and not language_server.open_file_buffers
+        )
+
+    async def _reserve(self, repository_root_path: str) -> Union[PooledLanguageServer, None]:
+        """
+        Returns an idle language server for the given repository, or None once a slot to start one has been reserved
+        """
+        await self._relieve_memory_pressure()
+        while True:
+            to_evict = None
+            async with self._cv:
+                if self._closed:
+                    raise MultilspyException("LanguageServerPool is closed")
+                idle = self._idle.get(repository_root_path)
+                if idle:
+                    return idle.pop()
+                if self._num_servers < self.max_servers:
+                    self._num_servers += 1
+                    return None
+                to_evict = self._pop_least_recently_used_idle()
+                if to_evict is None:
+                    await self._cv.wait()
+                    continue
+            await self._stop(to_evict)
+
+    async def _give_back(self, server: PooledLanguageServer) -> None:
+        recycle = (
+            self._closed
+            or not self.is_healthy(server)
+            or (self.max_leases_per_server is not None and server.num_leases >= self.max_leases_per_server)
+        )
+        if recycle:
+            await self._stop(server)
+            return
+        async with self._cv:
+            server.last_used = time.monotonic()
+            self._idle.setdefault(server.repository_root_path, []).append(server)
+            self._cv.notify_all()
+        await self._relieve_memory_pressure()
+
+    async def prewarm(self, repository_root_path: str, count: int = 1) -> None:
+        """
+        Starts language servers for the given repository until count of them are idle in the pool,
+        within the max_servers limit and while the available memory is above min_available_memory_mb
+        """
+        async def start_one() -> None:
+            async with self._cv:
+                if self._num_servers >= self.max_servers or self._under_memory_pressure():
+                    return
+                self._num_servers += 1
+            try:
+                server = await self._start(repository_root_path)
+            except BaseException:
+                async with self._cv:
+                    self._num_servers -= 1
+                    self._cv.notify_all()
+                raise
+            await self._give_back(server)
+
+        await self._relieve_memory_pressure()
+        missing = count - len(self._idle.get(repository_root_path, []))
+        await asyncio.gather(*[start_one() for _ in range(max(missing, 0))])
+
+    @asynccontextmanager
+    async def lease(self, repository_root_path: str) -> AsyncIterator[LanguageServer]:
+        """
+        Leases a started language server for the given repository, starting one if none is idle.
+        The language server returns to the pool when the context is exited. All the files opened
+        during the lease must be closed by then.
+        """
+        server = await self._reserve(repository_root_path)
+        if server is None:
+            try:
+                server = await self._start(repository_root_path)
+            except BaseException:
+                async with self._cv:
+                    self._num_servers -= 1
+                    self._cv.notify_all()
+                raise
+        server.num_leases += 1
+        try:
+            yield server.language_server
+        finally:
+            await self._give_back(server)
+
+    async def evict_idle(self) -> None:
+        """
+        Stops all the idle language servers
+        """
+        async with self._cv:
+            idle = [server for servers in self._idle.values() for server in servers]
+            self._idle = {}
+        for server in idle:
+            await self._stop(server)
+
+    async def close(self) -> None:
+        """
+        Stops all the idle language servers. Leased language servers are stopped when they are returned.
+        """
+        self._closed = True
+        await self.evict_idle()
+
+
+class SyncLanguageServerPool:
+    """
+    Keeps started language servers warm and leases them out per repository as SyncLanguageServer instances.
+
+    Usage:
+    ```
+    pool = SyncLanguageServerPool(config, logger, max_servers=4)
+    with pool.start_pool():
+        pool.prewarm(repository_root_path)
+        with pool.lease(repository_root_path) as lsp:
+            lsp.request_definition(...)
+    ```
+    """
+
+    def __init__(self, config: MultilspyConfig, logger: MultilspyLogger, **kwargs) -> None:
+        """
+        Takes the same parameters as LanguageServerPool.
+        """
+        self.pool = LanguageServerPool(config, logger, **kwargs)
+        self.loop = None
+
+    @contextmanager
+    def start_pool(self) -> Iterator["SyncLanguageServerPool"]:
+        """
+        Starts the event loop thread serving the language servers of the pool, and stops all of them on exit.
+        """
+        self.loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        loop_thread.start()
+        try:
+            yield self
+        finally:
+            asyncio.run_coroutine_threadsafe(self.pool.close(), loop=self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            loop_thread.join()
+
+    def prewarm(self, repository_root_path: str, count: int = 1) -> None:
+        """
+        Starts language servers for the given repository until count of them are idle in the pool
+        """
+        asyncio.run_coroutine_threadsafe(self.pool.prewarm(repository_root_path, count), self.loop).result()
+
+    @contextmanager
+    def lease(self, repository_root_path: str) -> Iterator[SyncLanguageServer]:
+        """
+        Leases a started language server for the given repository, starting one if none is idle
+        """
+        ctx = self.pool.lease(repository_root_path)
+        language_server = asyncio.run_coroutine_threadsafe(ctx.__aenter__(), loop=self.loop).result()
+        sync_language_server = SyncLanguageServer(language_server)
+        sync_language_server.loop = self.loop
+        try:
+            yield sync_language_server
+        finally:
+            asyncio.run_coroutine_threadsafe(ctx.__aexit__(None, None, None), loop=self.loop).result()
+
+    def evict_idle(self) -> None:
+        """
+        Stops all the idle language servers
+        """
+        asyncio.run_coroutine_threadsafe(self.pool.evict_idle(), self.loop).result()
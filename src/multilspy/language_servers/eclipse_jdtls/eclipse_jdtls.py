@@ -11,7 +11,7 @@ import pathlib
 import shutil
 import uuid
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import AsyncIterator, Union
 
 from multilspy.multilspy_logger import MultilspyLogger
 from multilspy.language_server import LanguageServer
@@ -19,9 +19,13 @@ from multilspy.lsp_protocol_handler.server import ProcessLaunchInfo
 from multilspy.lsp_protocol_handler.lsp_types import InitializeParams
 from multilspy.multilspy_config import MultilspyConfig
 from multilspy.multilspy_settings import MultilspySettings
+from multilspy.readiness import ReadinessLevel
 from pathlib import PurePath
 
 from multilspy.language_servers.eclipse_jdtls.initialize_params import initialize_parameters
+from multilspy.language_servers.eclipse_jdtls.jvm_profiles import get_jvm_profile
+from multilspy.language_servers.eclipse_jdtls.shared_index import get_shared_index_path, is_shared_index_prewarmed
+from multilspy.language_servers.eclipse_jdtls.workspace_cache import WorkspaceCache, WorkspaceLease
 
 
 @dataclasses.dataclass
@@ -43,6 +47,8 @@ class EclipseJDTLS(LanguageServer):
     The EclipseJDTLS class provides a Java specific implementation of the LanguageServer class
     """
 
+    reports_readiness = True
+
     def __init__(self, config: MultilspyConfig, logger: MultilspyLogger, repository_root_path: str):
         """
         Creates a new EclipseJDTLS instance initializing the language server settings appropriately.
@@ -53,50 +59,54 @@ class EclipseJDTLS(LanguageServer):
         self.runtime_dependency_paths = runtime_dependency_paths
         self.is_standalone_mode = config.java_server_config.is_standalone_mode
 
-        # ws_dir is the workspace directory for the EclipseJDTLS server
-        ws_dir = str(
-            PurePath(
-                MultilspySettings.get_language_server_directory(),
-                "EclipseJDTLS",
-                "workspaces",
-                uuid.uuid4().hex,
-            )
+        self.workspaces_dir = str(
+            PurePath(MultilspySettings.get_language_server_directory(), "EclipseJDTLS", "workspaces")
         )
+        os.makedirs(self.workspaces_dir, exist_ok=True)
+
+        # The workspace directory for the EclipseJDTLS server is chosen when the server is started, so that the lease
+        # on a reused workspace is only held while the server runs
+        self.workspace_cache: Union[WorkspaceCache, None] = None
+        if config.java_server_config.reuse_workspace:
+            self.workspace_cache = WorkspaceCache(
+                logger, self.workspaces_dir, config.java_server_config.max_cached_workspaces
+            )
+        self.workspace_lease: Union[WorkspaceLease, None] = None
 
-        # shared_cache_location is the global cache used by Eclipse JDTLS across all workspaces
-        shared_cache_location = str(
-            PurePath(MultilspySettings.get_global_cache_directory(), "lsp", "EclipseJDTLS", "sharedIndex")
-        )
+        # shared_cache_location is the global cache used by Eclipse JDTLS across all workspaces, versioned on the
+        # JDTLS and JRE versions so that an index built by another version is never reused
+        shared_cache_location = get_shared_index_path(config.java_server_config)
+        if not is_shared_index_prewarmed(shared_cache_location):
+            logger.log(f"Shared index at {shared_cache_location} is not prewarmed", logging.INFO)
 
         jre_path = self.runtime_dependency_paths.jre_path
         lombok_jar_path = self.runtime_dependency_paths.lombok_jar_path
 
         jdtls_launcher_jar = self.runtime_dependency_paths.jdtls_launcher_jar_path
 
-        os.makedirs(ws_dir, exist_ok=True)
-
-        data_dir = str(PurePath(ws_dir, "data_dir"))
-        jdtls_config_path = str(PurePath(ws_dir, "config_path"))
-
         jdtls_readonly_config_path = self.runtime_dependency_paths.jdtls_readonly_config_path
 
-        if not os.path.exists(jdtls_config_path):
-            shutil.copytree(jdtls_readonly_config_path, jdtls_config_path)
-
         for static_path in [
             jre_path,
             lombok_jar_path,
             jdtls_launcher_jar,
-            jdtls_config_path,
             jdtls_readonly_config_path,
         ]:
             assert os.path.exists(static_path), static_path
 
+        jvm_profile = get_jvm_profile(
+            logger,
+            config.java_server_config.jvm_profile,
+            repository_root_path,
+            config.java_server_config.jvm_instances_per_host,
+        )
+
         # TODO: Add "self.runtime_dependency_paths.jre_home_path"/bin to $PATH as well
         proc_env = {"syntaxserver": "false", "JAVA_HOME": self.runtime_dependency_paths.jre_home_path}
         proc_cwd = repository_root_path
-        cmd = " ".join(
-            [
+        # The -configuration and -data arguments, which point into the workspace directory, are added by
+        # _prepare_workspace when the server is started
+        self.jdtls_cmd = [
                 jre_path,
                 "--add-modules=ALL-SYSTEM",
                 "--add-opens",
@@ -111,30 +121,50 @@ class EclipseJDTLS(LanguageServer):
                 "-Djava.import.generatesMetadataFilesAtProjectRoot=false",
                 "-Dfile.encoding=utf8",
                 "-noverify",
-                "-XX:+UseParallelGC",
-                "-XX:GCTimeRatio=4",
-                "-XX:AdaptiveSizePolicyWeight=90",
+                *jvm_profile.to_jvm_args(),
                 "-Dsun.zip.disableMemoryMapping=true",
                 "-Djava.lsp.joinOnCompletion=true",
-                "-Xmx8G",
-                "-Xms2G",
                 "-Xlog:disable",
                 "-Dlog.level=ALL",
                 f"-javaagent:{lombok_jar_path}",
                 f"-Djdt.core.sharedIndexLocation={shared_cache_location}",
                 "-jar",
                 jdtls_launcher_jar,
-                "-configuration",
-                jdtls_config_path,
-                "-data",
-                data_dir,
             ]
-        )
 
+        # Set once the server reaches ReadinessLevel.SERVICE_READY. Kept for compatibility, use wait_for_readiness.
         self.service_ready_event = asyncio.Event()
         self.initialize_searcher_command_available = asyncio.Event()
 
-        super().__init__(config, logger, repository_root_path, ProcessLaunchInfo(cmd, proc_env, proc_cwd), "java")
+        super().__init__(
+            config, logger, repository_root_path, ProcessLaunchInfo(" ".join(self.jdtls_cmd), proc_env, proc_cwd), "java"
+        )
+
+    def _prepare_workspace(self) -> None:
+        """
+        Chooses the workspace directory of the server, leasing the persistent workspace of the repository if
+        workspaces are reused, and completes the command launching the server with it.
+        """
+        self.workspace_lease = None
+        if self.workspace_cache is not None:
+            self.workspace_lease = self.workspace_cache.acquire(self.repository_root_path)
+        if self.workspace_lease is not None:
+            ws_dir = self.workspace_lease.path
+        else:
+            ws_dir = str(PurePath(self.workspaces_dir, uuid.uuid4().hex))
+
+        os.makedirs(ws_dir, exist_ok=True)
+
+        data_dir = str(PurePath(ws_dir, "data_dir"))
+        jdtls_config_path = str(PurePath(ws_dir, "config_path"))
+
+        if not os.path.exists(jdtls_config_path):
+            shutil.copytree(self.runtime_dependency_paths.jdtls_readonly_config_path, jdtls_config_path)
+        assert os.path.exists(jdtls_config_path), jdtls_config_path
+
+        self.server.process_launch_info.cmd = " ".join(
+            [*self.jdtls_cmd, "-configuration", jdtls_config_path, "-data", data_dir]
+        )
 
     def setupRuntimeDependencies(self, logger: MultilspyLogger, config: MultilspyConfig) -> RuntimeDependencyPaths:
         """
@@ -268,11 +298,26 @@ class EclipseJDTLS(LanguageServer):
             return
 
         async def lang_status_handler(params):
-            # TODO: Should we wait for
-            # server -> client: {'jsonrpc': '2.0', 'method': 'language/status', 'params': {'type': 'ProjectStatus', 'message': 'OK'}}
-            # Before proceeding?
+            self.progress.handle_status(params["type"], params["message"])
+            self.readiness.mark_milestone(f"language/status:{params['type']}")
+            # server -> client: {'jsonrpc': '2.0', 'method': 'language/status', 'params': {'type': 'Started', 'message': 'Ready'}}
+            # is sent once the projects in the workspace have been imported
+            if params["type"] == "Started":
+                self.readiness.set_level(ReadinessLevel.PROJECTS_IMPORTED)
             if params["type"] == "ServiceReady" and params["message"] == "ServiceReady":
+                self.readiness.set_level(ReadinessLevel.SERVICE_READY)
                 self.service_ready_event.set()
+                if self.logger.is_enabled_for(logging.INFO):
+                    self.logger.log(f"EclipseJDTLS startup {self.progress.timeline_report()}", logging.INFO)
+
+        async def progress_handler(params):
+            task = self.progress.handle_progress(params)
+            if task is not None and task.end_time is not None:
+                self.readiness.mark_milestone(f"$/progress:{task.title}")
+
+        async def work_done_progress_create_handler(params):
+            # The progress is tracked from its begin notification, there is nothing to set up for a new token
+            return None
 
         async def execute_client_command_handler(params):
             assert params["command"] == "_java.reloadBundles.command"
@@ -280,7 +325,8 @@ class EclipseJDTLS(LanguageServer):
             return []
 
         async def window_log_message(msg):
-            self.logger.log(f"LSP: window/logMessage: {msg}", logging.INFO)
+            if self.logger.is_enabled_for(logging.INFO):
+                self.logger.log(f"LSP: window/logMessage: {msg}", logging.INFO)
 
         async def do_nothing(params):
             return
@@ -289,34 +335,45 @@ class EclipseJDTLS(LanguageServer):
         self.server.on_notification("language/status", lang_status_handler)
         self.server.on_notification("window/logMessage", window_log_message)
         self.server.on_request("workspace/executeClientCommand", execute_client_command_handler)
-        self.server.on_notification("$/progress", do_nothing)
-        self.server.on_notification("textDocument/publishDiagnostics", do_nothing)
+        self.server.on_request("window/workDoneProgress/create", work_done_progress_create_handler)
+        self.server.on_notification("$/progress", progress_handler)
         self.server.on_notification("language/actionableNotification", do_nothing)
 
-        async with super().start_server():
-            self.logger.log("Starting EclipseJDTLS server process", logging.INFO)
-            await self.server.start()
-            initialize_params = self._get_initialize_params(self.repository_root_path, self.is_standalone_mode)
-
-            self.logger.log(
-                "Sending initialize request from LSP client to LSP server and awaiting response",
-                logging.INFO,
-            )
-            init_response = await self.server.send.initialize(initialize_params)
-            assert init_response["capabilities"]["textDocumentSync"]["change"] == 2
-            assert "completionProvider" not in init_response["capabilities"]
-            assert "executeCommandProvider" not in init_response["capabilities"]
-
-            self.server.notify.initialized({})
-
-            self.server.notify.workspace_did_change_configuration(
-                {"settings": initialize_params["initializationOptions"]["settings"]}
-            )
-
-            # TODO: Add comments about why we wait here, and how this can be optimized
-            await self.service_ready_event.wait()
-
-            yield self
-
-            await self.server.shutdown()
-            await self.server.stop()
+        # The lease on the workspace is held until the server process has exited, whether or not startup succeeds
+        try:
+            self._prepare_workspace()
+            async with super().start_server():
+                self.logger.log("Starting EclipseJDTLS server process", logging.INFO)
+                await self.server.start()
+                initialize_params = self._get_initialize_params(self.repository_root_path, self.is_standalone_mode)
+
+                self.logger.log(
+                    "Sending initialize request from LSP client to LSP server and awaiting response",
+                    logging.INFO,
+                )
+                init_response = await self.server.send.initialize(initialize_params)
+                self.server_capabilities = init_response["capabilities"]
+                assert init_response["capabilities"]["textDocumentSync"]["change"] == 2
+                assert "completionProvider" not in init_response["capabilities"]
+                assert "executeCommandProvider" not in init_response["capabilities"]
+
+                self.server.notify.initialized({})
+                self.readiness.set_level(ReadinessLevel.INITIALIZED)
+
+                self.server.notify.workspace_did_change_configuration(
+                    {"settings": initialize_params["initializationOptions"]["settings"]}
+                )
+
+                # Unless staged readiness is enabled, wait for the workspace to be imported and built, so that every
+                # request can be served. Otherwise, the requests wait for the readiness level they need.
+                if not self.staged_readiness:
+                    await self.readiness.wait_for_level(ReadinessLevel.SERVICE_READY)
+
+                yield self
+
+                await self.server.shutdown()
+                await self.server.stop()
+        finally:
+            if self.workspace_lease is not None:
+                self.workspace_lease.release()
+                self.workspace_lease = None
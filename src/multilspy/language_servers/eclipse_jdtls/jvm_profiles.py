@@ -0,0 +1,125 @@
+"""
+Provides the JVM resource profiles used to launch Eclipse JDTLS, which size its heap and pick its garbage collector.
+"""
+
+import dataclasses
+import logging
+import os
+from typing import Dict, List, Union
+
+from multilspy.multilspy_exceptions import MultilspyException
+from multilspy.multilspy_logger import MultilspyLogger
+from multilspy.multilspy_utils import IGNORED_DIR_NAMES
+
+PARALLEL_GC_OPTIONS = ["-XX:+UseParallelGC", "-XX:GCTimeRatio=4", "-XX:AdaptiveSizePolicyWeight=90"]
+SERIAL_GC_OPTIONS = ["-XX:+UseSerialGC"]
+G1_GC_OPTIONS = ["-XX:+UseG1GC", "-XX:+UseStringDeduplication"]
+
+AUTO_PROFILE = "auto"
+
+
+@dataclasses.dataclass
+class JVMProfile:
+    """
+    Heap size and garbage collector settings for the JDTLS JVM
+    """
+
+    # Maximum heap size in MiB (-Xmx)
+    max_heap_mb: int
+
+    # Initial heap size in MiB (-Xms)
+    initial_heap_mb: int
+
+    # Options selecting and tuning the garbage collector
+    gc_options: List[str]
+
+    def to_jvm_args(self) -> List[str]:
+        """
+        Returns the JVM command line arguments for the profile
+        """
+        return [*self.gc_options, f"-Xmx{self.max_heap_mb}m", f"-Xms{self.initial_heap_mb}m"]
+
+
+JVM_PROFILES: Dict[str, JVMProfile] = {
+    # The settings multilspy has always launched JDTLS with
+    "default": JVMProfile(8192, 2048, PARALLEL_GC_OPTIONS),
+    # Small repositories, packing many servers per machine. The serial collector has the smallest footprint.
+    "small-repo": JVMProfile(1024, 256, SERIAL_GC_OPTIONS),
+    # Large multi-module repositories, queried interactively. G1 keeps pauses short on large heaps.
+    "monorepo": JVMProfile(8192, 2048, G1_GC_OPTIONS),
+    # Offline indexing and bulk queries, where throughput matters more than pauses and heap resizing is wasted work.
+    "batch-indexing": JVMProfile(6144, 6144, PARALLEL_GC_OPTIONS),
+}
+
+
+def get_memory_limit_mb() -> Union[int, None]:
+    """
+    Returns the memory limit of the current cgroup in MiB, falling back to the physical memory of the machine.
+    Returns None if neither can be determined.
+    """
+    for limit_path in ["/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"]:
+        try:
+            with open(limit_path, "r", encoding="utf-8") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v2 reports "max", and cgroup v1 a huge number, when there is no limit
+        if value.isdigit() and int(value) < (1 << 60):
+            return int(value) // (1 << 20)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1 << 20)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def count_source_files(repository_root_path: str, extensions=(".java",)) -> int:
+    """
+    Returns the number of source files in the given repository
+    """
+    count = 0
+    for _, dir_names, file_names in os.walk(repository_root_path):
+        dir_names[:] = [d for d in dir_names if d not in IGNORED_DIR_NAMES]
+        count += sum(1 for f in file_names if f.endswith(extensions))
+    return count
+
+
+def get_auto_profile(repository_root_path: str, instances_per_host: int = 1) -> JVMProfile:
+    """
+    Returns a profile sized for the given repository, within the share of the memory limit available to one JDTLS
+    instance when instances_per_host of them run side by side.
+    """
+    # Roughly 0.5 MiB of heap per source file on top of the baseline needed by JDTLS, capped to the default profile
+    needed_mb = min(512 + count_source_files(repository_root_path) // 2, JVM_PROFILES["default"].max_heap_mb)
+    memory_limit_mb = get_memory_limit_mb()
+    if memory_limit_mb is not None:
+        # Leave room for the non-heap memory of the JVMs (metaspace, code cache, threads) and for the client
+        budget_mb = int(memory_limit_mb * 0.7) // max(instances_per_host, 1)
+        needed_mb = min(needed_mb, budget_mb)
+    max_heap_mb = max(512, needed_mb // 256 * 256)
+
+    if max_heap_mb <= 2048:
+        gc_options = SERIAL_GC_OPTIONS
+    elif max_heap_mb <= 4096:
+        gc_options = PARALLEL_GC_OPTIONS
+    else:
+        gc_options = G1_GC_OPTIONS
+    return JVMProfile(max_heap_mb, max(256, max_heap_mb // 4), gc_options)
+
+
+def get_jvm_profile(
+    logger: MultilspyLogger, profile_name: str, repository_root_path: str, instances_per_host: int = 1
+) -> JVMProfile:
+    """
+    Returns the JVM profile with the given name, computing it for the repository if the name is "auto"
+    """
+    if profile_name == AUTO_PROFILE:
+        profile = get_auto_profile(repository_root_path, instances_per_host)
+    elif profile_name in JVM_PROFILES:
+        profile = JVM_PROFILES[profile_name]
+    else:
+        logger.log(f"Unknown JVM profile '{profile_name}'", logging.ERROR)
+        raise MultilspyException(
+            f"Unknown JVM profile '{profile_name}'. Expected one of {sorted([*JVM_PROFILES, AUTO_PROFILE])}"
+        )
+    logger.log(f"Launching JDTLS with JVM profile '{profile_name}': {' '.join(profile.to_jvm_args())}", logging.INFO)
+    return profile
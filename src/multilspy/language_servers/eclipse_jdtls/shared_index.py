@@ -0,0 +1,290 @@
+"""
+Manages the Eclipse JDTLS shared index (-Djdt.core.sharedIndexLocation), which holds the indexes of the JRE and of the
+library jars, and is shared by all JDTLS instances.
+
+The index is versioned on the JDTLS and JRE versions, so that an index built by a different version is never reused,
+and can be built ahead of time ("prewarmed") against a synthetic project, so that servers start with a hot index:
+
+    python -m multilspy.language_servers.eclipse_jdtls.shared_index --config java_server_config.json --jar lib.jar
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import PurePath
+from typing import List, Union
+from xml.sax.saxutils import quoteattr
+
+from multilspy.multilspy_config import JavaServerConfig, Language, MultilspyConfig
+from multilspy.multilspy_logger import MultilspyLogger
+from multilspy.multilspy_settings import MultilspySettings
+
+# Name of the file written in a shared index once it has been fully built by prewarm_shared_index
+MANIFEST_FILE_NAME = "multilspy_prewarm.json"
+
+SYNTHETIC_PROJECT_NAME = "multilspy-prewarm"
+
+# Seconds after their last modification before the indexes of other versions, the indexes replaced by a newer one
+# (".old") and the staging directories of abandoned builds (".tmp") are removed, as running JDTLS instances or
+# prewarm_shared_index may still be using them
+STALE_INDEX_GRACE_PERIOD = 24 * 60 * 60
+
+
+def get_jdtls_version(jdtls_jar_path: str) -> str:
+    """
+    Returns the version of JDTLS, taken from the names of its core and JDT core bundles, which live next to the
+    launcher jar. Falls back to the name of the launcher jar.
+    """
+    plugins_dir = os.path.dirname(jdtls_jar_path)
+    bundles = []
+    for pattern in ["org.eclipse.jdt.ls.core_*.jar", "org.eclipse.jdt.core_*.jar"]:
+        bundles.extend(sorted(os.path.basename(p) for p in glob.glob(os.path.join(plugins_dir, pattern))))
+    if not bundles:
+        bundles.append(os.path.basename(jdtls_jar_path))
+    return ";".join(bundles)
+
+
+def get_jre_version(jre_home_path: str) -> str:
+    """
+    Returns the version of the JRE, read from its "release" file. Falls back to the name of the JRE home directory.
+    """
+    release = {}
+    try:
+        with open(os.path.join(jre_home_path, "release"), "r", encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep:
+                    release[key.strip()] = value.strip().strip('"')
+    except OSError:
+        pass
+    if "JAVA_VERSION" not in release:
+        return os.path.basename(os.path.normpath(jre_home_path))
+    return ";".join(release.get(k, "") for k in ["IMPLEMENTOR", "JAVA_VERSION", "JAVA_RUNTIME_VERSION"])
+
+
+def get_shared_index_key(java_server_config: JavaServerConfig) -> str:
+    """
+    Returns the key identifying the shared indexes built by the configured JDTLS and JRE
+    """
+    version = get_jdtls_version(java_server_config.jdtls_jar_path) + "|" + get_jre_version(
+        java_server_config.jre_home_path
+    )
+    return hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+
+def get_shared_index_root() -> str:
+    """
+    Returns the directory holding the shared indexes of all the JDTLS and JRE versions
+    """
+    return str(PurePath(MultilspySettings.get_global_cache_directory(), "lsp", "EclipseJDTLS", "sharedIndex"))
+
+
+def get_shared_index_path(java_server_config: JavaServerConfig) -> str:
+    """
+    Returns the shared index directory to be used by JDTLS with the given configuration
+    """
+    if java_server_config.shared_index_path is not None:
+        return java_server_config.shared_index_path
+    return str(PurePath(get_shared_index_root(), get_shared_index_key(java_server_config)))
+
+
+def is_shared_index_prewarmed(index_path: str) -> bool:
+    """
+    Returns whether the given shared index has been fully built by prewarm_shared_index
+    """
+    return os.path.isfile(os.path.join(index_path, MANIFEST_FILE_NAME))
+
+
+def write_synthetic_project(project_dir: str, jar_paths: List[str]) -> None:
+    """
+    Writes an Eclipse Java project depending on the JRE and the given jars, so that importing it makes JDTLS index them
+    """
+    src_dir = os.path.join(project_dir, "src")
+    os.makedirs(src_dir, exist_ok=True)
+    with open(os.path.join(project_dir, ".project"), "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            "<projectDescription>\n"
+            f"\t<name>{SYNTHETIC_PROJECT_NAME}</name>\n"
+            "\t<comment></comment>\n"
+            "\t<projects></projects>\n"
+            "\t<buildSpec>\n"
+            "\t\t<buildCommand>\n"
+            "\t\t\t<name>org.eclipse.jdt.core.javabuilder</name>\n"
+            "\t\t\t<arguments></arguments>\n"
+            "\t\t</buildCommand>\n"
+            "\t</buildSpec>\n"
+            "\t<natures>\n"
+            "\t\t<nature>org.eclipse.jdt.core.javanature</nature>\n"
+            "\t</natures>\n"
+            "</projectDescription>\n"
+        )
+    with open(os.path.join(project_dir, ".classpath"), "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<classpath>\n')
+        f.write('\t<classpathentry kind="src" path="src"/>\n')
+        f.write('\t<classpathentry kind="con" path="org.eclipse.jdt.launching.JRE_CONTAINER"/>\n')
+        for jar_path in jar_paths:
+            f.write(f'\t<classpathentry kind="lib" path={quoteattr(os.path.abspath(jar_path))}/>\n')
+        f.write('\t<classpathentry kind="output" path="bin"/>\n</classpath>\n')
+    with open(os.path.join(src_dir, "Prewarm.java"), "w", encoding="utf-8") as f:
+        f.write("public class Prewarm {\n}\n")
+
+
+def publish_shared_index(staging_path: str, index_path: str) -> None:
+    """
+    Replaces the shared index at index_path with the one built at staging_path
+    """
+    if os.path.exists(index_path):
+        # Directories cannot be atomically replaced by a rename, so the old index is moved aside first. It is left
+        # for remove_stale_shared_indexes to delete after the grace period, as running JDTLS instances may still
+        # be reading it. Its modification time records when it was replaced.
+        old_path = f"{index_path}.{uuid.uuid4().hex}.old"
+        os.replace(index_path, old_path)
+        os.utime(old_path)
+    os.replace(staging_path, index_path)
+
+
+def _last_modified(path: str) -> float:
+    """
+    Returns the latest modification time of the given path and of the entries directly under it
+    """
+    last_modified = os.path.getmtime(path)
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    last_modified = max(last_modified, entry.stat(follow_symlinks=False).st_mtime)
+                except OSError:
+                    pass
+    return last_modified
+
+
+def remove_stale_shared_indexes(
+    java_server_config: JavaServerConfig, grace_period: float = STALE_INDEX_GRACE_PERIOD
+) -> List[str]:
+    """
+    Removes the shared indexes built by other JDTLS or JRE versions than the configured ones, the indexes replaced by
+    a newer one and the staging directories of abandoned builds, once they have not been modified for grace_period
+    seconds, and returns their paths. Indexes of other versions still used by running JDTLS instances are only
+    protected by the grace period, so it must exceed the time such instances keep running.
+    """
+    root = get_shared_index_root()
+    current = get_shared_index_key(java_server_config)
+    removed = []
+    now = time.time()
+    for name in os.listdir(root):
+        if name == current:
+            continue
+        path = os.path.join(root, name)
+        try:
+            if now - _last_modified(path) < grace_period:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        except OSError:
+            # Removed concurrently by another process
+            continue
+        removed.append(path)
+    return sorted(removed)
+
+
+async def prewarm_shared_index(
+    config: MultilspyConfig, logger: MultilspyLogger, jar_paths: List[str], force: bool = False
+) -> str:
+    """
+    Builds the shared index for the configured JDTLS and JRE, covering the JRE and the given jars, and returns its path.
+
+    JDTLS is started against a synthetic project depending on the jars, and indexes into a staging directory, which is
+    published once indexing has finished.
+
+    :param config: The Multilspy configuration, with a java_server_config.
+    :param logger: The logger to use.
+    :param jar_paths: The library jars to index along with the JRE.
+    :param force: Whether to rebuild the shared index even if it has already been prewarmed.
+
+    :return str: The path of the shared index.
+    """
+    # Imported here as eclipse_jdtls itself depends on this module
+    from multilspy.language_server import LanguageServer
+
+    java_server_config = config.java_server_config
+    index_path = get_shared_index_path(java_server_config)
+    if is_shared_index_prewarmed(index_path) and not force:
+        logger.log(f"Shared index at {index_path} is already prewarmed", logging.INFO)
+        return index_path
+
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    staging_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+    start_time = time.monotonic()
+    try:
+        with tempfile.TemporaryDirectory() as project_dir:
+            write_synthetic_project(project_dir, jar_paths)
+            staging_config = dataclasses.replace(
+                config,
+                java_server_config=dataclasses.replace(
+                    java_server_config, shared_index_path=staging_path, reuse_workspace=False
+                ),
+            )
+            lsp = LanguageServer.create(staging_config, logger, project_dir)
+            async with lsp.start_server():
+                # JDTLS runs workspace symbol searches once all the pending indexing jobs are done
+                await lsp.server.send.workspace_symbol({"query": "Prewarm"})
+
+        with open(os.path.join(staging_path, MANIFEST_FILE_NAME), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "jdtls_version": get_jdtls_version(java_server_config.jdtls_jar_path),
+                    "jre_version": get_jre_version(java_server_config.jre_home_path),
+                    "jars": [os.path.abspath(p) for p in jar_paths],
+                    "created": time.time(),
+                },
+                f,
+                indent=2,
+            )
+        publish_shared_index(staging_path, index_path)
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+    logger.log(f"Prewarmed shared index at {index_path} in {time.monotonic() - start_time:.1f}s", logging.INFO)
+    return index_path
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Command line entry point for prewarming the shared index
+    """
+    parser = argparse.ArgumentParser(description="Prebuild the Eclipse JDTLS shared index for the JRE and library jars")
+    parser.add_argument("--config", required=True, help="JSON file with the java_server_config settings")
+    parser.add_argument("--jar", action="append", default=[], help="Library jar to index, may be repeated")
+    parser.add_argument("--force", action="store_true", help="Rebuild the index even if it is already prewarmed")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove the indexes of other JDTLS and JRE versions and the replaced indexes, once unused for a day",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        java_server_config = json.load(f)
+    config = MultilspyConfig.from_dict({"code_language": Language.JAVA, "java_server_config": java_server_config})
+    logger = MultilspyLogger()
+
+    print(asyncio.run(prewarm_shared_index(config, logger, args.jar, force=args.force)))
+    if args.prune:
+        for path in remove_stale_shared_indexes(config.java_server_config):
+            print(f"Removed {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Manages the persistent workspace directories of Eclipse JDTLS, so that a repository imported once
+can be reopened without JDTLS re-importing and re-indexing the whole project.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import PurePath
+from typing import List, Union
+
+from multilspy.multilspy_logger import MultilspyLogger
+from multilspy.multilspy_utils import IGNORED_DIR_NAMES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Files whose contents determine how JDTLS imports a project. A change to any of them yields a new workspace.
+BUILD_FILE_NAMES = {
+    "pom.xml",
+    "build.gradle",
+    "build.gradle.kts",
+    "settings.gradle",
+    "settings.gradle.kts",
+    "gradle.properties",
+    ".classpath",
+    ".project",
+}
+
+WORKSPACE_PREFIX = "repo-"
+LOCK_FILE_NAME = ".multilspy.lock"
+
+
+class WorkspaceLease:
+    """
+    Exclusive use of a persistent JDTLS workspace directory by the current process.
+    The lock is held through an OS file lock, so it is released even if the process dies.
+    """
+
+    def __init__(self, path: str, lock_fd: int) -> None:
+        self.path = path
+        self._lock_fd = lock_fd
+
+    @staticmethod
+    def try_acquire(path: str) -> Union["WorkspaceLease", None]:
+        """
+        Returns a lease on the given workspace directory, creating it if needed, or None if another process holds it
+        """
+        os.makedirs(path, exist_ok=True)
+        lock_fd = os.open(str(PurePath(path, LOCK_FILE_NAME)), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(lock_fd)
+            return None
+        return WorkspaceLease(path, lock_fd)
+
+    def release(self) -> None:
+        """
+        Releases the lease, allowing other processes to use the workspace
+        """
+        if self._lock_fd is None:
+            return
+        # Record the time of last use, which orders workspaces for eviction
+        os.utime(self.path)
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def discard(self) -> None:
+        """
+        Deletes the workspace directory and releases the lease
+        """
+        if fcntl is not None:
+            # The lock is held while the directory is removed, so that no other process can start using it meanwhile
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.close(self._lock_fd)
+        else:
+            # Windows does not allow removing the lock file while it is open
+            msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+            os.close(self._lock_fd)
+            shutil.rmtree(self.path, ignore_errors=True)
+        self._lock_fd = None
+
+
+class WorkspaceCache:
+    """
+    A LRU collection of persistent JDTLS workspace directories, keyed on the repository root and its build files
+    """
+
+    def __init__(self, logger: MultilspyLogger, workspaces_dir: str, max_workspaces: int) -> None:
+        self.logger = logger
+        self.workspaces_dir = workspaces_dir
+        self.max_workspaces = max_workspaces
+
+    @staticmethod
+    def get_workspace_key(repository_root_path: str) -> str:
+        """
+        Returns a key identifying the repository at the given path and the state of its build files
+        """
+        repository_root_path = os.path.abspath(repository_root_path)
+        digest = hashlib.sha256(repository_root_path.encode("utf-8"))
+        build_files: List[str] = []
+        for dir_path, dir_names, file_names in os.walk(repository_root_path):
+            dir_names[:] = sorted(d for d in dir_names if d not in IGNORED_DIR_NAMES)
+            build_files.extend(os.path.join(dir_path, f) for f in sorted(file_names) if f in BUILD_FILE_NAMES)
+        for build_file in build_files:
+            digest.update(b"\0" + os.path.relpath(build_file, repository_root_path).encode("utf-8") + b"\0")
+            with open(build_file, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:32]
+
+    def acquire(self, repository_root_path: str) -> Union[WorkspaceLease, None]:
+        """
+        Returns a lease on the workspace for the given repository, or None if it is in use by another process
+        """
+        key = self.get_workspace_key(repository_root_path)
+        path = str(PurePath(self.workspaces_dir, WORKSPACE_PREFIX + key))
+        is_warm = os.path.exists(path)
+        lease = WorkspaceLease.try_acquire(path)
+        if lease is None:
+            self.logger.log(f"JDTLS workspace {path} is in use by another process", logging.INFO)
+            return None
+        self.logger.log(f"Using {'existing' if is_warm else 'new'} JDTLS workspace {path}", logging.INFO)
+        os.utime(path)
+        self.evict(keep=path)
+        return lease
+
+    def evict(self, keep: str) -> None:
+        """
+        Deletes the least recently used workspaces beyond max_workspaces, skipping those in use
+        """
+        workspaces = []
+        for name in os.listdir(self.workspaces_dir):
+            path = str(PurePath(self.workspaces_dir, name))
+            if name.startswith(WORKSPACE_PREFIX) and path != keep and os.path.isdir(path):
+                workspaces.append((os.path.getmtime(path), path))
+        workspaces.sort(reverse=True)
+        for _, path in workspaces[max(self.max_workspaces - 1, 0) :]:
+            lease = WorkspaceLease.try_acquire(path)
+            if lease is None:
+                continue
+            self.logger.log(f"Evicting JDTLS workspace {path}", logging.INFO)
+            lease.discard()
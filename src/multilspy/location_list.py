@@ -0,0 +1,147 @@
+"""
+This module provides a compact, columnar representation of the locations returned by the language server for
+definition and references requests.
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Union
+
+from . import multilspy_types
+from .lsp_protocol_handler.lsp_constants import LSPConstants
+from .multilspy_utils import UriPathCache
+
+
+class LocationList(Sequence):
+    """
+    A sequence of multilspy_types.Location stored as parallel arrays: the index of the file of each location, and the
+    start and end positions of its range. The URI, absolute path and relative path of each distinct file are computed
+    and stored once, and the Location dicts are only built when accessed.
+    """
+
+    __slots__ = ("uris", "absolute_paths", "relative_paths", "_file_ids", "_positions", "_file_id_by_uri")
+
+    def __init__(self) -> None:
+        # The distinct files of the locations, by file id
+        self.uris: List[str] = []
+        self.absolute_paths: List[str] = []
+        self.relative_paths: List[str] = []
+        self._file_ids = array("I")
+        # Start line, start character, end line and end character of each location
+        self._positions = array("I")
+        self._file_id_by_uri: Dict[str, int] = {}
+
+    @classmethod
+    def from_lsp_response(cls, response: Any, uri_path_cache: UriPathCache) -> "LocationList":
+        """
+        Builds the list of locations from the response to a definition or references request: a Location,
+        a list of Locations or LocationLinks, or None. The paths of the files are converted with uri_path_cache.
+        """
+        ret = cls()
+        if response is None:
+            return ret
+        if isinstance(response, dict):
+            response = [response]
+        assert isinstance(response, list), f"Unexpected response from Language Server: {response}"
+        for item in response:
+            assert isinstance(item, dict)
+            if LSPConstants.URI in item and LSPConstants.RANGE in item:
+                ret.append(item[LSPConstants.URI], item[LSPConstants.RANGE], uri_path_cache)
+            elif (
+                LSPConstants.ORIGIN_SELECTION_RANGE in item
+                and LSPConstants.TARGET_URI in item
+                and LSPConstants.TARGET_RANGE in item
+                and LSPConstants.TARGET_SELECTION_RANGE in item
+            ):
+                ret.append(item[LSPConstants.TARGET_URI], item[LSPConstants.TARGET_SELECTION_RANGE], uri_path_cache)
+            else:
+                assert False, f"Unexpected response from Language Server: {item}"
+        return ret
+
+    def append(self, uri: str, location_range: multilspy_types.Range, uri_path_cache: UriPathCache) -> None:
+        """
+        Appends the location with the given uri and range, converting the uri of a new file with uri_path_cache
+        """
+        file_id = self._file_id_by_uri.get(uri)
+        if file_id is None:
+            file_id = len(self.uris)
+            self._file_id_by_uri[uri] = file_id
+            absolute_path, relative_path = uri_path_cache.paths_for_uri(uri)
+            self.uris.append(uri)
+            self.absolute_paths.append(absolute_path)
+            self.relative_paths.append(relative_path)
+        start, end = location_range["start"], location_range["end"]
+        self._file_ids.append(file_id)
+        self._positions.extend((start["line"], start["character"], end["line"], end["character"]))
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+    def _location(self, index: int) -> multilspy_types.Location:
+        file_id = self._file_ids[index]
+        start_line, start_character, end_line, end_character = self._positions[4 * index : 4 * index + 4]
+        return multilspy_types.Location(
+            uri=self.uris[file_id],
+            range={
+                "start": {"line": start_line, "character": start_character},
+                "end": {"line": end_line, "character": end_character},
+            },
+            absolutePath=self.absolute_paths[file_id],
+            relativePath=self.relative_paths[file_id],
+        )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[multilspy_types.Location, List[multilspy_types.Location]]:
+        if isinstance(index, slice):
+            return [self._location(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LocationList index out of range")
+        return self._location(index)
+
+    def __iter__(self) -> Iterator[multilspy_types.Location]:
+        for index in range(len(self)):
+            yield self._location(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (LocationList, list)):
+            return self.to_locations() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LocationList({self.to_locations()!r})"
+
+    def relative_path(self, index: int) -> str:
+        """
+        Returns the path, relative to the repository root, of the file of the location at the given index
+        """
+        return self.relative_paths[self._file_ids[index]]
+
+    def count_by_file(self) -> Dict[str, int]:
+        """
+        Returns the number of locations in each file, by relative path
+        """
+        counts = [0] * len(self.uris)
+        for file_id in self._file_ids:
+            counts[file_id] += 1
+        return dict(zip(self.relative_paths, counts))
+
+    def to_locations(self) -> List[multilspy_types.Location]:
+        """
+        Returns the locations as a list of multilspy_types.Location
+        """
+        positions = self._positions
+        return [
+            multilspy_types.Location(
+                uri=self.uris[file_id],
+                range={
+                    "start": {"line": start_line, "character": start_character},
+                    "end": {"line": end_line, "character": end_character},
+                },
+                absolutePath=self.absolute_paths[file_id],
+                relativePath=self.relative_paths[file_id],
+            )
+            for file_id, start_line, start_character, end_line, end_character in zip(
+                self._file_ids, positions[0::4], positions[1::4], positions[2::4], positions[3::4]
+            )
+        ]
@@ -0,0 +1,332 @@
+"""
+This module provides the metrics of the messages exchanged by a LanguageServerHandler with the language server:
+per method request counts, latency histograms and in-flight requests, bytes in and out, and the time spent encoding,
+decoding and dispatching messages. The metrics are cheap enough to be always collected.
+"""
+
+import dataclasses
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the buckets of the latency histograms in the Prometheus export
+PROMETHEUS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies in microseconds, with buckets of constant relative width (HDR style): values below
+    2**SUB_BUCKET_BITS have their own bucket, and each following power of two is split in 2**(SUB_BUCKET_BITS - 1)
+    buckets, so that any recorded value is known within about 3%.
+    """
+
+    SUB_BUCKET_BITS = 6
+
+    def __init__(self) -> None:
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @classmethod
+    def _bucket_index(cls, value: int) -> int:
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return (shift << (cls.SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def _bucket_upper_bound(cls, index: int) -> int:
+        shift = max(0, (index >> (cls.SUB_BUCKET_BITS - 1)) - 1)
+        mantissa = index - (shift << (cls.SUB_BUCKET_BITS - 1))
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        """
+        Records a latency, in microseconds
+        """
+        index = self._bucket_index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the (upper bound, count) of each non empty bucket, in increasing order
+        """
+        for index, count in enumerate(self.counts):
+            if count:
+                yield self._bucket_upper_bound(index), count
+
+    def percentile(self, percentile: float) -> Optional[int]:
+        """
+        Returns the value below which the given percentage of the recorded latencies fall, within the bucket precision
+        """
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for upper_bound, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                return min(upper_bound, self.max)
+        return self.max
+
+    def count_at_or_below(self, value: int) -> int:
+        """
+        Returns the number of recorded latencies in the buckets whose upper bound is at most the given value
+        """
+        return sum(count for upper_bound, count in self.buckets() if upper_bound <= value)
+
+
+@dataclasses.dataclass
+class MethodMetrics:
+    """
+    The metrics of the messages of a method
+    """
+
+    # Requests sent to the server, and how many of them failed or were cancelled (including timeouts)
+    requests: int = 0
+    errors: int = 0
+    cancellations: int = 0
+    # Requests sent to the server and awaiting a response
+    in_flight: int = 0
+    # Latency of the requests sent to the server, from before their encoding to the delivery of the response
+    latency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+    # Messages sent to and received from the server, including the responses to requests of this method
+    messages_out: int = 0
+    messages_in: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    # Seconds spent encoding the messages sent, decoding the messages received, and running the handlers of the
+    # notifications and requests received from the server
+    encode_seconds: float = 0.0
+    decode_seconds: float = 0.0
+    dispatch_seconds: float = 0.0
+
+
+@dataclasses.dataclass
+class LatencySnapshot:
+    """
+    Summary of a latency histogram, in seconds
+    """
+
+    count: int
+    mean: Optional[float]
+    min: Optional[float]
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+    max: Optional[float]
+
+
+@dataclasses.dataclass
+class MethodMetricsSnapshot:
+    """
+    The metrics of a method at the time of a snapshot
+    """
+
+    requests: int
+    errors: int
+    cancellations: int
+    in_flight: int
+    latency: LatencySnapshot
+    messages_out: int
+    messages_in: int
+    bytes_out: int
+    bytes_in: int
+    encode_seconds: float
+    decode_seconds: float
+    dispatch_seconds: float
+
+
+@dataclasses.dataclass
+class MetricsSnapshot:
+    """
+    The metrics of the messages exchanged with the server, by method, at the time of the snapshot
+    """
+
+    # Seconds since the metrics started to be collected
+    uptime: float
+    methods: Dict[str, MethodMetricsSnapshot]
+
+    @property
+    def in_flight(self) -> int:
+        return sum(method.in_flight for method in self.methods.values())
+
+    @property
+    def bytes_out(self) -> int:
+        return sum(method.bytes_out for method in self.methods.values())
+
+    @property
+    def bytes_in(self) -> int:
+        return sum(method.bytes_in for method in self.methods.values())
+
+
+def _seconds(microseconds: Optional[float]) -> Optional[float]:
+    return None if microseconds is None else microseconds / 1e6
+
+
+# Method under which the messages whose method is unknown are counted, e.g. responses to unknown requests
+UNKNOWN_METHOD = "(unknown)"
+
+
+class LSPMetrics:
+    """
+    Collects the metrics of a LanguageServerHandler, which reports each message it encodes, decodes and dispatches,
+    and the start and end of each request it sends.
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.monotonic()
+        self.methods: Dict[str, MethodMetrics] = {}
+        # Methods of the requests awaiting a response, by request id, sent by the client and by the server
+        self._client_requests: Dict[Any, str] = {}
+        self._server_requests: Dict[Any, str] = {}
+
+    def _method(self, method: str) -> MethodMetrics:
+        metrics = self.methods.get(method)
+        if metrics is None:
+            self.methods[method] = metrics = MethodMetrics()
+        return metrics
+
+    def request_started(self, method: str, request_id: Any) -> float:
+        """
+        Records a request sent to the server, and returns its start time
+        """
+        metrics = self._method(method)
+        metrics.requests += 1
+        metrics.in_flight += 1
+        self._client_requests[request_id] = method
+        return time.perf_counter()
+
+    def request_finished(self, method: str, request_id: Any, start_time: float, outcome: str) -> None:
+        """
+        Records the end of a request sent to the server, with outcome "ok", "error" or "cancelled"
+        """
+        metrics = self._method(method)
+        metrics.in_flight -= 1
+        metrics.latency.record(int((time.perf_counter() - start_time) * 1e6))
+        if outcome == "error":
+            metrics.errors += 1
+        elif outcome == "cancelled":
+            metrics.cancellations += 1
+        self._client_requests.pop(request_id, None)
+
+    def message_sent(self, payload: Dict[str, Any], num_bytes: int, encode_seconds: float) -> None:
+        """
+        Records a message sent to the server
+        """
+        method = payload.get("method")
+        if method is None:
+            method = self._server_requests.pop(payload.get("id"), UNKNOWN_METHOD)
+        metrics = self._method(method)
+        metrics.messages_out += 1
+        metrics.bytes_out += num_bytes
+        metrics.encode_seconds += encode_seconds
+
+    def message_received(self, payload: Any, num_bytes: int, decode_seconds: float) -> None:
+        """
+        Records a message received from the server
+        """
+        if not isinstance(payload, dict):
+            method = UNKNOWN_METHOD
+        else:
+            method = payload.get("method")
+            if method is None:
+                method = self._client_requests.get(payload.get("id"), UNKNOWN_METHOD)
+            elif "id" in payload:
+                self._server_requests[payload["id"]] = method
+        metrics = self._method(method)
+        metrics.messages_in += 1
+        metrics.bytes_in += num_bytes
+        metrics.decode_seconds += decode_seconds
+
+    def message_dispatched(self, method: str, dispatch_seconds: float) -> None:
+        """
+        Records the time spent handling a notification or request received from the server
+        """
+        self._method(method).dispatch_seconds += dispatch_seconds
+
+    def snapshot(self) -> MetricsSnapshot:
+        """
+        Returns a copy of the current metrics
+        """
+        methods = {}
+        for method, metrics in list(self.methods.items()):
+            latency = metrics.latency
+            methods[method] = MethodMetricsSnapshot(
+                requests=metrics.requests,
+                errors=metrics.errors,
+                cancellations=metrics.cancellations,
+                in_flight=metrics.in_flight,
+                latency=LatencySnapshot(
+                    count=latency.count,
+                    mean=latency.total / latency.count / 1e6 if latency.count else None,
+                    min=_seconds(latency.min),
+                    p50=_seconds(latency.percentile(50)),
+                    p90=_seconds(latency.percentile(90)),
+                    p99=_seconds(latency.percentile(99)),
+                    max=_seconds(latency.max),
+                ),
+                messages_out=metrics.messages_out,
+                messages_in=metrics.messages_in,
+                bytes_out=metrics.bytes_out,
+                bytes_in=metrics.bytes_in,
+                encode_seconds=metrics.encode_seconds,
+                decode_seconds=metrics.decode_seconds,
+                dispatch_seconds=metrics.dispatch_seconds,
+            )
+        return MetricsSnapshot(time.monotonic() - self.start_time, methods)
+
+    def to_prometheus_text(self, prefix: str = "multilspy_lsp", labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format, with the given labels added to every sample
+        """
+        extra_labels = "".join(f',{name}="{_escape_label(value)}"' for name, value in sorted((labels or {}).items()))
+        counters = [
+            ("requests_total", "counter", "Requests sent to the language server", "requests"),
+            ("request_errors_total", "counter", "Requests which failed", "errors"),
+            ("request_cancellations_total", "counter", "Requests which were cancelled or timed out", "cancellations"),
+            ("requests_in_flight", "gauge", "Requests awaiting a response", "in_flight"),
+            ("messages_sent_total", "counter", "Messages sent to the language server", "messages_out"),
+            ("messages_received_total", "counter", "Messages received from the language server", "messages_in"),
+            ("sent_bytes_total", "counter", "Bytes sent to the language server", "bytes_out"),
+            ("received_bytes_total", "counter", "Bytes received from the language server", "bytes_in"),
+            ("encode_seconds_total", "counter", "Seconds spent encoding messages", "encode_seconds"),
+            ("decode_seconds_total", "counter", "Seconds spent decoding messages", "decode_seconds"),
+            ("dispatch_seconds_total", "counter", "Seconds spent handling notifications and requests of the server", "dispatch_seconds"),
+        ]
+        methods = sorted(list(self.methods.items()))
+        lines = []
+        for name, metric_type, description, attribute in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for method, metrics in methods:
+                lines.append(f'{prefix}_{name}{{method="{_escape_label(method)}"{extra_labels}}} {getattr(metrics, attribute)}')
+
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Latency of the requests sent to the language server")
+        lines.append(f"# TYPE {name} histogram")
+        for method, metrics in methods:
+            latency = metrics.latency
+            if not latency.count:
+                continue
+            method_labels = f'method="{_escape_label(method)}"{extra_labels}'
+            for upper_bound in PROMETHEUS_LATENCY_BUCKETS:
+                count = latency.count_at_or_below(int(upper_bound * 1e6))
+                lines.append(f'{name}_bucket{{{method_labels},le="{upper_bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{method_labels},le="+Inf"}} {latency.count}')
+            lines.append(f"{name}_sum{{{method_labels}}} {latency.total / 1e6}")
+            lines.append(f"{name}_count{{{method_labels}}} {latency.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
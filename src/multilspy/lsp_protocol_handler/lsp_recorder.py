@@ -0,0 +1,89 @@
+"""
+This module provides the recording of the JSON-RPC messages exchanged between the client and the language server,
+to be replayed by multilspy.lsp_protocol_handler.replay_server.
+
+A recording is a JSON lines file, with one object per message:
+    {"time": <seconds since the recording started>, "source": "client", "target": "server", "message": {...}}
+"""
+
+import dataclasses
+import json
+import time
+from typing import IO, Any, List, Union
+
+from .server import PayloadLike
+
+
+@dataclasses.dataclass
+class RecordedMessage:
+    """
+    A message of a recording
+    """
+
+    # Seconds since the recording started
+    time: float
+
+    # "client" or "server"
+    source: str
+    target: str
+
+    message: Any
+
+
+class LSPRecorder:
+    """
+    Appends the messages seen by a LanguageServerHandler to a recording. The message bodies are written as
+    they were sent or received, without being serialized again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Union[IO[bytes], None] = None
+        self._start_time = 0.0
+
+    def start(self) -> None:
+        """
+        Opens the recording, truncating it
+        """
+        if self._file is None:
+            self._file = open(self.path, "wb")
+            self._start_time = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Flushes and closes the recording
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, source: str, target: str, body: bytes) -> None:
+        """
+        Records the JSON body of a message
+        """
+        if self._file is None:
+            return
+        header = '{"time": %.6f, "source": "%s", "target": "%s", "message": ' % (
+            time.monotonic() - self._start_time,
+            source,
+            target,
+        )
+        self._file.write(header.encode("utf-8") + body + b"}\n")
+
+    def record_payload(self, source: str, target: str, payload: PayloadLike) -> None:
+        """
+        Records a message given as a payload, e.g. to write a synthetic recording
+        """
+        self.record(source, target, json.dumps(payload).encode("utf-8"))
+
+
+def load_recording(path: str) -> List[RecordedMessage]:
+    """
+    Reads the messages of a recording, in the order in which they were recorded
+    """
+    messages = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                messages.append(RecordedMessage(**json.loads(line)))
+    return messages
@@ -0,0 +1,217 @@
+"""
+A stand-in language server, speaking LSP over stdio, which replays the responses of a recording made with
+LSPRecorder. It lets the client be exercised and benchmarked without the real language server.
+
+Each request is answered with the response recorded for the same method and parameters, or else with the next
+response recorded for the same method, or else with a null result, after the configured latency. The notifications
+and requests sent by the server after the n-th occurrence of a client message are sent again after its n-th
+occurrence. URIs under the recorded root are rewritten to the root of the replaying client.
+
+Usage:
+    python -m multilspy.lsp_protocol_handler.replay_server recording.jsonl [--latency SECONDS] [--method-latency METHOD=SECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lsp_recorder import RecordedMessage, load_recording
+from .lsp_types import LSPErrorCodes
+from .server import ENCODING, READ_CHUNK_SIZE, MessageFramer, ProcessLaunchInfo, get_default_codec
+
+
+def _params_key(params: Any) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+class ReplayServer:
+    """
+    Answers the messages of a client from the messages of a recording
+    """
+
+    def __init__(
+        self,
+        messages: List[RecordedMessage],
+        latency: float = 0.0,
+        method_latencies: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.latency = latency
+        self.method_latencies = method_latencies or {}
+        self.codec = get_default_codec()
+        # Responses (without id) recorded for each request, by (method, parameters) and by method, in recorded order
+        self.responses: Dict[Tuple[str, str], List[dict]] = {}
+        self.responses_by_method: Dict[str, List[dict]] = {}
+        self._next_response_index: Dict[Any, int] = {}
+        # Messages sent by the server after the n-th occurrence of each client message, by (method, n)
+        self.followers: Dict[Tuple[str, int], List[dict]] = {}
+        self.recorded_root_uri: Optional[str] = None
+        self.root_uri: Optional[str] = None
+        self._occurrences: Dict[str, int] = {}
+        self._pending: Dict[Any, asyncio.TimerHandle] = {}
+        self._next_request_id = 0
+        self.exited = False
+        self._load(messages)
+
+    def _load(self, messages: List[RecordedMessage]) -> None:
+        requests: Dict[Any, Tuple[str, str]] = {}
+        occurrences: Dict[str, int] = {}
+        last_client_message: Optional[Tuple[str, int]] = None
+        for recorded in messages:
+            message = recorded.message
+            method = message.get("method")
+            if recorded.source == "client":
+                if method is None:
+                    # Responses of the client to the requests of the server are not replayed
+                    continue
+                occurrences[method] = occurrences.get(method, 0) + 1
+                last_client_message = (method, occurrences[method])
+                if "id" in message:
+                    requests[message["id"]] = (method, _params_key(message.get("params")))
+                if method == "initialize":
+                    self.recorded_root_uri = (message.get("params") or {}).get("rootUri")
+            elif method is None:
+                key = requests.pop(message.get("id"), None)
+                if key is not None:
+                    response = {k: v for k, v in message.items() if k != "id"}
+                    self.responses.setdefault(key, []).append(response)
+                    self.responses_by_method.setdefault(key[0], []).append(response)
+            elif last_client_message is not None:
+                self.followers.setdefault(last_client_message, []).append(message)
+
+    def _next_response(self, method: str, params: Any) -> dict:
+        key = (method, _params_key(params))
+        responses = self.responses.get(key)
+        if responses is None:
+            key = method
+            responses = self.responses_by_method.get(method)
+        if not responses:
+            return {"jsonrpc": "2.0", "result": None}
+        index = self._next_response_index.get(key, 0)
+        self._next_response_index[key] = index + 1
+        # The last response is repeated once all the recorded ones have been replayed
+        return responses[min(index, len(responses) - 1)]
+
+    def _encode(self, payload: dict) -> bytes:
+        body = self.codec.encode(payload)
+        if self.recorded_root_uri and self.root_uri and self.recorded_root_uri != self.root_uri:
+            body = body.replace(self.recorded_root_uri.encode(ENCODING), self.root_uri.encode(ENCODING))
+        return f"Content-Length: {len(body)}\r\n\r\n".encode(ENCODING) + body
+
+    def _write(self, payload: dict) -> None:
+        sys.stdout.buffer.write(self._encode(payload))
+        sys.stdout.buffer.flush()
+
+    def _respond(self, request_id: Any, response: dict, followers: List[dict]) -> None:
+        self._pending.pop(request_id, None)
+        self._write({**response, "id": request_id})
+        self._send_followers(followers)
+
+    def _send_followers(self, followers: List[dict]) -> None:
+        for message in followers:
+            if "id" in message:
+                self._next_request_id += 1
+                message = {**message, "id": f"replay-{self._next_request_id}"}
+            self._write(message)
+
+    def handle(self, message: dict) -> None:
+        """
+        Handles a message of the client
+        """
+        method = message.get("method")
+        if method is None:
+            return
+        params = message.get("params")
+        if method == "initialize":
+            self.root_uri = (params or {}).get("rootUri")
+        if method == "exit":
+            self.exited = True
+            return
+        if method == "$/cancelRequest":
+            handle = self._pending.pop((params or {}).get("id"), None)
+            if handle is not None:
+                handle.cancel()
+                self._write(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": params["id"],
+                        "error": {"code": LSPErrorCodes.RequestCancelled, "message": "Request cancelled"},
+                    }
+                )
+            return
+
+        self._occurrences[method] = self._occurrences.get(method, 0) + 1
+        followers = self.followers.get((method, self._occurrences[method]), [])
+        if "id" not in message:
+            self._send_followers(followers)
+            return
+        if self.root_uri and self.recorded_root_uri:
+            params = json.loads(json.dumps(params).replace(self.root_uri, self.recorded_root_uri))
+        response = self._next_response(method, params)
+        latency = self.method_latencies.get(method, self.latency)
+        if latency > 0:
+            self._pending[message["id"]] = asyncio.get_running_loop().call_later(
+                latency, self._respond, message["id"], response, followers
+            )
+        else:
+            self._respond(message["id"], response, followers)
+
+    async def serve(self) -> None:
+        """
+        Answers the messages read from stdin until the exit notification or the end of stdin
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+        framer = MessageFramer()
+        while not self.exited:
+            data = await reader.read(READ_CHUNK_SIZE)
+            if not data:
+                break
+            for body in framer.feed(data):
+                self.handle(self.codec.decode(body))
+                if self.exited:
+                    break
+
+
+def replay_server_launch_info(
+    recording_path: str, latency: float = 0.0, method_latencies: Optional[Dict[str, float]] = None, cwd: str = "."
+) -> ProcessLaunchInfo:
+    """
+    Returns the ProcessLaunchInfo to launch the replay server with the given recording and latencies
+    """
+    args = [sys.executable, "-m", "multilspy.lsp_protocol_handler.replay_server", recording_path, "--latency", str(latency)]
+    for method, method_latency in (method_latencies or {}).items():
+        args.extend(["--method-latency", f"{method}={method_latency}"])
+    # The server imports multilspy from the same location as the client
+    package_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    python_path = os.pathsep.join(filter(None, [package_parent, os.environ.get("PYTHONPATH")]))
+    return ProcessLaunchInfo(cmd=" ".join(shlex.quote(arg) for arg in args), env={"PYTHONPATH": python_path}, cwd=cwd)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replays the responses of a recorded language server session over stdio")
+    parser.add_argument("recording", help="The recording made with LSPRecorder")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering each request")
+    parser.add_argument(
+        "--method-latency",
+        action="append",
+        default=[],
+        metavar="METHOD=SECONDS",
+        help="Seconds to wait before answering the requests of the given method, overriding --latency",
+    )
+    args = parser.parse_args()
+
+    method_latencies = {}
+    for item in args.method_latency:
+        method, _, seconds = item.rpartition("=")
+        method_latencies[method] = float(seconds)
+    server = ReplayServer(load_recording(args.recording), args.latency, method_latencies)
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -29,11 +29,15 @@ SOFTWARE.
 """
 
 import asyncio
+import collections
 import dataclasses
 import json
 import os
-from typing import Any, Dict, List, Optional, Union
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type, Union
 
+from .lsp_metrics import LSPMetrics
 from .lsp_requests import LspNotification, LspRequest
 from .lsp_types import ErrorCodes
 
@@ -42,6 +46,16 @@ PayloadLike = Union[List[StringDict], StringDict, None]
 CONTENT_LENGTH = "Content-Length: "
 ENCODING = "utf-8"
 
+# The number of bytes requested from the server stdout per read. Large reads allow
+# many frames to be parsed out of a single chunk.
+READ_CHUNK_SIZE = 1 << 16
+
+# The number of bytes of frames queued for the server stdin above which the coroutines sending messages wait
+MAX_OUTBOUND_QUEUE_BYTES = 1 << 22
+
+# The maximum number of bytes of frames coalesced into a single write to the server stdin
+WRITE_BATCH_SIZE = 1 << 18
+
 
 @dataclasses.dataclass
 class ProcessLaunchInfo:
@@ -95,12 +109,92 @@ class StopLoopException(Exception):
     pass
 
 
-def create_message(payload: PayloadLike):
-    body = json.dumps(payload, check_circular=False, ensure_ascii=False, separators=(",", ":")).encode(ENCODING)
-    return (
-        f"Content-Length: {len(body)}\r\n".encode(ENCODING),
-        "Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n\r\n".encode(ENCODING),
-        body,
+class JsonCodec:
+    """
+    Serializes and deserializes JSON-RPC payloads using the standard library json module.
+    Subclasses use faster third-party JSON libraries when they are installed.
+    """
+
+    name = "json"
+
+    # Exceptions raised by decode for malformed input
+    decode_errors: Tuple[Type[Exception], ...] = (json.JSONDecodeError,)
+
+    def encode(self, payload: PayloadLike) -> bytes:
+        return json.dumps(payload, check_circular=False, ensure_ascii=False, separators=(",", ":")).encode(ENCODING)
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JsonCodec backed by orjson
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self.decode_errors = (orjson.JSONDecodeError,)
+
+    def encode(self, payload: PayloadLike) -> bytes:
+        return self._dumps(payload)
+
+    def decode(self, body: bytes) -> Any:
+        return self._loads(body)
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    JsonCodec backed by msgspec
+    """
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self.decode_errors = (msgspec.DecodeError,)
+
+    def encode(self, payload: PayloadLike) -> bytes:
+        return self._encoder.encode(payload)
+
+    def decode(self, body: bytes) -> Any:
+        return self._decoder.decode(body)
+
+
+def get_default_codec() -> JsonCodec:
+    """
+    Returns the fastest available JsonCodec: orjson, then msgspec, then the standard library json module
+    """
+    for codec_cls in (OrjsonCodec, MsgspecCodec):
+        try:
+            return codec_cls()
+        except ImportError:
+            continue
+    return JsonCodec()
+
+
+_STDLIB_CODEC = JsonCodec()
+
+
+def create_message(payload: PayloadLike, codec: Optional[JsonCodec] = None) -> bytes:
+    """
+    Returns the complete frame (headers and body) for the given payload as a single buffer
+    """
+    body = (codec or _STDLIB_CODEC).encode(payload)
+    return b"".join(
+        (
+            f"Content-Length: {len(body)}\r\n".encode(ENCODING),
+            b"Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n\r\n",
+            body,
+        )
     )
 
 
@@ -111,23 +205,6 @@ class MessageType:
     log = 4
 
 
-class Request:
-    def __init__(self) -> None:
-        self.cv = asyncio.Condition()
-        self.result: Optional[PayloadLike] = None
-        self.error: Optional[Error] = None
-
-    async def on_result(self, params: PayloadLike) -> None:
-        self.result = params
-        async with self.cv:
-            self.cv.notify()
-
-    async def on_error(self, err: Error) -> None:
-        self.error = err
-        async with self.cv:
-            self.cv.notify()
-
-
 def content_length(line: bytes) -> Optional[int]:
     if line.startswith(b"Content-Length: "):
         _, value = line.split(b"Content-Length: ")
@@ -139,6 +216,209 @@ def content_length(line: bytes) -> Optional[int]:
     return None
 
 
+class MessageFramer:
+    """
+    Incrementally parses the "Content-Length" framed messages of the base protocol out of
+    a stream of bytes. Data is accumulated in a growable bytearray, and complete frames are
+    sliced out through a memoryview, so that a single read can yield many message bodies.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        # Offset of the first byte in the buffer that has not been consumed yet
+        self._start = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Append the given data to the buffer and return the bodies of all the frames completed by it
+        """
+        buffer = self._buffer
+        buffer += data
+        bodies: List[bytes] = []
+        start = self._start
+        with memoryview(buffer) as view:
+            while True:
+                header_end = buffer.find(b"\r\n\r\n", start)
+                if header_end == -1:
+                    break
+                num_bytes = None
+                for line in bytes(view[start:header_end]).split(b"\r\n"):
+                    try:
+                        num_bytes = content_length(line)
+                    except ValueError:
+                        num_bytes = None
+                    if num_bytes is not None:
+                        break
+                body_start = header_end + 4
+                if num_bytes is None:
+                    # Skip the malformed header block and resynchronize on the next one
+                    start = body_start
+                    continue
+                body_end = body_start + num_bytes
+                if body_end > len(buffer):
+                    break
+                bodies.append(bytes(view[body_start:body_end]))
+                start = body_end
+        # Compact the buffer once the consumed prefix dominates it, so it does not grow unboundedly
+        if start == len(buffer):
+            buffer.clear()
+            start = 0
+        elif start > READ_CHUNK_SIZE and start * 2 > len(buffer):
+            del buffer[:start]
+            start = 0
+        self._start = start
+        return bodies
+
+    def pending(self) -> int:
+        """
+        Returns the number of buffered bytes that do not form a complete frame yet
+        """
+        return len(self._buffer) - self._start
+
+
+class MessageWriter:
+    """
+    Writes the frames sent to the language server from a dedicated task, through a bounded outbound queue.
+
+    Frames queued while a write is being drained are coalesced into a single write. Requests and notifications are
+    written in the order they were queued, as the server must see them in that order: a request about a document
+    may depend on the edits of other documents. Control messages (cancellations and responses to the requests of
+    the server) are written before the notifications queued ahead of them, but after the requests queued ahead of
+    them, so that a cancellation is never written before its request.
+
+    Producers which are coroutines wait in wait_for_capacity while the queue holds more than max_queued_bytes.
+    Frames can also be queued from other threads, e.g. by SyncLanguageServer, in which case they are handed over
+    to the event loop of the writer.
+    """
+
+    # Kinds of frames
+    REQUEST = 0
+    CONTROL = 1
+    NOTIFICATION = 2
+
+    def __init__(
+        self,
+        stream: asyncio.StreamWriter,
+        max_queued_bytes: int = MAX_OUTBOUND_QUEUE_BYTES,
+        max_batch_bytes: int = WRITE_BATCH_SIZE,
+    ) -> None:
+        self.stream = stream
+        self.max_queued_bytes = max_queued_bytes
+        self.max_batch_bytes = max_batch_bytes
+        self.queued_bytes = 0
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        # (frame, sequence number of the last notification that must be written before it)
+        self._priority: Deque[Tuple[bytes, int]] = collections.deque()
+        # (sequence number, frame) of the queued notifications
+        self._notifications: Deque[Tuple[int, bytes]] = collections.deque()
+        self._notification_seq = 0
+        self._written_notification_seq = 0
+        self._wakeup = asyncio.Event()
+        self._has_capacity = asyncio.Event()
+        self._has_capacity.set()
+        self._closing = False
+        self._task = self._loop.create_task(self._run())
+
+    def put(self, frame: bytes, kind: int) -> None:
+        """
+        Queues a frame of the given kind. Never blocks.
+        """
+        if threading.get_ident() == self._loop_thread_id:
+            self._put(frame, kind)
+        else:
+            self._loop.call_soon_threadsafe(self._put, frame, kind)
+
+    def _put(self, frame: bytes, kind: int) -> None:
+        if self.closed or self._closing:
+            return
+        if kind == self.NOTIFICATION:
+            self._notification_seq += 1
+            self._notifications.append((self._notification_seq, frame))
+        elif kind == self.REQUEST:
+            # Requests are written after all the notifications queued ahead of them
+            self._priority.append((frame, self._notification_seq))
+        else:
+            self._priority.append((frame, 0))
+        self.queued_bytes += len(frame)
+        if self.queued_bytes > self.max_queued_bytes:
+            self._has_capacity.clear()
+        self._wakeup.set()
+
+    def _pop(self) -> Optional[bytes]:
+        """
+        Returns the next frame to write: the first priority frame if the notifications it depends on have been
+        written, otherwise the first notification
+        """
+        if self._priority and self._priority[0][1] <= self._written_notification_seq:
+            return self._priority.popleft()[0]
+        if self._notifications:
+            self._written_notification_seq, frame = self._notifications.popleft()
+            return frame
+        return None
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                if not self._priority and not self._notifications:
+                    if self._closing:
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                batch: List[bytes] = []
+                batch_bytes = 0
+                while batch_bytes < self.max_batch_bytes:
+                    frame = self._pop()
+                    if frame is None:
+                        break
+                    batch.append(frame)
+                    batch_bytes += len(frame)
+                self.stream.write(batch[0] if len(batch) == 1 else b"".join(batch))
+                # The written frames count against the bound until the stream has drained them
+                await self.stream.drain()
+                self.queued_bytes -= batch_bytes
+                if self.queued_bytes <= self.max_queued_bytes:
+                    self._has_capacity.set()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.closed = True
+            self._priority.clear()
+            self._notifications.clear()
+            self.queued_bytes = 0
+            self._has_capacity.set()
+
+    async def wait_for_capacity(self) -> None:
+        """
+        Waits until the queue holds at most max_queued_bytes
+        """
+        while self.queued_bytes > self.max_queued_bytes and not self.closed:
+            await self._has_capacity.wait()
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Writes the queued frames, within the timeout, and stops the writer task
+        """
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+
+
+def outbound_kind(payload: StringDict) -> int:
+    """
+    Returns the MessageWriter kind of a message sent to the server
+    """
+    method = payload.get("method")
+    if method is None or method == "$/cancelRequest":
+        return MessageWriter.CONTROL
+    return MessageWriter.REQUEST if "id" in payload else MessageWriter.NOTIFICATION
+
+
 class LanguageServerHandler:
     """
     This class provides the implementation of Python client for the Language Server Protocol.
@@ -159,8 +439,10 @@ class LanguageServerHandler:
         _received_shutdown: A boolean flag that indicates whether the client has received
             a shutdown request from the server.
         request_id: An integer that represents the next available request id for the client.
-        _response_handlers: A dictionary that maps request ids to Request objects that
-            store the results or errors of the requests.
+        _response_handlers: A dictionary that maps the ids of pending requests to the asyncio.Future
+            objects that are resolved with the results or errors of the requests.
+        request_timeout: The default timeout, in seconds, for requests sent to the server. None means
+            that requests wait for the response indefinitely.
         on_request_handlers: A dictionary that maps method names to callback functions
             that handle requests from the server.
         on_notification_handlers: A dictionary that maps method names to callback functions
@@ -171,14 +453,28 @@ class LanguageServerHandler:
             the asynchronous tasks created by the handler.
         task_counter: An integer that represents the next available task id for the handler.
         loop: An asyncio.AbstractEventLoop object that represents the event loop used by the handler.
+        codec: A JsonCodec object used to serialize and deserialize the messages exchanged with the server.
+        recorder: An optional LSPRecorder which records the body of every message exchanged with the server.
+        metrics: An optional LSPMetrics which collects the per method metrics of the messages exchanged with the server.
+        writer: The MessageWriter of the messages sent to the server, while the server is running.
     """
 
-    def __init__(self, process_launch_info: ProcessLaunchInfo, logger=None) -> None:
+    def __init__(
+        self,
+        process_launch_info: ProcessLaunchInfo,
+        logger=None,
+        codec: Optional[JsonCodec] = None,
+        recorder=None,
+        metrics: Optional[LSPMetrics] = None,
+    ) -> None:
         """
         Params:
             cmd: A string that represents the command to launch the language server process.
             logger: An optional function that takes two strings (source and destination) and
                 a payload dictionary, and logs the communication between the client and the server.
+            codec: An optional JsonCodec to use for the messages. Defaults to the fastest available one.
+            recorder: An optional LSPRecorder which records the body of every message exchanged with the server.
+            metrics: An optional LSPMetrics which collects the per method metrics of the messages exchanged with the server.
         """
         self.send = LspRequest(self.send_request)
         self.notify = LspNotification(self.send_notification)
@@ -188,8 +484,8 @@ class LanguageServerHandler:
         self._received_shutdown = False
 
         self.request_id = 1
-        self._response_handlers: Dict[Any, Request] = {}
-        self._response_handlers_lock = asyncio.Lock()
+        self._response_handlers: Dict[Any, asyncio.Future] = {}
+        self.request_timeout: Optional[float] = None
         self.on_request_handlers = {}
         self.on_notification_handlers = {}
         self.logger = logger
@@ -197,6 +493,12 @@ class LanguageServerHandler:
         self.task_counter = 0
         self._task_lock = asyncio.Lock()
         self.loop = None
+        self.codec = codec if codec is not None else get_default_codec()
+        self.recorder = recorder
+        self.metrics = metrics
+        self.writer: Optional[MessageWriter] = None
+        # The task reading the messages of the server, which runs the notification handlers
+        self._reader_task: Optional[asyncio.Task] = None
 
     async def start(self) -> None:
         """
@@ -215,6 +517,7 @@ class LanguageServerHandler:
         )
 
         self.loop = asyncio.get_event_loop()
+        self.writer = MessageWriter(self.process.stdin)
         await self._create_task(self.run_forever())
         await self._create_task(self.run_forever_stderr())
 
@@ -225,12 +528,23 @@ class LanguageServerHandler:
         if not self.process:
             return
 
+        # Write the messages still queued, such as the exit notification
+        if self.writer is not None:
+            await self.writer.close(timeout=5)
+            self.writer = None
+
         # Cancel all tasks
         for task in self.tasks.values():
             task.cancel()
 
         self.tasks = {}
 
+        # Wake up the callers still waiting for responses that will never arrive
+        for future in self._response_handlers.values():
+            if not future.done():
+                future.cancel()
+        self._response_handlers = {}
+
         process = self.process
         self.process = None
 
@@ -281,30 +595,21 @@ class LanguageServerHandler:
         Continuously read from the language server process stdout and handle the messages
         invoking the registered response and notification handlers
         """
+        framer = MessageFramer()
+        self._reader_task = asyncio.current_task()
         try:
             while not self._received_shutdown:
                 if not self.process or not self.process.stdout or self.process.stdout.at_eof():
                     break
-                
-                line = await self.process.stdout.readline()
-                if not line:
-                    continue
-                
-                try:
-                    num_bytes = content_length(line)
-                except ValueError:
-                    continue
-                if num_bytes is None:
-                    continue
-                
-                while line and line.strip():
-                    line = await self.process.stdout.readline()
-                if not line:
+
+                data = await self.process.stdout.read(READ_CHUNK_SIZE)
+                if not data:
                     continue
-                
-                body = await self.process.stdout.readexactly(num_bytes)
-                await self._create_task(self._handle_body(body))
-                
+
+                # Frames are dispatched inline, in the order they were received
+                for body in framer.feed(data):
+                    await self._handle_body(body)
+
         except (BrokenPipeError, ConnectionResetError, StopLoopException):
             pass
         return self._received_shutdown
@@ -326,14 +631,24 @@ class LanguageServerHandler:
         """
         Parse the body text received from the language server process and invoke the appropriate handler
         """
+        if self.metrics is not None:
+            decode_start = time.perf_counter()
         try:
-            await self._receive_payload(json.loads(body))
+            payload = self.codec.decode(body)
         except IOError as ex:
             self._log(f"malformed {ENCODING}: {ex}")
+            return
         except UnicodeDecodeError as ex:
             self._log(f"malformed {ENCODING}: {ex}")
-        except json.JSONDecodeError as ex:
+            return
+        except self.codec.decode_errors as ex:
             self._log(f"malformed JSON: {ex}")
+            return
+        if self.metrics is not None:
+            self.metrics.message_received(payload, len(body), time.perf_counter() - decode_start)
+        if self.recorder is not None:
+            self.recorder.record("server", "client", body)
+        await self._receive_payload(payload)
 
     async def _receive_payload(self, payload: StringDict) -> None:
         """
@@ -344,7 +659,9 @@ class LanguageServerHandler:
         try:
             if "method" in payload:
                 if "id" in payload:
-                    await self._request_handler(payload)
+                    # Requests from the server may take arbitrarily long to be handled by the client,
+                    # so they are run in their own task to avoid stalling the reader loop
+                    await self._create_task(self._request_handler(payload))
                 else:
                     await self._notification_handler(payload)
             elif "id" in payload:
@@ -378,45 +695,96 @@ class LanguageServerHandler:
         )
         self.task_counter += 1
 
-    async def send_request(self, method: str, params: Optional[dict] = None) -> None:
-        """
-        Send request to the server, register the request id, and wait for the response
+    async def send_request(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
         """
-        request = Request()
-        async with self._response_handlers_lock:
-            request_id = self.request_id
-            self.request_id += 1
-            self._response_handlers[request_id] = request
-            
-        async with request.cv:
-            await self._send_payload(make_request(method, request_id, params))
-            await request.cv.wait()
-        if isinstance(request.error, Error):
-            raise request.error
-        return request.result
+        Send request to the server, register the request id, and wait for the response.
 
-    def _send_payload_sync(self, payload: StringDict) -> None:
+        If the response does not arrive within the timeout (defaulting to request_timeout), or the
+        caller is cancelled while waiting, a $/cancelRequest notification is sent to the server and
+        asyncio.TimeoutError or asyncio.CancelledError respectively is raised.
         """
-        Send the payload to the server by writing to its stdin synchronously
+        if self._reader_task is not None and asyncio.current_task() is self._reader_task:
+            # The response could never be read, as the reader is the one waiting for it
+            raise Error(
+                ErrorCodes.InternalError,
+                f"{method} request awaited by a notification handler, which must not wait for responses",
+            )
+        request_id = self.request_id
+        self.request_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._response_handlers[request_id] = future
+
+        if timeout is None:
+            timeout = self.request_timeout
+        if self.metrics is not None:
+            start_time = self.metrics.request_started(method, request_id)
+        outcome = "ok"
+        try:
+            await self._send_payload(make_request(method, request_id, params))
+            if timeout is None:
+                return await future
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            outcome = "cancelled"
+            if self._response_handlers.pop(request_id, None) is not None:
+                self.notify.cancel_request({"id": request_id})
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._response_handlers.pop(request_id, None)
+            if self.metrics is not None:
+                self.metrics.request_finished(method, request_id, start_time, outcome)
+
+    def _encode_payload(self, payload: StringDict) -> bytes:
+        """
+        Returns the frame of the payload, recording the time spent encoding it
+        """
+        if self.metrics is None:
+            return create_message(payload, self.codec)
+        encode_start = time.perf_counter()
+        msg = create_message(payload, self.codec)
+        self.metrics.message_sent(payload, len(msg), time.perf_counter() - encode_start)
+        return msg
+
+    def _queue_payload(self, payload: StringDict) -> bool:
+        """
+        Encode the payload and queue it for writing to the server stdin. Returns False if the server is not running.
         """
         if not self.process or not self.process.stdin:
-            return
-        msg = create_message(payload)
+            return False
+        msg = self._encode_payload(payload)
         if self.logger:
             self.logger("client", "server", payload)
-        self.process.stdin.writelines(msg)
+        if self.recorder is not None:
+            self.recorder.record("client", "server", msg[msg.index(b"\r\n\r\n") + 4 :])
+        if self.writer is None:
+            self.process.stdin.write(msg)
+        else:
+            self.writer.put(msg, outbound_kind(payload))
+        return True
+
+    def _send_payload_sync(self, payload: StringDict) -> None:
+        """
+        Send the payload to the server by queuing it for the writer task, without waiting
+        """
+        self._queue_payload(payload)
 
     async def _send_payload(self, payload: StringDict) -> None:
         """
-        Send the payload to the server by writing to its stdin asynchronously.
+        Send the payload to the server by queuing it for the writer task, waiting while the outbound queue is full.
         """
-        if not self.process or not self.process.stdin:
-            return
-        msg = create_message(payload)
-        if self.logger:
-            self.logger("client", "server", payload)
-        self.process.stdin.writelines(msg)
-        await self.process.stdin.drain()
+        if self._queue_payload(payload) and self.writer is not None:
+            await self.writer.wait_for_capacity()
+
+    async def wait_for_send_capacity(self) -> None:
+        """
+        Waits while the queue of messages to be written to the server is full. Producers of many notifications,
+        which are sent without waiting, can call it to apply backpressure.
+        """
+        if self.writer is not None:
+            await self.writer.wait_for_capacity()
 
     def on_request(self, method: str, cb) -> None:
         """
@@ -426,7 +794,12 @@ class LanguageServerHandler:
 
     def on_notification(self, method: str, cb) -> None:
         """
-        Register the callback function to handle notifications from the server to the client for the given method
+        Register the callback function to handle notifications from the server to the client for the given method.
+
+        Notification handlers are awaited by the task reading the messages of the server, so that notifications are
+        handled in the order they were received. A handler must therefore not wait for anything that depends on the
+        following messages of the server, such as the response to a request: awaiting send_request raises an Error.
+        A handler needing to do so must run that work in a task of its own.
         """
         self.on_notification_handlers[method] = cb
 
@@ -434,17 +807,16 @@ class LanguageServerHandler:
         """
         Handle the response received from the server for a request, using the id to determine the request
         """
-        async with self._response_handlers_lock:
-            if response["id"] not in self._response_handlers:
-                return
-            request = self._response_handlers.pop(response["id"])
-            
+        future = self._response_handlers.pop(response["id"], None)
+        if future is None or future.done():
+            return
+
         if "result" in response and "error" not in response:
-            await request.on_result(response["result"])
+            future.set_result(response["result"])
         elif "result" not in response and "error" in response:
-            await request.on_error(Error.from_lsp(response["error"]))
+            future.set_exception(Error.from_lsp(response["error"]))
         else:
-            await request.on_error(Error(ErrorCodes.InvalidRequest, ""))
+            future.set_exception(Error(ErrorCodes.InvalidRequest, ""))
 
     async def _request_handler(self, response: StringDict) -> None:
         """
@@ -463,12 +835,16 @@ class LanguageServerHandler:
                 ),
             )
             return
+        dispatch_start = time.perf_counter()
         try:
             self.send_response(request_id, await handler(params))
         except Error as ex:
             self.send_error_response(request_id, ex)
         except Exception as ex:
             self.send_error_response(request_id, Error(ErrorCodes.InternalError, str(ex)))
+        finally:
+            if self.metrics is not None:
+                self.metrics.message_dispatched(method, time.perf_counter() - dispatch_start)
 
     async def _notification_handler(self, response: StringDict) -> None:
         """
@@ -480,6 +856,7 @@ class LanguageServerHandler:
         if not handler:
             self._log(f"unhandled {method}")
             return
+        dispatch_start = time.perf_counter()
         try:
             await handler(params)
         except asyncio.CancelledError:
@@ -498,3 +875,6 @@ class LanguageServerHandler:
                         }
                     ),
                 )
+        finally:
+            if self.metrics is not None:
+                self.metrics.message_dispatched(method, time.perf_counter() - dispatch_start)
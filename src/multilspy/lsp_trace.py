@@ -0,0 +1,255 @@
+"""
+This module provides the tracing of the messages exchanged with the language server, with sampling, per-method
+filters and truncation of the message bodies, so that it can stay enabled on large workspaces. The trace is written
+from a background thread, and the most recent messages can be kept in a ring buffer dumped when the server fails.
+"""
+
+import collections
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+from typing import Any, Deque, Dict, List, Tuple, Union
+
+from .lsp_protocol_handler.lsp_types import LSPErrorCodes
+from .multilspy_config import LSPTraceConfig
+from .multilspy_logger import MultilspyLogger
+
+
+class _BodyLimitReached(Exception):
+    pass
+
+
+def render_truncated_json(payload: Any, max_size: int) -> str:
+    """
+    Returns the JSON serialization of the payload, cut after max_size characters. The payload is only walked up to
+    the cut, so that the cost does not depend on the size of the payload.
+    """
+    parts: List[str] = []
+    remaining = max_size
+
+    def emit(text: str) -> None:
+        nonlocal remaining
+        parts.append(text)
+        remaining -= len(text)
+        if remaining <= 0:
+            raise _BodyLimitReached()
+
+    def walk(value: Any) -> None:
+        if isinstance(value, dict):
+            emit("{")
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    emit(", ")
+                emit(json.dumps(str(key), ensure_ascii=False))
+                emit(": ")
+                walk(item)
+            emit("}")
+        elif isinstance(value, (list, tuple)):
+            emit("[")
+            for index, item in enumerate(value):
+                if index:
+                    emit(", ")
+                walk(item)
+            emit("]")
+        elif isinstance(value, str):
+            # Only the part of long strings that fits is serialized
+            emit(json.dumps(value[: remaining + 1], ensure_ascii=False))
+        else:
+            emit(json.dumps(value))
+
+    try:
+        walk(payload)
+    except _BodyLimitReached:
+        return "".join(parts)[:max_size] + "...(truncated)"
+    return "".join(parts)
+
+
+class TraceRingBuffer:
+    """
+    Keeps the most recent trace entries, encoded in UTF-8, up to a total size in bytes
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.size = 0
+        self._entries: Deque[bytes] = collections.deque()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, entry: str) -> None:
+        data = entry.encode("utf-8")[: self.capacity]
+        self._entries.append(data)
+        self.size += len(data)
+        while self.size > self.capacity:
+            self.size -= len(self._entries.popleft())
+
+    def drain(self) -> bytes:
+        """
+        Returns the entries, oldest first and one per line, and empties the buffer
+        """
+        data = b"\n".join(self._entries)
+        self._entries.clear()
+        self.size = 0
+        return data
+
+
+class _TraceFileWriter:
+    """
+    Writes the trace lines to a rotating file from a background thread
+    """
+
+    def __init__(self, path: str, max_file_size: int, backup_count: int) -> None:
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_file_size, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="multilspy-lsp-trace", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            self._handler.emit(logging.makeLogRecord({"msg": line}))
+
+    def write(self, line: str) -> None:
+        self._queue.put(line)
+
+    def close(self) -> None:
+        """
+        Writes the queued lines and closes the file
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._handler.close()
+
+
+def _write_dump(path: str, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+        f.write(b"\n")
+
+
+class LSPTracer:
+    """
+    Traces the messages exchanged with the language server. An instance is passed as the logger of the
+    LanguageServerHandler, which calls it with the source, the target and the payload of each message.
+    """
+
+    # Maximum number of requests whose method is remembered until their response arrives
+    MAX_PENDING_REQUESTS = 10000
+
+    def __init__(self, config: LSPTraceConfig, logger: MultilspyLogger, rng: Union[random.Random, None] = None) -> None:
+        self.config = config
+        self.logger = logger
+        self.rng = rng if rng is not None else random.Random()
+        self.ring_buffer: Union[TraceRingBuffer, None] = None
+        if config.ring_buffer_size > 0:
+            self.ring_buffer = TraceRingBuffer(config.ring_buffer_size)
+        self._writer: Union[_TraceFileWriter, None] = None
+        # (method, sampled) of the requests awaiting a response, by (side which sent the request, request id)
+        self._pending_requests: Dict[Tuple[str, Any], Tuple[str, bool]] = {}
+        self._include_methods = set(config.include_methods) if config.include_methods is not None else None
+        self._exclude_methods = set(config.exclude_methods or [])
+        self._method_sample_rates = config.method_sample_rates or {}
+
+    def start(self) -> None:
+        """
+        Starts the background writer of the trace file, if one is configured
+        """
+        if self._writer is None and self.config.trace_file_path is not None:
+            self._writer = _TraceFileWriter(
+                self.config.trace_file_path, self.config.max_file_size, self.config.backup_count
+            )
+
+    def close(self) -> None:
+        """
+        Flushes and closes the trace file
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._pending_requests.clear()
+
+    def _sample(self, method: str) -> bool:
+        if self._include_methods is not None and method not in self._include_methods:
+            return False
+        if method in self._exclude_methods:
+            return False
+        rate = self._method_sample_rates.get(method, self.config.sample_rate)
+        return rate >= 1.0 or self.rng.random() < rate
+
+    def _remember_request(self, key: Tuple[str, Any], method: str, sampled: bool) -> None:
+        if len(self._pending_requests) >= self.MAX_PENDING_REQUESTS:
+            del self._pending_requests[next(iter(self._pending_requests))]
+        self._pending_requests[key] = (method, sampled)
+
+    def _write(self, line: str) -> None:
+        if self._writer is not None:
+            self._writer.write(line)
+        elif self.logger.is_enabled_for(logging.DEBUG):
+            self.logger.log(line, logging.DEBUG)
+
+    def __call__(self, source: str, target: str, payload: Any) -> None:
+        if not isinstance(payload, dict):
+            # Messages of the handler itself, e.g. the stderr of the server, are always traced
+            line = f"{time.time():.6f} LSP: {source} -> {target}: {str(payload)[: self.config.max_body_size]}"
+            if self.ring_buffer is not None:
+                self.ring_buffer.append(line)
+            self._write(line)
+            return
+
+        method = payload.get("method")
+        request_id = payload.get("id")
+        is_error = False
+        if method is not None:
+            kind = "request" if request_id is not None else "notification"
+            sampled = self._sample(method)
+            if request_id is not None:
+                self._remember_request((source, request_id), method, sampled)
+        else:
+            kind = "response"
+            method, sampled = self._pending_requests.pop((target, request_id), ("", True))
+            error = payload.get("error")
+            is_error = isinstance(error, dict) and error.get("code") not in (
+                LSPErrorCodes.RequestCancelled,
+                LSPErrorCodes.ContentModified,
+            )
+
+        if not sampled and self.ring_buffer is None:
+            return
+        line = (
+            f"{time.time():.6f} LSP: {source} -> {target}: {kind} {method or '-'}"
+            f"{'' if request_id is None else f' id={request_id}'} "
+            f"{render_truncated_json(payload, self.config.max_body_size)}"
+        )
+        if self.ring_buffer is not None:
+            self.ring_buffer.append(line)
+        if sampled or is_error:
+            self._write(line)
+        if is_error and self.ring_buffer is not None:
+            self.dump_ring_buffer()
+
+    def dump_ring_buffer(self) -> None:
+        """
+        Writes the messages kept in the ring buffer to the configured dump file, or to the trace, and empties it
+        """
+        if self.ring_buffer is None or len(self.ring_buffer) == 0:
+            return
+        data = self.ring_buffer.drain()
+        if self.config.ring_buffer_dump_path is not None:
+            # Written from a separate thread so that the event loop is never blocked on the file
+            threading.Thread(
+                target=_write_dump,
+                args=(self.config.ring_buffer_dump_path, data),
+                name="multilspy-lsp-trace-dump",
+                daemon=True,
+            ).start()
+        else:
+            self._write(f"LSP ring buffer dump:\n{data.decode('utf-8', errors='replace')}")
@@ -4,6 +4,7 @@ Configuration parameters for Multilspy.
 import inspect
 from enum import Enum
 from dataclasses import dataclass
+from typing import Dict, List
 
 class Language(str, Enum):
     """
@@ -32,6 +33,19 @@ class JavaServerConfig:
     lombok_jar_path: str
     gradle_path: str
     is_standalone_mode: bool = False
+    # Whether the JDTLS workspace (project import and index) is persisted and reused across server instances
+    # for the same repository and build files, instead of starting from a fresh workspace every time
+    reuse_workspace: bool = False
+    # Maximum number of persisted JDTLS workspaces kept on disk, the least recently used ones being deleted
+    max_cached_workspaces: int = 8
+    # The JVM resource profile used to launch JDTLS: "default", "small-repo", "monorepo", "batch-indexing",
+    # or "auto" to size the heap and pick the garbage collector from the repository size and the memory limit
+    jvm_profile: str = "default"
+    # Number of JDTLS instances expected to share the memory of the machine, used by the "auto" JVM profile
+    jvm_instances_per_host: int = 1
+    # Directory of the JDTLS shared index of the JRE and library jars. None uses the directory of the configured JDTLS
+    # and JRE versions in the global cache, which can be prebuilt with multilspy.language_servers.eclipse_jdtls.shared_index
+    shared_index_path: str = None
 
 
     @classmethod
@@ -46,6 +60,44 @@ class JavaServerConfig:
         return cls(**processed_env)
 
 
+@dataclass
+class LSPTraceConfig:
+    """
+    Configuration parameters for the tracing of the messages exchanged with the language server
+    """
+    # Fraction of the messages traced. A request and its response are sampled together.
+    sample_rate: float = 1.0
+    # Sample rate of the messages of specific methods, overriding sample_rate, e.g. {"textDocument/didOpen": 0.0}
+    method_sample_rates: Dict[str, float] = None
+    # If set, only the messages of these methods are traced
+    include_methods: List[str] = None
+    # The messages of these methods are never traced
+    exclude_methods: List[str] = None
+    # Maximum number of characters of the JSON body of a message kept in the trace, the rest being truncated
+    max_body_size: int = 4096
+    # File the trace is written to, from a background thread. None writes the trace to the MultilspyLogger at DEBUG level.
+    trace_file_path: str = None
+    # Size, in bytes, at which the trace file is rotated, and number of rotated files kept
+    max_file_size: int = 64 * 1024 * 1024
+    backup_count: int = 3
+    # Size, in bytes, of the ring buffer keeping the most recent messages, sampled or not, to be dumped when the server
+    # returns an error. 0 disables the ring buffer.
+    ring_buffer_size: int = 0
+    # File the ring buffer is dumped to. None dumps it to the trace.
+    ring_buffer_dump_path: str = None
+
+    @classmethod
+    def from_dict(cls, env: dict):
+        """
+        Create a LSPTraceConfig instance from a dictionary
+        """
+        processed_env = {}
+        for k, v in env.items():
+            if k in inspect.signature(cls).parameters:
+                processed_env[k] = v
+        return cls(**processed_env)
+
+
 @dataclass
 class MultilspyConfig:
     """
@@ -53,7 +105,31 @@ class MultilspyConfig:
     """
     code_language: Language
     trace_lsp_communication: bool = False
+    # How the messages are traced when trace_lsp_communication is enabled. None uses the defaults of LSPTraceConfig.
+    lsp_trace_config: LSPTraceConfig = None
+    # File the messages exchanged with the language server are recorded to, to be replayed offline by
+    # multilspy.lsp_protocol_handler.replay_server. None disables the recording.
+    lsp_recording_path: str = None
+    # Whether the per method metrics of the messages exchanged with the language server (request counts and latencies,
+    # bytes, encoding and decoding time) are collected, see LanguageServer.lsp_metrics
+    collect_lsp_metrics: bool = False
     java_server_config: JavaServerConfig = None
+    # Maximum number of responses to read-only queries (definition, references, hover, document symbols)
+    # cached by the LanguageServer. 0 disables the cache.
+    response_cache_size: int = 0
+    # Maximum age, in seconds, of a cached response. None means that responses do not expire.
+    response_cache_ttl: float = None
+    # Whether the edits made to an open file are sent to the server as a single textDocument/didChange
+    # notification before the next request on the file, instead of one notification per edit
+    did_change_batching: bool = False
+    # Maximum delay, in seconds, before batched edits are sent to the server even if no request is made on the file.
+    # None means that batched edits are only sent before the next request on the file, or when it is closed.
+    did_change_debounce: float = None
+    # Whether start_server returns as soon as the language server is initialized, instead of once it is fully ready.
+    # Each request then waits for the readiness level it needs, e.g. document symbols do not wait for the workspace import.
+    staged_readiness: bool = False
+    # Maximum number of conversions between file URIs and paths cached by the LanguageServer, in each direction
+    uri_path_cache_size: int = 1 << 16
 
     @classmethod
     def from_dict(cls, env: dict):
@@ -66,6 +142,8 @@ class MultilspyConfig:
                 # Handle the nested JavaServerConfig dictionary
                 if k == "java_server_config" and isinstance(v, dict):
                     processed_env[k] = JavaServerConfig.from_dict(v)
+                elif k == "lsp_trace_config" and isinstance(v, dict):
+                    processed_env[k] = LSPTraceConfig.from_dict(v)
                 else:
                     processed_env[k] = v
         return cls(**processed_env)
\ No newline at end of file
@@ -1,58 +1,129 @@
 """
 Multilspy logger module.
 """
-import inspect
+import json
 import logging
+import logging.handlers
+import queue
+import sys
+import warnings
 from datetime import datetime
-from pydantic import BaseModel
+from typing import List, Union
 
-class LogLine(BaseModel):
+class _LazyLogRecord(logging.LogRecord):
     """
-    Represents a line in the Multilspy log
+    A log record whose message, a line of the Multilspy log, is only built when a handler formats it. A line is a
+    JSON object with the keys time, level, caller_file, caller_name, caller_line and message.
     """
 
-    time: str
-    level: str
-    caller_file: str
-    caller_name: str
-    caller_line: int
-    message: str
+    def __init__(self, name: str, level: int, pathname: str, lineno: int, func: str, debug_message: str) -> None:
+        super().__init__(name, level, pathname, lineno, debug_message, None, None, func)
+        self._log_line: Union[str, None] = None
+
+    def getMessage(self) -> str:
+        if self._log_line is None:
+            self._log_line = json.dumps(
+                {
+                    "time": datetime.fromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S"),
+                    "level": self.levelname,
+                    "caller_file": self.pathname.split("/")[-1],
+                    "caller_name": self.funcName,
+                    "caller_line": self.lineno,
+                    "message": str(self.msg).replace("'", '"').replace("\n", " "),
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        return self._log_line
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the records as they are, so that they are formatted by the handlers of the background thread
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 class MultilspyLogger:
     """
     Logger class
     """
 
-    def __init__(self) -> None:
+    def __init__(self, background: bool = False) -> None:
+        """
+        :param background: Whether the records are formatted and emitted by a background thread, see start_background_logging
+        """
         self.logger = logging.getLogger("multilspy")
         self.logger.setLevel(logging.INFO)
+        self._queue_listener: Union[logging.handlers.QueueListener, None] = None
+        self._queue_handler: Union[_LazyQueueHandler, None] = None
+        self._foreground_handlers: List[logging.Handler] = []
+        self._foreground_propagate = True
+        if background:
+            self.start_background_logging()
+
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Returns whether messages of the given level are logged, so that callers can skip building expensive messages
+        """
+        return self.logger.isEnabledFor(level)
 
     def log(self, debug_message: str, level: int, sanitized_error_message: str = "") -> None:
         """
-        Log the debug and santized messages using the logger
-        """
-
-        debug_message = debug_message.replace("'", '"').replace("\n", " ")
-        sanitized_error_message = sanitized_error_message.replace("'", '"').replace("\n", " ")
-
-        # Collect details about the callee
-        curframe = inspect.currentframe()
-        calframe = inspect.getouterframes(curframe, 2)
-        caller_file = calframe[1][1].split("/")[-1]
-        caller_line = calframe[1][2]
-        caller_name = calframe[1][3]
-
-        # Construct the debug log line
-        debug_log_line = LogLine(
-            time=str(datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-            level=logging.getLevelName(level),
-            caller_file=caller_file,
-            caller_name=caller_name,
-            caller_line=caller_line,
-            message=debug_message,
-        )
-
-        self.logger.log(
-            level=level,
-            msg=debug_log_line.json(),
-        )
+        Log the debug message using the logger. The sanitized_error_message parameter is deprecated and ignored.
+        """
+        if sanitized_error_message:
+            warnings.warn(
+                "The sanitized_error_message parameter of MultilspyLogger.log is deprecated and ignored",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        if not self.logger.isEnabledFor(level):
+            return
+
+        # Collect details about the callee, without materializing the stack
+        caller = sys._getframe(1)
+        code = caller.f_code
+        record = _LazyLogRecord(self.logger.name, level, code.co_filename, caller.f_lineno, code.co_name, debug_message)
+        self.logger.handle(record)
+
+    def start_background_logging(self) -> None:
+        """
+        Moves the handlers which receive the records of the logger, including the handlers of its ancestors, to a
+        background thread. The calling thread then only creates the records and puts them on a queue.
+        """
+        if self._queue_listener is not None:
+            return
+        handlers: List[logging.Handler] = []
+        logger: Union[logging.Logger, None] = self.logger
+        while logger is not None:
+            handlers.extend(logger.handlers)
+            logger = logger.parent if logger.propagate else None
+        if not handlers:
+            handlers = [logging.lastResort]
+
+        self._foreground_handlers = list(self.logger.handlers)
+        self._foreground_propagate = self.logger.propagate
+        record_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._queue_handler = _LazyQueueHandler(record_queue)
+        self._queue_listener = logging.handlers.QueueListener(record_queue, *handlers, respect_handler_level=True)
+        for handler in self._foreground_handlers:
+            self.logger.removeHandler(handler)
+        self.logger.addHandler(self._queue_handler)
+        self.logger.propagate = False
+        self._queue_listener.start()
+
+    def stop_background_logging(self) -> None:
+        """
+        Emits the queued records and restores the handlers moved by start_background_logging
+        """
+        if self._queue_listener is None:
+            return
+        self._queue_listener.stop()
+        self.logger.removeHandler(self._queue_handler)
+        for handler in self._foreground_handlers:
+            self.logger.addHandler(handler)
+        self.logger.propagate = self._foreground_propagate
+        self._queue_listener = None
+        self._queue_handler = None
+        self._foreground_handlers = []
@@ -301,4 +301,32 @@ class CallHierarchyItem(TypedDict):
     inside the symbol to reveal in the symbol in the UI. """
     selectionRange: Range
     """ The range that should be selected and revealed when this symbol is being picked, e.g the name of a function.
-    Must be contained by the `range`. """
\ No newline at end of file
+    Must be contained by the `range`. """
+
+
+class DiagnosticSeverity(IntEnum):
+    """The diagnostic's severity."""
+
+    Error = 1
+    """ Reports an error. """
+    Warning = 2
+    """ Reports a warning. """
+    Information = 3
+    """ Reports an information. """
+    Hint = 4
+    """ Reports a hint. """
+
+
+class Diagnostic(TypedDict):
+    """Represents a diagnostic, such as a compiler error or warning."""
+
+    range: Range
+    """ The range at which the message applies """
+    severity: NotRequired[DiagnosticSeverity]
+    """ The diagnostic's severity. If omitted it is up to the client to interpret diagnostics as error, warning, info or hint. """
+    code: NotRequired[Union[int, str]]
+    """ The diagnostic's code, which usually appear in the user interface. """
+    source: NotRequired[str]
+    """ A human-readable string describing the source of this diagnostic, e.g. 'Java'. """
+    message: str
+    """ The diagnostic's message. """
@@ -2,10 +2,14 @@
 This file contains various utility functions like I/O operations, handling paths, etc.
 """
 
+import bisect
 import gzip
 import logging
 import os
-from typing import Tuple
+import re
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlparse, unquote
+from urllib.request import url2pathname
 import requests
 import shutil
 import uuid
@@ -18,6 +22,11 @@ from multilspy.multilspy_exceptions import MultilspyException
 from pathlib import PurePath, Path
 from multilspy.multilspy_logger import MultilspyLogger
 
+# Directories skipped when walking a repository: version control metadata, IDE settings, dependencies and build outputs
+IGNORED_DIR_NAMES = {
+    ".git", ".hg", ".svn", ".idea", ".vscode", ".gradle", "node_modules", "__pycache__", "target", "build", "out",
+}
+
 class TextUtils:
     """
     Utilities for text operations.
@@ -27,17 +36,8 @@ class TextUtils:
         """
         Returns the zero-indexed line and column number of the given index in the given text
         """
-        l = 0
-        c = 0
-        idx = 0
-        while idx < index:
-            if text[idx] == '\n':
-                l += 1
-                c = 0
-            else:
-                c += 1
-            idx += 1
-
+        l = text.count("\n", 0, index)
+        c = index - (text.rfind("\n", 0, index) + 1)
         return l, c
     
     @staticmethod
@@ -47,10 +47,10 @@ class TextUtils:
         """
         idx = 0
         while line > 0:
-            assert idx < len(text), (idx, len(text), text)
-            if text[idx] == "\n":
-                line -= 1
-            idx += 1
+            newline_idx = text.find("\n", idx)
+            assert newline_idx != -1, (idx, len(text), text)
+            idx = newline_idx + 1
+            line -= 1
         idx += col
         return idx
     
@@ -67,6 +67,217 @@ class TextUtils:
             c += len(text_to_be_inserted)
         return (l, c)
 
+class LineIndex:
+    """
+    Maintains the offsets at which the lines of a text start, so that conversions between
+    (line, column) positions and offsets take O(log n) instead of a scan of the text.
+
+    The index is updated incrementally as the text is edited. To keep consecutive edits on the same
+    line cheap, the shift of the lines following the most recently edited line is recorded lazily
+    as a pending delta, and only applied to the offsets when an edit happens on another line.
+    """
+
+    def __init__(self, text: str) -> None:
+        starts = [0]
+        idx = text.find("\n")
+        while idx != -1:
+            starts.append(idx + 1)
+            idx = text.find("\n", idx + 1)
+        self._starts: List[int] = starts
+        # The actual start of line i is self._starts[i] + self._delta for i > self._dirty_line
+        self._dirty_line = 0
+        self._delta = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of lines in the text
+        """
+        return len(self._starts)
+
+    def _flush(self) -> None:
+        if self._delta != 0:
+            starts, delta, boundary = self._starts, self._delta, self._dirty_line + 1
+            starts[boundary:] = [start + delta for start in starts[boundary:]]
+            self._delta = 0
+
+    def line_start(self, line: int) -> int:
+        """
+        Returns the offset at which the given zero-indexed line starts
+        """
+        if line > self._dirty_line:
+            return self._starts[line] + self._delta
+        return self._starts[line]
+
+    def get_index_from_line_col(self, line: int, col: int) -> int:
+        """
+        Returns the index of the given zero-indexed line and column number in the text
+        """
+        assert 0 <= line < len(self._starts), (line, len(self._starts))
+        return self.line_start(line) + col
+
+    def get_line_col_from_index(self, index: int) -> Tuple[int, int]:
+        """
+        Returns the zero-indexed line and column number of the given index in the text
+        """
+        starts, boundary = self._starts, self._dirty_line + 1
+        if self._delta == 0 or boundary >= len(starts) or index < starts[boundary] + self._delta:
+            line = bisect.bisect_right(starts, index, 0, boundary if self._delta != 0 else len(starts)) - 1
+        else:
+            line = bisect.bisect_right(starts, index - self._delta, boundary) - 1
+        return line, index - self.line_start(line)
+
+    def insert(self, index: int, text: str) -> None:
+        """
+        Updates the index for the insertion of the given text at the given offset
+        """
+        line, _ = self.get_line_col_from_index(index)
+        if self._delta != 0 and line != self._dirty_line:
+            self._flush()
+        new_starts = []
+        idx = text.find("\n")
+        while idx != -1:
+            new_starts.append(index + idx + 1)
+            idx = text.find("\n", idx + 1)
+        if new_starts:
+            self._starts[line + 1 : line + 1] = new_starts
+        self._dirty_line = line + len(new_starts)
+        self._delta += len(text)
+
+    def delete(self, start: int, end: int) -> None:
+        """
+        Updates the index for the deletion of the text between the given offsets
+        """
+        start_line, _ = self.get_line_col_from_index(start)
+        end_line, _ = self.get_line_col_from_index(end)
+        if self._delta != 0 and start_line != self._dirty_line:
+            self._flush()
+        del self._starts[start_line + 1 : end_line + 1]
+        self._dirty_line = start_line
+        self._delta -= end - start
+
+class TextRope:
+    """
+    Stores a text as a sequence of bounded-size chunks, so that insertions and deletions only copy
+    the chunks they touch instead of the whole text.
+
+    The lengths of the chunks are kept in a Fenwick tree, so that locating the chunk containing an
+    offset and updating the length of a chunk take O(log n). Chunks are split when they grow beyond
+    twice CHUNK_SIZE, which keeps the cost of every edit bounded regardless of the size of the text.
+    """
+
+    CHUNK_SIZE = 2048
+
+    def __init__(self, text: str = "") -> None:
+        size = self.CHUNK_SIZE
+        self._chunks: List[str] = [text[i : i + size] for i in range(0, len(text), size)] or [""]
+        self._length = len(text)
+        self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return "".join(self._chunks)
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] * (len(self._chunks) + 1)
+        for i, chunk in enumerate(self._chunks, 1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top_bit = 1 << (len(self._chunks).bit_length() - 1)
+
+    def _add_length(self, chunk_idx: int, delta: int) -> None:
+        tree = self._tree
+        i = chunk_idx + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """
+        Returns the index of the chunk containing the given offset, and the offset within that chunk.
+        The end of the text is located at the end of the last chunk.
+        """
+        assert 0 <= index <= self._length, (index, self._length)
+        if index == self._length:
+            return len(self._chunks) - 1, len(self._chunks[-1])
+        tree = self._tree
+        pos = 0
+        remaining = index
+        bit = self._top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt < len(tree) and tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= tree[nxt]
+            bit >>= 1
+        return pos, remaining
+
+    def _replace_chunks(self, start_chunk: int, end_chunk: int, text: str) -> None:
+        size = self.CHUNK_SIZE
+        pieces = [text[i : i + size] for i in range(0, len(text), size)]
+        self._chunks[start_chunk:end_chunk] = pieces
+        if not self._chunks:
+            self._chunks.append("")
+        self._rebuild_tree()
+
+    def insert(self, index: int, text: str) -> None:
+        """
+        Inserts the given text at the given offset
+        """
+        chunk_idx, offset = self._locate(index)
+        chunk = self._chunks[chunk_idx]
+        new_chunk = chunk[:offset] + text + chunk[offset:]
+        self._length += len(text)
+        if len(new_chunk) <= 2 * self.CHUNK_SIZE:
+            self._chunks[chunk_idx] = new_chunk
+            self._add_length(chunk_idx, len(text))
+        else:
+            self._replace_chunks(chunk_idx, chunk_idx + 1, new_chunk)
+
+    def delete(self, start: int, end: int) -> str:
+        """
+        Deletes the text between the given offsets and returns it
+        """
+        assert start <= end, (start, end)
+        if start == end:
+            return ""
+        start_chunk, start_offset = self._locate(start)
+        end_chunk, end_offset = self._locate(end)
+        self._length -= end - start
+        if start_chunk == end_chunk:
+            chunk = self._chunks[start_chunk]
+            self._chunks[start_chunk] = chunk[:start_offset] + chunk[end_offset:]
+            self._add_length(start_chunk, start - end)
+            return chunk[start_offset:end_offset]
+        deleted = "".join(
+            [self._chunks[start_chunk][start_offset:]]
+            + self._chunks[start_chunk + 1 : end_chunk]
+            + [self._chunks[end_chunk][:end_offset]]
+        )
+        remaining = self._chunks[start_chunk][:start_offset] + self._chunks[end_chunk][end_offset:]
+        self._replace_chunks(start_chunk, end_chunk + 1, remaining)
+        return deleted
+
+    def slice(self, start: int, end: int) -> str:
+        """
+        Returns the text between the given offsets
+        """
+        if start >= end:
+            return ""
+        start_chunk, start_offset = self._locate(start)
+        end_chunk, end_offset = self._locate(end)
+        if start_chunk == end_chunk:
+            return self._chunks[start_chunk][start_offset:end_offset]
+        return "".join(
+            [self._chunks[start_chunk][start_offset:]]
+            + self._chunks[start_chunk + 1 : end_chunk]
+            + [self._chunks[end_chunk][:end_offset]]
+        )
+
 class PathUtils:
     """
     Utilities for platform-agnostic path operations.
@@ -78,17 +289,83 @@ class PathUtils:
 
         This method was obtained from https://stackoverflow.com/a/61922504
         """
-        try:
-            from urllib.parse import urlparse, unquote
-            from urllib.request import url2pathname
-        except ImportError:
-            # backwards compatability
-            from urlparse import urlparse
-            from urllib import unquote, url2pathname
         parsed = urlparse(uri)
         host = "{0}{0}{mnt}{0}".format(os.path.sep, mnt=parsed.netloc)
         return os.path.normpath(os.path.join(host, url2pathname(unquote(parsed.path))))
 
+
+class UriPathCache:
+    """
+    A bounded, bidirectional cache of the conversions between the URIs and the paths of the files of a repository.
+
+    The URI of the repository root is computed once. The files under the root whose path needs no escaping in a URI,
+    which are the vast majority, are converted by concatenation with it, and the others with pathlib and urllib.
+    Each conversion is cached in both directions, and the oldest entries are dropped beyond max_size.
+    """
+
+    # Relative paths whose URI is the URI of the root followed by the path itself
+    _URI_SAFE_PATH = re.compile(r"[A-Za-z0-9_.~/-]*\Z")
+
+    def __init__(self, repository_root_path: str, max_size: int = 1 << 16) -> None:
+        self.repository_root_path = repository_root_path
+        self.max_size = max_size
+        self.root_uri = Path(repository_root_path).as_uri().rstrip("/") + "/"
+        self._uri_by_relative_path: Dict[str, str] = {}
+        # (absolute path, path relative to the repository root) by URI
+        self._paths_by_uri: Dict[str, Tuple[str, str]] = {}
+
+    def _put(self, uri: str, absolute_path: Union[str, None], relative_path: str) -> None:
+        for cache in (self._uri_by_relative_path, self._paths_by_uri):
+            if len(cache) >= self.max_size:
+                del cache[next(iter(cache))]
+        self._uri_by_relative_path[relative_path] = uri
+        if absolute_path is not None:
+            self._paths_by_uri[uri] = (absolute_path, str(PurePath(relative_path)))
+
+    def uri_for_relative_path(self, relative_file_path: str) -> str:
+        """
+        Returns the URI of the file at the given path, relative to the repository root
+        """
+        uri = self._uri_by_relative_path.get(relative_file_path)
+        if uri is not None:
+            return uri
+        pure_path = PurePath(relative_file_path)
+        posix_path = pure_path.as_posix()
+        if (
+            not pure_path.is_absolute()
+            and self._URI_SAFE_PATH.match(posix_path)
+            and pure_path.parts
+            and ".." not in pure_path.parts
+        ):
+            uri = self.root_uri + posix_path
+            self._put(uri, os.path.join(self.repository_root_path, str(pure_path)), relative_file_path)
+        else:
+            # Only cached by relative path, as the path may not be normalized
+            uri = Path(str(PurePath(self.repository_root_path, relative_file_path))).as_uri()
+            self._put(uri, None, relative_file_path)
+        return uri
+
+    def paths_for_uri(self, uri: str) -> Tuple[str, str]:
+        """
+        Returns the absolute path of the file with the given URI, and its path relative to the repository root
+        """
+        paths = self._paths_by_uri.get(uri)
+        if paths is not None:
+            return paths
+        relative_posix_path = uri[len(self.root_uri) :] if uri.startswith(self.root_uri) else None
+        if (
+            relative_posix_path
+            and "%" not in relative_posix_path
+            and not any(part in (".", "..", "") for part in relative_posix_path.split("/"))
+        ):
+            relative_path = str(PurePath(relative_posix_path))
+            absolute_path = os.path.normpath(os.path.join(self.repository_root_path, relative_path))
+        else:
+            absolute_path = PathUtils.uri_to_path(uri)
+            relative_path = str(PurePath(os.path.relpath(absolute_path, self.repository_root_path)))
+        self._put(uri, absolute_path, relative_path)
+        return absolute_path, relative_path
+
 class FileUtils:
     """
     Utility functions for file operations.
@@ -113,6 +390,21 @@ class FileUtils:
         logger.log(f"File read '{file_path}' failed: Unsupported encoding.", logging.ERROR)
         raise MultilspyException(f"File read '{file_path}' failed: Unsupported encoding.") from None
     
+
+    @staticmethod
+    def list_source_files(root_path: str, extensions: Tuple[str, ...]) -> List[str]:
+        """
+        Returns the paths, relative to root_path, of the files with the given extensions under root_path, in sorted order
+        """
+        relative_file_paths = []
+        for dir_path, dir_names, file_names in os.walk(root_path):
+            dir_names[:] = sorted(d for d in dir_names if d not in IGNORED_DIR_NAMES)
+            relative_dir_path = os.path.relpath(dir_path, root_path)
+            for file_name in sorted(file_names):
+                if file_name.endswith(extensions):
+                    relative_file_paths.append(str(PurePath(relative_dir_path, file_name)))
+        return relative_file_paths
+
     @staticmethod
     def download_file(logger: MultilspyLogger, url: str, target_path: str) -> None:
         """
@@ -0,0 +1,204 @@
+"""
+This module provides the tracking of the work done progress ($/progress) and status notifications sent by a language
+server, to report what the server is busy with and to attribute the latency of its startup.
+"""
+
+import dataclasses
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Union
+
+
+@dataclasses.dataclass
+class ProgressTask:
+    """
+    A work done progress reported by the language server, from its begin to its end notification
+    """
+
+    # The progress token chosen by the server
+    token: Union[int, str]
+
+    # The title of the task, e.g. "Importing Maven project(s)"
+    title: str
+
+    # Time of the begin notification, in seconds since the tracker was started
+    begin_time: float
+
+    # The last message reported for the task
+    message: Union[str, None] = None
+
+    # The last percentage reported for the task, if the server reports one
+    percentage: Union[int, None] = None
+
+    # Number of report notifications received for the task
+    report_count: int = 0
+
+    # Time of the end notification, in seconds since the tracker was started. None while the task is active.
+    end_time: Union[float, None] = None
+
+    @property
+    def duration(self) -> Union[float, None]:
+        return None if self.end_time is None else self.end_time - self.begin_time
+
+
+@dataclasses.dataclass
+class StatusEvent:
+    """
+    A status notification (e.g. language/status) reported by the language server
+    """
+
+    # Time of the notification, in seconds since the tracker was started
+    time: float
+
+    # The kind of status, e.g. "Starting", "ProjectStatus" or "ServiceReady"
+    type: str
+
+    # The message of the status
+    message: str
+
+
+@dataclasses.dataclass
+class ActiveTaskSnapshot:
+    """
+    The state of an active task at the time of a snapshot
+    """
+
+    token: Union[int, str]
+    title: str
+    message: Union[str, None]
+    percentage: Union[int, None]
+    # Seconds since the task began
+    elapsed: float
+
+
+@dataclasses.dataclass
+class ProgressSnapshot:
+    """
+    What the language server is busy with at the time of the snapshot
+    """
+
+    # Seconds since the tracker was started
+    elapsed: float
+
+    # The tasks which have begun but not ended, oldest first
+    active_tasks: List[ActiveTaskSnapshot]
+
+    # Number of tasks which have ended
+    completed_task_count: int
+
+    # The last status reported by the server
+    last_status: Union[StatusEvent, None]
+
+
+class ProgressTracker:
+    """
+    Records the begin, report and end notifications of each work done progress token, and the status notifications
+    of the language server, relative to the time the tracker was started.
+
+    Only the active tasks and the most recent events are kept, along with the total time spent per task title, so
+    that the memory used by a long running server does not grow with the number of notifications it sends.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_timeline_events: int = 1000) -> None:
+        """
+        :param clock: The clock the times are measured with.
+        :param max_timeline_events: The maximum number of task begins and statuses kept for the timeline report.
+        """
+        assert max_timeline_events > 0
+        self.clock = clock
+        self.max_timeline_events = max_timeline_events
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets all the recorded notifications and restarts the clock
+        """
+        self.start_time = self.clock()
+        # The most recent tasks, by begin time, and statuses
+        self.timeline: Deque[Union[ProgressTask, StatusEvent]] = deque(maxlen=self.max_timeline_events)
+        # Number of events which have been dropped from the timeline
+        self.dropped_timeline_events = 0
+        self.last_status: Union[StatusEvent, None] = None
+        self.completed_task_count = 0
+        # Total duration of the completed tasks, per title
+        self.total_time_per_title: Dict[str, float] = {}
+        self._active: Dict[Union[int, str], ProgressTask] = {}
+
+    def _elapsed(self) -> float:
+        return self.clock() - self.start_time
+
+    def _add_to_timeline(self, event: Union[ProgressTask, StatusEvent]) -> None:
+        if len(self.timeline) == self.timeline.maxlen:
+            self.dropped_timeline_events += 1
+        self.timeline.append(event)
+
+    def handle_progress(self, params: Dict[str, Any]) -> Union[ProgressTask, None]:
+        """
+        Records a $/progress notification. Returns the task it refers to, or None for notifications which are not
+        work done progress or refer to an unknown token.
+        """
+        token = params["token"]
+        value = params.get("value")
+        if not isinstance(value, dict) or "kind" not in value:
+            return None
+        if value["kind"] == "begin":
+            task = ProgressTask(token, value.get("title", ""), self._elapsed(), value.get("message"), value.get("percentage"))
+            self._add_to_timeline(task)
+            self._active[token] = task
+            return task
+        task = self._active.get(token)
+        if task is None:
+            return None
+        if "message" in value:
+            task.message = value["message"]
+        if "percentage" in value:
+            task.percentage = value["percentage"]
+        if value["kind"] == "report":
+            task.report_count += 1
+        elif value["kind"] == "end":
+            task.end_time = self._elapsed()
+            del self._active[token]
+            self.completed_task_count += 1
+            self.total_time_per_title[task.title] = self.total_time_per_title.get(task.title, 0.0) + task.duration
+        return task
+
+    def handle_status(self, status_type: str, message: str) -> StatusEvent:
+        """
+        Records a status notification
+        """
+        event = StatusEvent(self._elapsed(), status_type, message)
+        self._add_to_timeline(event)
+        self.last_status = event
+        return event
+
+    def snapshot(self) -> ProgressSnapshot:
+        """
+        Returns the tasks the language server is busy with
+        """
+        now = self._elapsed()
+        active_tasks = [
+            ActiveTaskSnapshot(task.token, task.title, task.message, task.percentage, now - task.begin_time)
+            for task in list(self._active.values())
+        ]
+        return ProgressSnapshot(now, active_tasks, self.completed_task_count, self.last_status)
+
+    def timeline_report(self) -> str:
+        """
+        Returns a human readable timeline of the most recent tasks and statuses, followed by the total time spent
+        per task title, longest first
+        """
+        lines = [f"Timeline over {self._elapsed():.2f}s:"]
+        if self.dropped_timeline_events:
+            lines.append(f"  ({self.dropped_timeline_events} earlier events dropped)")
+        for event in self.timeline:
+            if isinstance(event, StatusEvent):
+                lines.append(f"  +{event.time:8.2f}s {'':>9}  [{event.type}] {event.message}")
+            else:
+                duration = "running" if event.duration is None else f"{event.duration:.2f}s"
+                lines.append(f"  +{event.begin_time:8.2f}s {duration:>9}  {event.title}")
+
+        if self.total_time_per_title:
+            lines.append("Time per task:")
+            for title, total in sorted(self.total_time_per_title.items(), key=lambda item: -item[1]):
+                lines.append(f"  {total:9.2f}s  {title}")
+        return "\n".join(lines)
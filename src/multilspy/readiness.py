@@ -0,0 +1,142 @@
+"""
+This module provides the staged readiness model of a LanguageServer, which lets requests be served as soon as
+the language server is able to answer them, instead of only once it is fully ready.
+"""
+
+import asyncio
+import functools
+import inspect
+from enum import IntEnum
+from typing import Callable, Dict, List
+
+from .multilspy_exceptions import MultilspyException
+
+
+class ReadinessLevel(IntEnum):
+    """
+    The stages a language server goes through while starting, each one allowing more requests to be served
+    """
+
+    # The language server process has not been started
+    NOT_STARTED = 0
+
+    # The initialize handshake is done. Requests about the contents of a single open file (document symbols, hover)
+    # can be served.
+    INITIALIZED = 1
+
+    # The projects of the workspace have been imported. Requests resolving symbols (definition) can be served.
+    PROJECTS_IMPORTED = 2
+
+    # The workspace has been fully built and indexed. Workspace wide requests (references, completions, call
+    # hierarchy) can be served.
+    SERVICE_READY = 3
+
+
+class ServerReadiness:
+    """
+    Tracks the readiness level and the startup milestones reported by a language server, and lets them be awaited.
+
+    Milestones are named after the notifications reporting them, e.g. "language/status:ServiceReady" or
+    "$/progress:Importing Maven project(s)". The events are only created when awaited, so that they are bound to the
+    event loop of the waiter. When the server stops, reset wakes the pending waiters, which raise a MultilspyException.
+    """
+
+    def __init__(self) -> None:
+        self.level = ReadinessLevel.NOT_STARTED
+        self.milestones: List[str] = []
+        # Incremented by reset, so that woken waiters can tell that the server stopped
+        self._generation = 0
+        self._level_waiters: Dict[ReadinessLevel, asyncio.Event] = {}
+        self._milestone_waiters: Dict[str, asyncio.Event] = {}
+
+    def set_level(self, level: ReadinessLevel) -> None:
+        """
+        Raises the readiness level to the given level. Levels are never lowered, except by reset.
+        """
+        if level <= self.level:
+            return
+        self.level = level
+        for waited_level, event in list(self._level_waiters.items()):
+            if waited_level <= level:
+                event.set()
+                del self._level_waiters[waited_level]
+
+    def mark_milestone(self, name: str) -> None:
+        """
+        Records that the given milestone has been reached
+        """
+        if name not in self.milestones:
+            self.milestones.append(name)
+        event = self._milestone_waiters.pop(name, None)
+        if event is not None:
+            event.set()
+
+    def reset(self) -> None:
+        """
+        Goes back to NOT_STARTED, forgetting the milestones reached. The pending waiters are woken up and raise a
+        MultilspyException, and their events, which are bound to the event loop of the stopped server, are dropped.
+        """
+        self.level = ReadinessLevel.NOT_STARTED
+        self.milestones = []
+        self._generation += 1
+        for event in [*self._level_waiters.values(), *self._milestone_waiters.values()]:
+            event.set()
+        self._level_waiters.clear()
+        self._milestone_waiters.clear()
+
+    async def _wait(self, event: asyncio.Event, waited: str) -> None:
+        generation = self._generation
+        await event.wait()
+        if generation != self._generation:
+            raise MultilspyException(f"Language Server stopped while waiting for {waited}")
+
+    async def wait_for_level(self, level: ReadinessLevel) -> None:
+        """
+        Waits until the readiness level is at least the given level
+        """
+        if self.level >= level:
+            return
+        if level not in self._level_waiters:
+            self._level_waiters[level] = asyncio.Event()
+        await self._wait(self._level_waiters[level], f"readiness level {level.name}")
+
+    async def wait_for_milestone(self, name: str) -> None:
+        """
+        Waits until the given milestone has been reached
+        """
+        if name in self.milestones:
+            return
+        if name not in self._milestone_waiters:
+            self._milestone_waiters[name] = asyncio.Event()
+        await self._wait(self._milestone_waiters[name], f"milestone {name}")
+
+
+def requires_readiness(level: ReadinessLevel) -> Callable:
+    """
+    Declares the minimum readiness level needed by a LanguageServer request method. Once the server is started,
+    calls to the method wait until the level is reached. The level is available as the required_readiness attribute
+    of the method.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(self, *args, **kwargs):
+                if self.server_started:
+                    await self.readiness.wait_for_level(level)
+                async for item in fn(self, *args, **kwargs):
+                    yield item
+
+        else:
+
+            @functools.wraps(fn)
+            async def wrapper(self, *args, **kwargs):
+                if self.server_started:
+                    await self.readiness.wait_for_level(level)
+                return await fn(self, *args, **kwargs)
+
+        wrapper.required_readiness = level
+        return wrapper
+
+    return decorator
@@ -0,0 +1,92 @@
+"""
+This module provides the cache used by LanguageServer for the responses to read-only LSP queries.
+"""
+
+import dataclasses
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+@dataclasses.dataclass
+class ResponseCacheStats:
+    """
+    Counters describing the effectiveness of a ResponseCache
+    """
+
+    # Number of lookups that returned a cached response
+    hits: int = 0
+
+    # Number of lookups that did not find a (fresh) cached response
+    misses: int = 0
+
+    # Number of responses dropped because the cache was full
+    evictions: int = 0
+
+    # Number of responses dropped because they outlived the TTL
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    A LRU cache of responses to LSP queries, bounded in size and optionally in the age of its entries.
+
+    Keys are expected to contain everything the response depends on (e.g. the document version and the
+    workspace generation), so that stale responses are never looked up again and simply age out of the cache.
+    Responses are stored and returned as is, without copying, so they are shared by all the lookups of a key and must
+    not be mutated: callers cache an immutable form of the response (e.g. a LocationList) and build the mutable values
+    they hand out from it.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        """
+        :param max_size: The maximum number of responses to keep.
+        :param ttl: The maximum age, in seconds, of a response returned from the cache. None means no limit.
+        """
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = ResponseCacheStats()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Returns (True, response) if a fresh response is cached for the given key, and (False, None) otherwise
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return False, None
+        stored_at, response = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return True, response
+
+    def put(self, key: Hashable, response: Any) -> None:
+        """
+        Caches the given response for the given key, evicting the least recently used response if the cache is full
+        """
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops all the cached responses
+        """
+        self._entries.clear()
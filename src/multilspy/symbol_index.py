@@ -0,0 +1,110 @@
+"""
+This module provides a client-side index of the symbols of a workspace, answering workspace symbol queries without
+a round trip to the language server.
+"""
+
+from typing import Dict, Iterable, List, Set, Union
+
+from . import multilspy_types
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolIndex:
+    """
+    An index of symbol names, stored as trigram posting lists, supporting case insensitive substring queries.
+
+    Symbols are indexed per file, so that the symbols of a changed file can be replaced without rebuilding the
+    index. Files can be marked as stale, to be re-indexed by the owner of the index before the next query.
+    """
+
+    def __init__(self) -> None:
+        # Indexed symbols by id. The ids of removed symbols are reused.
+        self._symbols: List[Union[multilspy_types.UnifiedSymbolInformation, None]] = []
+        self._names: List[str] = []
+        self._free_ids: List[int] = []
+        self._ids_by_file: Dict[str, List[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # Files whose symbols may be out of date
+        self.stale_files: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._symbols) - len(self._free_ids)
+
+    @property
+    def files(self) -> List[str]:
+        return list(self._ids_by_file)
+
+    def set_file_symbols(
+        self, relative_file_path: str, symbols: Iterable[multilspy_types.UnifiedSymbolInformation]
+    ) -> None:
+        """
+        Replaces the symbols of the given file
+        """
+        self.remove_file(relative_file_path)
+        ids = []
+        for symbol in symbols:
+            name = symbol["name"].lower()
+            if self._free_ids:
+                symbol_id = self._free_ids.pop()
+                self._symbols[symbol_id] = symbol
+                self._names[symbol_id] = name
+            else:
+                symbol_id = len(self._symbols)
+                self._symbols.append(symbol)
+                self._names.append(name)
+            for trigram in _trigrams(name):
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    self._postings[trigram] = posting = set()
+                posting.add(symbol_id)
+            ids.append(symbol_id)
+        self._ids_by_file[relative_file_path] = ids
+
+    def remove_file(self, relative_file_path: str) -> None:
+        """
+        Removes the symbols of the given file
+        """
+        self.stale_files.discard(relative_file_path)
+        for symbol_id in self._ids_by_file.pop(relative_file_path, []):
+            for trigram in _trigrams(self._names[symbol_id]):
+                posting = self._postings[trigram]
+                posting.discard(symbol_id)
+                if not posting:
+                    del self._postings[trigram]
+            self._symbols[symbol_id] = None
+            self._names[symbol_id] = ""
+            self._free_ids.append(symbol_id)
+
+    def mark_stale(self, relative_file_path: str) -> None:
+        """
+        Records that the symbols of the given file may be out of date
+        """
+        self.stale_files.add(relative_file_path)
+
+    def search(self, query: str, limit: Union[int, None] = None) -> List[multilspy_types.UnifiedSymbolInformation]:
+        """
+        Returns the symbols whose name contains the query, ignoring case. Exact matches come first, then prefix
+        matches, then the other matches, shorter names first.
+        """
+        query = query.lower()
+        if len(query) < 3:
+            candidates: Iterable[int] = (i for i, symbol in enumerate(self._symbols) if symbol is not None)
+        else:
+            postings = sorted((self._postings.get(trigram, set()) for trigram in _trigrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings[0] else set()
+
+        matches = []
+        for symbol_id in candidates:
+            name = self._names[symbol_id]
+            position = name.find(query)
+            if position < 0:
+                continue
+            rank = 0 if name == query else 1 if position == 0 else 2
+            matches.append((rank, len(name), symbol_id))
+        matches.sort()
+        if limit is not None:
+            matches = matches[:limit]
+        return [self._symbols[symbol_id] for _, _, symbol_id in matches]
@@ -0,0 +1,98 @@
+"""
+This module provides the compact representation of the hierarchy of the symbols of a document.
+"""
+
+from typing import Any, Dict, Iterator, List, Union
+
+from . import multilspy_types
+
+
+class SymbolTree:
+    """
+    The symbols of a document in preorder, along with the index of the parent of each symbol (-1 for the top level
+    symbols). The flat view is the list of symbols itself, and the tree view is derived from the parent indices,
+    so that no symbol is stored twice.
+    """
+
+    __slots__ = ("symbols", "parents", "_children")
+
+    def __init__(self, symbols: List[multilspy_types.UnifiedSymbolInformation], parents: List[int]) -> None:
+        assert len(symbols) == len(parents)
+        self.symbols = symbols
+        self.parents = parents
+        self._children: Union[List[List[int]], None] = None
+
+    @classmethod
+    def from_document_symbols(cls, items: List[Dict[str, Any]]) -> "SymbolTree":
+        """
+        Builds the tree of the symbols returned by a textDocument/documentSymbol request, either hierarchical
+        DocumentSymbols or flat SymbolInformations. The items are not modified.
+        """
+        symbols: List[multilspy_types.UnifiedSymbolInformation] = []
+        parents: List[int] = []
+        # Explicit stack of (item, parent index), so that deeply nested symbols do not hit the recursion limit
+        stack = [(item, -1) for item in reversed(items)]
+        while stack:
+            item, parent = stack.pop()
+            index = len(symbols)
+            symbols.append(
+                multilspy_types.UnifiedSymbolInformation(**{k: v for k, v in item.items() if k != "children"})
+            )
+            parents.append(parent)
+            children = item.get("children")
+            if children:
+                stack.extend((child, index) for child in reversed(children))
+        return cls(symbols, parents)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __getstate__(self):
+        return self.symbols, self.parents
+
+    def __setstate__(self, state) -> None:
+        self.symbols, self.parents = state
+        self._children = None
+
+    @property
+    def is_hierarchical(self) -> bool:
+        return any(parent != -1 for parent in self.parents)
+
+    def roots(self) -> List[int]:
+        """
+        Returns the indices of the top level symbols
+        """
+        return [index for index, parent in enumerate(self.parents) if parent == -1]
+
+    def children(self, index: int) -> List[int]:
+        """
+        Returns the indices of the children of the symbol at the given index, in document order
+        """
+        if self._children is None:
+            self._children = [[] for _ in self.parents]
+            for child, parent in enumerate(self.parents):
+                if parent != -1:
+                    self._children[parent].append(child)
+        return self._children[index]
+
+    def ancestors(self, index: int) -> Iterator[int]:
+        """
+        Yields the indices of the ancestors of the symbol at the given index, innermost first
+        """
+        parent = self.parents[index]
+        while parent != -1:
+            yield parent
+            parent = self.parents[parent]
+
+    def to_tree_repr(self) -> List[multilspy_types.TreeRepr]:
+        """
+        Returns the tree as nested TreeReprs, mapping the index of each top level symbol to the TreeReprs of its children
+        """
+        reprs: List[multilspy_types.TreeRepr] = [{index: []} for index in range(len(self.parents))]
+        roots = []
+        for index, parent in enumerate(self.parents):
+            if parent == -1:
+                roots.append(reprs[index])
+            else:
+                reprs[parent][parent].append(reprs[index])
+        return roots
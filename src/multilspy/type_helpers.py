@@ -13,10 +13,13 @@ def ensure_all_methods_implemented(
 ) -> Callable[[Type[R]], Type[R]]:
     """
     A decorator to ensure that all methods of source_cls class are implemented in the decorated class.
+    Private helper methods (with a single leading underscore) are not part of the interface and are skipped.
     """
 
     def check_all_methods_implemented(target_cls: R) -> R:
         for name, _ in inspect.getmembers(source_cls, inspect.isfunction):
+            if name.startswith("_") and not name.startswith("__"):
+                continue
             if name not in target_cls.__dict__ or not callable(target_cls.__dict__[name]):
                 raise NotImplementedError(f"{name} is not implemented in {target_cls}")
 
@@ -0,0 +1,58 @@
+"""
+Benchmarks edits to the buffer of an open file.
+
+Appends 20k generated tokens to a multi-megabyte file, as done by a decoder that generates code one token
+at a time, comparing the rebuilding of a plain string on every edit (as done before the introduction of
+TextRope) with LSPFileBuffer. Reports the time taken and the peak memory allocated during the edits.
+
+Usage:
+    PYTHONPATH=src python -m tests.benchmarks.bench_file_buffer
+"""
+
+import time
+import tracemalloc
+
+from multilspy.language_server import LSPFileBuffer
+
+NUM_TOKENS = 20_000
+TOKENS = ["public", " ", "int", " ", "value", " = ", "compute", "(", "x", ");", "\n    "]
+
+
+def initial_contents() -> str:
+    return "".join(f"    int generated{i} = compute({i});\n" for i in range(100_000))
+
+
+def append_to_str(contents: str) -> str:
+    for i in range(NUM_TOKENS):
+        index = len(contents)
+        contents = contents[:index] + TOKENS[i % len(TOKENS)] + contents[index:]
+    return contents
+
+
+def append_to_buffer(contents: str) -> str:
+    file_buffer = LSPFileBuffer("file:///Generated.java", contents, 0, "java", 1)
+    for i in range(NUM_TOKENS):
+        file_buffer.insert_text(len(file_buffer.text), TOKENS[i % len(TOKENS)])
+    return file_buffer.contents
+
+
+def run(name: str, fn, contents: str) -> str:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(contents)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>14}: {NUM_TOKENS} edits in {elapsed:.3f}s, peak allocation {peak / 2**20:.1f} MiB")
+    return result
+
+
+def main() -> None:
+    contents = initial_contents()
+    print(f"file: {len(contents) / 2**20:.1f} MiB")
+    expected = run("str", append_to_str, contents)
+    assert run("LSPFileBuffer", append_to_buffer, contents) == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmarks the JSON codecs available for serializing and deserializing LSP messages.
+
+Measures create_message() and decoding of the message body for realistic LSP payloads: a
+textDocument/completion response with 5000 items and a 2 MB textDocument/didOpen notification.
+
+Usage:
+    PYTHONPATH=src python -m tests.benchmarks.bench_json_codec
+"""
+
+import time
+from typing import Callable, List
+
+from multilspy.lsp_protocol_handler.server import (
+    JsonCodec,
+    MsgspecCodec,
+    OrjsonCodec,
+    create_message,
+    make_notification,
+    make_response,
+)
+
+
+def completion_list_payload(num_items: int = 5000) -> dict:
+    items = [
+        {
+            "label": f"getValue{i}() : String",
+            "kind": 2,
+            "detail": f"com.example.generated.Class{i % 50}",
+            "sortText": f"{i:08d}",
+            "filterText": f"getValue{i}",
+            "insertTextFormat": 2,
+            "textEdit": {
+                "range": {"start": {"line": 120, "character": 16}, "end": {"line": 120, "character": 19}},
+                "newText": f"getValue{i}()",
+            },
+            "data": {"rid": "42", "pid": "0", "uri": "file:///repo/src/main/java/com/example/Main.java"},
+        }
+        for i in range(num_items)
+    ]
+    return make_response(17, {"isIncomplete": False, "items": items})
+
+
+def did_open_payload(size: int = 2 * 1024 * 1024) -> dict:
+    line = '        System.out.println("Generated line with some unicode: éè");\n'
+    text = line * (size // len(line))
+    return make_notification(
+        "textDocument/didOpen",
+        {
+            "textDocument": {
+                "uri": "file:///repo/src/main/java/com/example/Generated.java",
+                "languageId": "java",
+                "version": 0,
+                "text": text,
+            }
+        },
+    )
+
+
+def timeit(fn: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    codecs: List[JsonCodec] = [JsonCodec()]
+    for codec_cls in (OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(codec_cls())
+        except ImportError:
+            print(f"{codec_cls.__name__}: not installed, skipping")
+
+    for name, payload, repeat in [
+        ("CompletionList (5k items)", completion_list_payload(), 20),
+        ("didOpen (2 MB)", did_open_payload(), 20),
+    ]:
+        print(name)
+        body = JsonCodec().encode(payload)
+        for codec in codecs:
+            encode = timeit(lambda: create_message(payload, codec), repeat)
+            decode = timeit(lambda: codec.decode(body), repeat)
+            print(f"  {codec.name:>8}: encode {encode * 1000:8.2f} ms, decode {decode * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
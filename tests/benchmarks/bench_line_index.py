@@ -0,0 +1,65 @@
+"""
+Benchmarks the conversion of (line, column) positions to offsets while streaming edits into an open file.
+
+Simulates a token-by-token generation loop that inserts 10k single characters at a cursor in the
+middle of a 10k-line Java file, comparing the character-by-character scan used before the
+introduction of LineIndex with LineIndex.
+
+Usage:
+    PYTHONPATH=src python -m tests.benchmarks.bench_line_index
+"""
+
+import time
+
+from multilspy.multilspy_utils import LineIndex, TextUtils
+
+NUM_LINES = 10_000
+NUM_INSERTS = 10_000
+# The character scan is too slow to run all the inserts through it
+NUM_INSERTS_SCAN = 200
+
+
+def scan_index_from_line_col(text: str, line: int, col: int) -> int:
+    idx = 0
+    while line > 0:
+        if text[idx] == "\n":
+            line -= 1
+        idx += 1
+    return idx + col
+
+
+def java_file() -> str:
+    return "".join(f"        int value{i} = compute({i}, \"line {i}\");\n" for i in range(NUM_LINES))
+
+
+def stream_inserts(text: str, num_inserts: int, get_index, on_insert) -> float:
+    line, col = NUM_LINES // 2, 8
+    generated = "return value + 1;\n" * (num_inserts // 18 + 1)
+    start = time.perf_counter()
+    for ch in generated[:num_inserts]:
+        index = get_index(text, line, col)
+        text = text[:index] + ch + text[index:]
+        on_insert(index, ch)
+        line, col = TextUtils.get_updated_position_from_line_and_column_and_edit(line, col, ch)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    text = java_file()
+    print(f"file: {NUM_LINES} lines, {len(text)} characters")
+
+    elapsed = stream_inserts(text, NUM_INSERTS_SCAN, scan_index_from_line_col, lambda index, ch: None)
+    scan_rate = NUM_INSERTS_SCAN / elapsed
+    print(f"      scan: {NUM_INSERTS_SCAN} inserts in {elapsed:.3f}s ({scan_rate:,.0f} inserts/sec)")
+
+    line_index = LineIndex(text)
+    elapsed = stream_inserts(
+        text, NUM_INSERTS, lambda _, line, col: line_index.get_index_from_line_col(line, col), line_index.insert
+    )
+    index_rate = NUM_INSERTS / elapsed
+    print(f" LineIndex: {NUM_INSERTS} inserts in {elapsed:.3f}s ({index_rate:,.0f} inserts/sec)")
+    print(f"speedup: {index_rate / scan_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
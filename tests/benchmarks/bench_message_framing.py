@@ -0,0 +1,134 @@
+"""
+Benchmarks the framing of messages read from the stdout of the language server.
+
+Replays a stream of server -> client messages through the reader used before the introduction of
+MessageFramer (readline() for every header line followed by readexactly() for the body) and through
+MessageFramer, and reports the throughput of both in messages/sec.
+
+Usage:
+    PYTHONPATH=src python -m tests.benchmarks.bench_message_framing [recorded_stream_file]
+
+If a file is given, it must contain the raw bytes written by the language server to its stdout.
+Otherwise, a synthetic stream of `$/progress` and `textDocument/publishDiagnostics` notifications,
+modelled after the ones sent by Eclipse JDTLS during a project import, is used.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import List
+
+from multilspy.lsp_protocol_handler.server import READ_CHUNK_SIZE, MessageFramer, content_length
+
+
+def make_frame(payload: dict) -> bytes:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return f"Content-Length: {len(body)}\r\n\r\n".encode("utf-8") + body
+
+
+def synthetic_stream(num_messages: int) -> bytes:
+    frames: List[bytes] = []
+    for i in range(num_messages):
+        if i % 4 == 0:
+            frames.append(
+                make_frame(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "textDocument/publishDiagnostics",
+                        "params": {
+                            "uri": f"file:///repo/src/main/java/com/example/Class{i}.java",
+                            "diagnostics": [
+                                {
+                                    "range": {
+                                        "start": {"line": j, "character": 4},
+                                        "end": {"line": j, "character": 20},
+                                    },
+                                    "severity": 2,
+                                    "code": "268435844",
+                                    "source": "Java",
+                                    "message": "The import java.util.List is never used",
+                                }
+                                for j in range(3)
+                            ],
+                        },
+                    }
+                )
+            )
+        else:
+            frames.append(
+                make_frame(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "$/progress",
+                        "params": {
+                            "token": "b3d3f5a2-6b0e-4f55-9bd0-cc6cc3b2f6a1",
+                            "value": {"kind": "report", "message": f"Importing Maven project(s) - {i}", "percentage": i % 100},
+                        },
+                    }
+                )
+            )
+    return b"".join(frames)
+
+
+def make_reader(stream: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader(limit=2**32)
+    reader.feed_data(stream)
+    reader.feed_eof()
+    return reader
+
+
+async def read_with_readline(stream: bytes) -> int:
+    reader = make_reader(stream)
+    count = 0
+    while not reader.at_eof():
+        line = await reader.readline()
+        if not line:
+            continue
+        num_bytes = content_length(line)
+        if num_bytes is None:
+            continue
+        while line and line.strip():
+            line = await reader.readline()
+        if not line:
+            continue
+        await reader.readexactly(num_bytes)
+        count += 1
+    return count
+
+
+async def read_with_framer(stream: bytes) -> int:
+    reader = make_reader(stream)
+    framer = MessageFramer()
+    count = 0
+    while not reader.at_eof():
+        data = await reader.read(READ_CHUNK_SIZE)
+        if not data:
+            continue
+        count += len(framer.feed(data))
+    return count
+
+
+def run(name: str, fn, stream: bytes) -> float:
+    start = time.perf_counter()
+    count = asyncio.run(fn(stream))
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:>10}: {count} messages in {elapsed:.3f}s ({rate:,.0f} messages/sec)")
+    return rate
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            stream = f.read()
+    else:
+        stream = synthetic_stream(200_000)
+
+    before = run("readline", read_with_readline, stream)
+    after = run("framer", read_with_framer, stream)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmarks the client side of the LSP communication, offline: the framing of the messages read from the server,
+their dispatch to the handlers, the correlation of responses with requests, and the LanguageServer request methods
+against the replay server answering from a synthetic recording. No network access or JVM is needed.
+
+Usage (requires pytest-benchmark):
+    cd tests && python -m pytest benchmarks/bench_replay.py --benchmark-only
+
+Set MULTILSPY_REPLAY_LATENCY to the number of seconds the replay server waits before answering each request.
+"""
+
+import asyncio
+import os
+import pytest
+
+from multilspy.language_server import SyncLanguageServer
+from multilspy.lsp_protocol_handler.server import READ_CHUNK_SIZE, LanguageServerHandler, MessageFramer, ProcessLaunchInfo
+from tests.benchmarks.bench_message_framing import synthetic_stream
+from tests.replay_utils import ReplayLanguageServer, write_synthetic_recording, write_synthetic_repository
+
+pytest.importorskip("pytest_benchmark")
+
+NUM_FILES = 20
+NUM_REFERENCES = 2000
+
+
+def test_framing(benchmark) -> None:
+    stream = synthetic_stream(20_000)
+
+    def feed() -> int:
+        framer = MessageFramer()
+        return sum(len(framer.feed(stream[i : i + READ_CHUNK_SIZE])) for i in range(0, len(stream), READ_CHUNK_SIZE))
+
+    assert benchmark(feed) == 20_000
+
+
+def test_dispatch(benchmark) -> None:
+    handler = LanguageServerHandler(ProcessLaunchInfo(cmd="true"))
+    received = []
+
+    async def on_progress(params) -> None:
+        received.append(params)
+
+    handler.on_notification("$/progress", on_progress)
+    bodies = MessageFramer().feed(synthetic_stream(20_000))
+
+    async def dispatch() -> None:
+        for body in bodies:
+            await handler._handle_body(body)
+
+    benchmark(lambda: asyncio.run(dispatch()))
+    assert received
+
+
+def test_request_correlation(benchmark) -> None:
+    num_requests = 5_000
+
+    async def correlate() -> None:
+        handler = LanguageServerHandler(ProcessLaunchInfo(cmd="true"))
+        handler._send_payload_sync = lambda payload: None
+        requests = [asyncio.ensure_future(handler.send_request("textDocument/hover", {})) for _ in range(num_requests)]
+        await asyncio.sleep(0)
+        # Responses arrive out of order
+        for request_id in reversed(range(1, num_requests + 1)):
+            await handler._handle_body(handler.codec.encode({"jsonrpc": "2.0", "id": request_id, "result": None}))
+        await asyncio.gather(*requests)
+
+    benchmark(lambda: asyncio.run(correlate()))
+
+
+@pytest.fixture(scope="module")
+def replay_lsp(tmp_path_factory):
+    recording_path = str(tmp_path_factory.mktemp("recording") / "recording.jsonl")
+    repository = str(tmp_path_factory.mktemp("repo"))
+    write_synthetic_recording(recording_path, NUM_FILES, NUM_REFERENCES)
+    write_synthetic_repository(repository, NUM_FILES)
+    latency = float(os.environ.get("MULTILSPY_REPLAY_LATENCY", "0"))
+    lsp = SyncLanguageServer(ReplayLanguageServer(repository, recording_path, latency))
+    with lsp.start_server():
+        yield lsp
+
+
+def test_request_definition(benchmark, replay_lsp) -> None:
+    result = benchmark(replay_lsp.request_definition, "File1.java", 1, 4)
+    assert result[0]["relativePath"] == "File2.java"
+
+
+def test_request_references(benchmark, replay_lsp) -> None:
+    result = benchmark(replay_lsp.request_references, "File1.java", 1, 4)
+    assert len(result) == NUM_REFERENCES
+
+
+def test_request_hover(benchmark, replay_lsp) -> None:
+    assert benchmark(replay_lsp.request_hover, "File1.java", 1, 4) is not None
+
+
+def test_request_document_symbols(benchmark, replay_lsp) -> None:
+    symbols, _ = benchmark(replay_lsp.request_document_symbols, "File1.java")
+    assert [symbol["name"] for symbol in symbols] == ["File1", "run"]
+
+
+def test_request_references_batch(benchmark, replay_lsp) -> None:
+    positions = [(f"File{i}.java", 1, 4) for i in range(NUM_FILES)]
+
+    def run_batch() -> int:
+        return sum(len(result) for _, result in replay_lsp.request_references_batch(positions, max_in_flight=8))
+
+    assert benchmark(run_batch) == NUM_FILES * NUM_REFERENCES
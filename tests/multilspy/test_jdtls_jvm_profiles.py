@@ -0,0 +1,49 @@
+"""
+This file contains tests for the JVM resource profiles used to launch Eclipse JDTLS
+"""
+
+import pytest
+
+from multilspy.language_servers.eclipse_jdtls import jvm_profiles
+from multilspy.language_servers.eclipse_jdtls.jvm_profiles import JVM_PROFILES, get_jvm_profile
+from multilspy.multilspy_exceptions import MultilspyException
+from multilspy.multilspy_logger import MultilspyLogger
+
+
+def test_named_profiles() -> None:
+    """
+    Test that the default profile keeps the historical launch flags and that unknown profiles are rejected
+    """
+    logger = MultilspyLogger()
+    assert get_jvm_profile(logger, "default", ".").to_jvm_args() == [
+        "-XX:+UseParallelGC",
+        "-XX:GCTimeRatio=4",
+        "-XX:AdaptiveSizePolicyWeight=90",
+        "-Xmx8192m",
+        "-Xms2048m",
+    ]
+    assert get_jvm_profile(logger, "small-repo", ".") is JVM_PROFILES["small-repo"]
+    with pytest.raises(MultilspyException):
+        get_jvm_profile(logger, "huge", ".")
+
+
+def test_auto_profile(tmp_path, monkeypatch) -> None:
+    """
+    Test that the auto profile grows with the repository and stays within the memory share of one instance
+    """
+    (tmp_path / "src").mkdir()
+    (tmp_path / "build").mkdir()
+    for i in range(4000):
+        (tmp_path / "src" / f"C{i}.java").touch()
+        (tmp_path / "build" / f"C{i}.java").touch()
+
+    monkeypatch.setattr(jvm_profiles, "get_memory_limit_mb", lambda: 64 * 1024)
+    profile = jvm_profiles.get_auto_profile(str(tmp_path))
+    assert profile.max_heap_mb == 2304
+    assert profile.gc_options == jvm_profiles.PARALLEL_GC_OPTIONS
+
+    monkeypatch.setattr(jvm_profiles, "get_memory_limit_mb", lambda: 4096)
+    profile = jvm_profiles.get_auto_profile(str(tmp_path), instances_per_host=2)
+    assert profile.max_heap_mb == 1280
+    assert profile.initial_heap_mb == 320
+    assert profile.gc_options == jvm_profiles.SERIAL_GC_OPTIONS
@@ -0,0 +1,89 @@
+"""
+This file contains tests for the versioning and publishing of the Eclipse JDTLS shared index
+"""
+
+import os
+import time
+import xml.etree.ElementTree as ET
+
+from multilspy.language_servers.eclipse_jdtls import shared_index
+from multilspy.multilspy_config import JavaServerConfig
+
+
+def create_java_server_config(tmp_path, jre_version: str) -> JavaServerConfig:
+    """
+    Creates a JavaServerConfig pointing at a fake JDTLS and JRE installation
+    """
+    plugins_dir = tmp_path / "server" / "plugins"
+    plugins_dir.mkdir(parents=True, exist_ok=True)
+    (plugins_dir / "org.eclipse.jdt.ls.core_1.40.0.jar").touch()
+    (plugins_dir / "org.eclipse.jdt.core_3.39.0.jar").touch()
+    jre_home = tmp_path / f"jre-{jre_version}"
+    jre_home.mkdir(exist_ok=True)
+    (jre_home / "release").write_text(f'IMPLEMENTOR="Eclipse Adoptium"\nJAVA_VERSION="{jre_version}"\n')
+    return JavaServerConfig(
+        jre_home_path=str(jre_home),
+        jre_path=str(jre_home / "bin" / "java"),
+        jdtls_jar_path=str(plugins_dir / "org.eclipse.equinox.launcher_1.6.900.jar"),
+        jdtls_config_path=str(tmp_path / "config_linux"),
+        lombok_jar_path=str(tmp_path / "lombok.jar"),
+        gradle_path=str(tmp_path / "gradle"),
+    )
+
+
+def test_shared_index_versioning(tmp_path, monkeypatch) -> None:
+    """
+    Test that the shared index location changes with the JRE version, and that stale indexes are pruned
+    """
+    monkeypatch.setattr(shared_index, "get_shared_index_root", lambda: str(tmp_path / "sharedIndex"))
+    config_21 = create_java_server_config(tmp_path, "21.0.5")
+    config_17 = create_java_server_config(tmp_path, "17.0.8")
+    assert shared_index.get_jre_version(config_21.jre_home_path) == "Eclipse Adoptium;21.0.5;"
+    assert "org.eclipse.jdt.core_3.39.0.jar" in shared_index.get_jdtls_version(config_21.jdtls_jar_path)
+
+    path_21 = shared_index.get_shared_index_path(config_21)
+    path_17 = shared_index.get_shared_index_path(config_17)
+    assert path_21 != path_17
+    assert path_21 == shared_index.get_shared_index_path(config_21)
+
+    staging_path = f"{path_21}.0123.tmp"
+    replaced_path = f"{path_21}.4567.old"
+    for path in [path_21, path_17, staging_path, replaced_path]:
+        os.makedirs(path)
+    # Nothing is removed within the grace period, as other processes may still be using it
+    assert shared_index.remove_stale_shared_indexes(config_21) == []
+
+    # A staging directory still being written is kept past the grace period of its creation
+    expired = time.time() - shared_index.STALE_INDEX_GRACE_PERIOD - 60
+    for path in [path_21, path_17, staging_path, replaced_path]:
+        os.utime(path, (expired, expired))
+    open(os.path.join(staging_path, "in_progress.index"), "w").close()
+    assert shared_index.remove_stale_shared_indexes(config_21) == sorted([path_17, replaced_path])
+    assert os.path.isdir(path_21) and os.path.isdir(staging_path)
+    assert not os.path.exists(path_17) and not os.path.exists(replaced_path)
+
+
+def test_synthetic_project_and_publish(tmp_path) -> None:
+    """
+    Test that the synthetic project depends on the given jars and that publishing replaces the previous index
+    """
+    shared_index.write_synthetic_project(str(tmp_path / "project"), ["lib/a.jar", "/opt/b & c.jar"])
+    classpath = ET.parse(tmp_path / "project" / ".classpath").getroot()
+    libs = [entry.get("path") for entry in classpath if entry.get("kind") == "lib"]
+    assert libs == [os.path.abspath("lib/a.jar"), "/opt/b & c.jar"]
+    assert ET.parse(tmp_path / "project" / ".project").getroot().find("name").text == "multilspy-prewarm"
+
+    index_path = tmp_path / "index"
+    index_path.mkdir()
+    (index_path / "stale.index").touch()
+    staging_path = tmp_path / "index.tmp"
+    staging_path.mkdir()
+    (staging_path / shared_index.MANIFEST_FILE_NAME).write_text("{}")
+    assert not shared_index.is_shared_index_prewarmed(str(index_path))
+    shared_index.publish_shared_index(str(staging_path), str(index_path))
+    assert shared_index.is_shared_index_prewarmed(str(index_path))
+    assert os.listdir(index_path) == [shared_index.MANIFEST_FILE_NAME]
+    # The replaced index is kept for the JDTLS instances which may still be reading it
+    replaced = [name for name in os.listdir(tmp_path) if name.endswith(".old")]
+    assert len(replaced) == 1 and os.listdir(tmp_path / replaced[0]) == ["stale.index"]
+    assert sorted(os.listdir(tmp_path)) == sorted(["index", "project", replaced[0]])
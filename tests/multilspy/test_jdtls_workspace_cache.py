@@ -0,0 +1,41 @@
+"""
+This file contains tests for the reuse of persistent Eclipse JDTLS workspaces
+"""
+
+import os
+
+from multilspy.language_servers.eclipse_jdtls.workspace_cache import WorkspaceCache
+from multilspy.multilspy_logger import MultilspyLogger
+
+
+def test_workspace_reuse_and_eviction(tmp_path) -> None:
+    """
+    Test that workspaces are keyed on the build files, leased exclusively, and evicted in LRU order
+    """
+    repository = tmp_path / "repo"
+    (repository / "module").mkdir(parents=True)
+    (repository / "pom.xml").write_text("<project/>")
+    (repository / "module" / "Main.java").write_text("class Main {}")
+    cache = WorkspaceCache(MultilspyLogger(), str(tmp_path / "workspaces"), max_workspaces=2)
+    os.makedirs(cache.workspaces_dir)
+
+    key = WorkspaceCache.get_workspace_key(str(repository))
+    (repository / "module" / "Main.java").write_text("class Main { int x; }")
+    assert WorkspaceCache.get_workspace_key(str(repository)) == key
+
+    lease = cache.acquire(str(repository))
+    assert lease is not None
+    assert cache.acquire(str(repository)) is None
+    lease.release()
+    lease = cache.acquire(str(repository))
+    assert lease is not None
+    lease.release()
+
+    paths = [lease.path]
+    for i in range(2):
+        (repository / "module" / "build.gradle").write_text(f"version = '{i}'")
+        lease = cache.acquire(str(repository))
+        paths.append(lease.path)
+        lease.release()
+    assert len(set(paths)) == 3
+    assert sorted(os.listdir(cache.workspaces_dir)) == sorted(os.path.basename(path) for path in paths[1:])
@@ -0,0 +1,401 @@
+"""
+This file contains tests for the language agnostic functionality of LanguageServer, run against
+an in-process stand-in for the language server
+"""
+
+import asyncio
+import pathlib
+import pytest
+
+from multilspy.language_server import LanguageServer, LSPFileBuffer
+from multilspy.location_list import LocationList
+from multilspy.lsp_protocol_handler.lsp_requests import LspRequest
+from multilspy.lsp_protocol_handler.server import ProcessLaunchInfo
+from multilspy.multilspy_config import Language, MultilspyConfig
+from multilspy.multilspy_exceptions import MultilspyException
+from multilspy.multilspy_logger import MultilspyLogger
+from multilspy.readiness import ReadinessLevel
+from multilspy.response_cache import ResponseCache
+
+
+class FakeLanguageServer(LanguageServer):
+    """
+    A LanguageServer whose requests are answered in-process, recording the messages sent to the server
+    """
+
+    def __init__(self, repository_root_path: str, **config):
+        super().__init__(
+            MultilspyConfig(code_language=Language.JAVA, **config),
+            MultilspyLogger(),
+            repository_root_path,
+            ProcessLaunchInfo(cmd="true"),
+            "java",
+        )
+        self.notifications = []
+        self.requests = []
+        self.server._send_payload_sync = lambda payload: self.notifications.append((payload["method"], payload["params"]))
+        self.server.send = LspRequest(self.answer_request)
+        self.in_flight = 0
+        self.max_observed_in_flight = 0
+
+    @staticmethod
+    def document_symbols(contents: str) -> list:
+        symbols = []
+        for line, text in enumerate(contents.splitlines()):
+            if text.startswith("class "):
+                name = text.split()[1]
+                name_range = {"start": {"line": line, "character": 6}, "end": {"line": line, "character": 6 + len(name)}}
+                symbols.append({"name": name, "kind": 5, "range": name_range, "selectionRange": name_range, "children": []})
+        return symbols
+
+    @staticmethod
+    def diagnostic(message: str) -> dict:
+        position = {"line": 0, "character": 0}
+        return {"range": {"start": position, "end": position}, "severity": 1, "message": message, "data": {}}
+
+    async def publish_diagnostics(self, relative_file_path: str, messages: list, **params) -> None:
+        uri = pathlib.Path(self.repository_root_path, relative_file_path).as_uri()
+        diagnostics = [self.diagnostic(message) for message in messages]
+        await self.server.on_notification_handlers["textDocument/publishDiagnostics"](
+            {"uri": uri, "diagnostics": diagnostics, **params}
+        )
+
+    async def answer_request(self, method: str, params: dict):
+        self.requests.append((method, params))
+        self.in_flight += 1
+        self.max_observed_in_flight = max(self.max_observed_in_flight, self.in_flight)
+        position = params.get("position", {"line": 0, "character": 0})
+        await asyncio.sleep(0.001 * ((position["line"] * 7 + position["character"]) % 5))
+        self.in_flight -= 1
+        if method in ("textDocument/definition", "textDocument/references"):
+            return [{"uri": params["textDocument"]["uri"], "range": {"start": position, "end": position}}]
+        if method == "textDocument/hover":
+            return {"contents": f"hover {position['line']}:{position['character']}"}
+        if method == "textDocument/documentSymbol":
+            return self.document_symbols(self.open_file_buffers[params["textDocument"]["uri"]].contents)
+        if method == "workspace/symbol":
+            uri = pathlib.Path(self.repository_root_path, "File0.java").as_uri()
+            location = {"uri": uri, "range": {"start": {"line": 0, "character": 6}, "end": {"line": 0, "character": 11}}}
+            return [{"name": params["query"], "kind": 5, "location": location}]
+        if method == "textDocument/diagnostic":
+            if params.get("previousResultId") == "1":
+                return {"kind": "unchanged", "resultId": "1"}
+            return {"kind": "full", "resultId": "1", "items": [self.diagnostic("pulled")]}
+        raise NotImplementedError(method)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    for i in range(3):
+        (tmp_path / f"File{i}.java").write_text(f"class File{i} {{\n}}\n")
+    return str(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_request_definitions_batch(repository) -> None:
+    """
+    Test that batched queries respect the in-flight window and open every file only once
+    """
+    lsp = FakeLanguageServer(repository)
+    positions = [(f"File{i % 3}.java", line, i) for i in range(30) for line in range(2)]
+    async with lsp.start_server():
+        results = [item async for item in lsp.request_definitions_batch(positions, max_in_flight=4)]
+
+    assert sorted(position for position, _ in results) == sorted(positions)
+    for (relative_file_path, line, column), result in results:
+        assert len(result) == 1
+        assert result[0]["relativePath"] == relative_file_path
+        assert result[0]["range"]["start"] == {"line": line, "character": column}
+    assert lsp.max_observed_in_flight == 4
+    opened = [params["textDocument"]["uri"] for method, params in lsp.notifications if method == "textDocument/didOpen"]
+    assert len(opened) == len(set(opened)) == 3
+    assert lsp.open_file_buffers == {}
+
+
+@pytest.mark.asyncio
+async def test_response_cache(repository) -> None:
+    """
+    Test that repeated read-only queries are served from the cache until the workspace changes
+    """
+    lsp = FakeLanguageServer(repository, response_cache_size=8)
+    async with lsp.start_server():
+        with lsp.open_file("File0.java"):
+            first = await lsp.request_hover("File0.java", 0, 3)
+            assert await lsp.request_hover("File0.java", 0, 3) == first
+            assert len(lsp.requests) == 1
+            (await lsp.request_hover("File0.java", 0, 3))["contents"] = "mutated by the caller"
+            assert await lsp.request_hover("File0.java", 0, 3) == first
+
+            lsp.insert_text_at_position("File0.java", 1, 0, "int x;\n")
+            assert await lsp.request_hover("File0.java", 0, 3) == first
+            assert len(lsp.requests) == 2
+
+        definitions = await lsp.request_definition("File1.java", 0, 1)
+        definitions[0]["relativePath"] = "mutated by the caller"
+        assert (await lsp.request_definition("File1.java", 0, 1))[0]["relativePath"] == "File1.java"
+        assert len(lsp.requests) == 3
+
+        uri = pathlib.Path(repository, "File1.java").as_uri()
+        lsp.notify_did_change_watched_files([{"uri": uri, "type": 2}])
+        await lsp.request_definition("File1.java", 0, 1)
+        assert len(lsp.requests) == 4
+
+    assert lsp.response_cache.stats.hits == 4
+    assert lsp.response_cache.stats.misses == 4
+
+
+def test_response_cache_shares_responses() -> None:
+    """
+    Test that a cache hit returns the stored response itself, without copying it
+    """
+    cache = ResponseCache(max_size=2)
+    locations = LocationList()
+    cache.put("key", locations)
+    is_cached, response = cache.get("key")
+    assert is_cached
+    assert response is locations
+    assert cache.get("key")[1] is locations
+
+
+def test_lsp_metrics_config(repository) -> None:
+    """
+    Test that the per method metrics are only collected when enabled in the config
+    """
+    assert FakeLanguageServer(repository).lsp_metrics is None
+
+    lsp = FakeLanguageServer(repository, collect_lsp_metrics=True)
+    assert lsp.lsp_metrics is not None
+    assert lsp.server.metrics is lsp.lsp_metrics
+
+
+def test_file_buffer() -> None:
+    """
+    Test that a file buffer is constructed from its contents, positionally or by keyword, and tracks edits
+    """
+    file_buffer = LSPFileBuffer(uri="file:///A.java", contents="class A {}\n", version=0, language_id="java", ref_count=1)
+    positional = LSPFileBuffer("file:///A.java", "class A {}\n", 0, "java", 1)
+    for attribute in ["uri", "contents", "version", "language_id", "ref_count"]:
+        assert getattr(file_buffer, attribute) == getattr(positional, attribute)
+    file_buffer.insert_text(9, " int x; ")
+    assert file_buffer.contents == "class A { int x; }\n"
+    assert file_buffer.delete_text(10, 17) == "int x; "
+    assert file_buffer.contents == "class A { }\n"
+
+
+@pytest.mark.asyncio
+async def test_edit_open_file(repository) -> None:
+    """
+    Test that edits are applied to the buffer of the open file and forwarded to the server
+    """
+    lsp = FakeLanguageServer(repository)
+    async with lsp.start_server():
+        with lsp.open_file("File0.java"):
+            position = lsp.insert_text_at_position("File0.java", 1, 0, "    int x;\n    int y;\n")
+            assert position == {"line": 3, "character": 0}
+            deleted = lsp.delete_text_between_positions(
+                "File0.java", {"line": 1, "character": 8}, {"line": 2, "character": 8}
+            )
+            assert deleted == "x;\n    int "
+            assert lsp.get_open_file_text("File0.java") == "class File0 {\n    int y;\n}\n"
+
+    changes = [params["contentChanges"] for method, params in lsp.notifications if method == "textDocument/didChange"]
+    assert len(changes) == 2
+
+
+@pytest.mark.asyncio
+async def test_did_change_batching(repository) -> None:
+    """
+    Test that edits are sent as a single didChange notification before the next request on the file
+    """
+    lsp = FakeLanguageServer(repository, did_change_batching=True)
+    async with lsp.start_server():
+        with lsp.open_file("File0.java"):
+            position = {"line": 1, "character": 0}
+            for token in ["int", " ", "x", ";", "\n"]:
+                position = lsp.insert_text_at_position("File0.java", position["line"], position["character"], token)
+            lsp.delete_text_between_positions("File0.java", {"line": 1, "character": 4}, {"line": 1, "character": 5})
+            assert not [method for method, _ in lsp.notifications if method == "textDocument/didChange"]
+
+            await lsp.request_hover("File0.java", 1, 0)
+            changes = [params for method, params in lsp.notifications if method == "textDocument/didChange"]
+            assert len(changes) == 1
+            assert changes[0]["textDocument"]["version"] == 1
+            assert len(changes[0]["contentChanges"]) == 6
+            assert lsp.get_open_file_text("File0.java") == "class File0 {\nint ;\n}\n"
+
+        with lsp.open_file("File1.java"):
+            lsp.did_change_batcher.debounce = 0.01
+            lsp.insert_text_at_position("File1.java", 0, 0, "// header\n")
+            await asyncio.sleep(0.05)
+            changes = [params for method, params in lsp.notifications if method == "textDocument/didChange"]
+            assert len(changes) == 2
+            assert changes[1]["contentChanges"][0]["text"] == "// header\n"
+
+
+class StagedFakeLanguageServer(FakeLanguageServer):
+    """
+    A FakeLanguageServer whose readiness is reported by the test
+    """
+
+    reports_readiness = True
+
+
+@pytest.mark.asyncio
+async def test_staged_readiness(repository) -> None:
+    """
+    Test that requests are served as soon as the readiness level they need is reached
+    """
+    lsp = StagedFakeLanguageServer(repository)
+    async with lsp.start_server():
+        lsp.readiness.set_level(ReadinessLevel.INITIALIZED)
+        assert await lsp.request_hover("File0.java", 0, 1) == {"contents": "hover 0:1"}
+
+        definition = asyncio.ensure_future(lsp.request_definition("File0.java", 0, 1))
+        references = asyncio.ensure_future(lsp.request_references("File0.java", 0, 1))
+        milestone = asyncio.ensure_future(lsp.readiness.wait_for_milestone("language/status:Started"))
+        await asyncio.sleep(0.01)
+        assert not definition.done() and not references.done() and not milestone.done()
+
+        lsp.readiness.mark_milestone("language/status:Started")
+        lsp.readiness.set_level(ReadinessLevel.PROJECTS_IMPORTED)
+        assert len(await definition) == 1
+        await milestone
+        assert not references.done()
+
+        lsp.readiness.set_level(ReadinessLevel.SERVICE_READY)
+        assert len(await references) == 1
+        await lsp.wait_for_readiness(ReadinessLevel.SERVICE_READY)
+
+    assert lsp.readiness.level == ReadinessLevel.NOT_STARTED
+    assert LanguageServer.request_references.required_readiness == ReadinessLevel.SERVICE_READY
+
+
+@pytest.mark.asyncio
+async def test_readiness_wait_ends_when_server_stops(repository) -> None:
+    """
+    Test that requests waiting for a readiness level fail instead of hanging when the server stops
+    """
+    lsp = StagedFakeLanguageServer(repository)
+    async with lsp.start_server():
+        references = asyncio.ensure_future(lsp.request_references("File0.java", 0, 1))
+        milestone = asyncio.ensure_future(lsp.readiness.wait_for_milestone("language/status:Started"))
+        await asyncio.sleep(0.01)
+        assert not references.done() and not milestone.done()
+
+    with pytest.raises(MultilspyException):
+        await asyncio.wait_for(references, timeout=1)
+    with pytest.raises(MultilspyException):
+        await asyncio.wait_for(milestone, timeout=1)
+    assert lsp.readiness._level_waiters == {}
+    assert lsp.readiness._milestone_waiters == {}
+
+
+@pytest.mark.asyncio
+async def test_request_diagnostics(repository) -> None:
+    """
+    Test that published diagnostics are stored per document version and awaited, and pulled when supported
+    """
+    lsp = FakeLanguageServer(repository)
+    async with lsp.start_server():
+        with lsp.open_file("File0.java"):
+            await lsp.publish_diagnostics("File0.java", ["error in version 0"])
+            diagnostics = await lsp.request_diagnostics("File0.java")
+            assert diagnostics == [{"range": lsp.diagnostic("")["range"], "severity": 1, "message": "error in version 0"}]
+
+            lsp.insert_text_at_position("File0.java", 1, 0, "int x\n")
+            waiter = asyncio.ensure_future(lsp.request_diagnostics("File0.java"))
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            await lsp.publish_diagnostics("File0.java", ["stale"], version=0)
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            await lsp.publish_diagnostics("File0.java", ["missing ;"])
+            assert [d["message"] for d in await waiter] == ["missing ;"]
+
+            with pytest.raises(asyncio.TimeoutError):
+                await lsp.request_diagnostics("File0.java", wait_for_version=2, timeout=0.01)
+
+            # Diagnostics published without a version just after a change may predate it, so they do not satisfy a
+            # wait for the new version
+            lsp.insert_text_at_position("File0.java", 1, 0, "int y\n")
+            await lsp.publish_diagnostics("File0.java", ["maybe stale"])
+            with pytest.raises(asyncio.TimeoutError):
+                await lsp.request_diagnostics("File0.java", wait_for_version=2, timeout=0.01)
+            await lsp.publish_diagnostics("File0.java", ["missing ; twice"], version=2)
+            diagnostics = await lsp.request_diagnostics("File0.java", wait_for_version=2, timeout=1)
+            assert [d["message"] for d in diagnostics] == ["missing ; twice"]
+
+        await lsp.publish_diagnostics("File1.java", ["closed"])
+        await lsp.publish_diagnostics("File1.java", [])
+        assert len(lsp.diagnostics.entries) == 1
+
+        lsp.server_capabilities["diagnosticProvider"] = {"interFileDependencies": True}
+        assert [d["message"] for d in await lsp.request_diagnostics("File2.java")] == ["pulled"]
+        assert [d["message"] for d in await lsp.request_diagnostics("File2.java")] == ["pulled"]
+        pulls = [params for method, params in lsp.requests if method == "textDocument/diagnostic"]
+        assert "previousResultId" not in pulls[0] and pulls[1]["previousResultId"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_workspace_symbols(repository) -> None:
+    """
+    Test that workspace symbols are searched on the server, or in the symbol index kept up to date with edits
+    """
+    lsp = FakeLanguageServer(repository)
+    async with lsp.start_server():
+        symbols = await lsp.request_workspace_symbols("File")
+        assert [(s["name"], s["location"]["relativePath"]) for s in symbols] == [("File", "File0.java")]
+
+        index = await lsp.build_symbol_index()
+        assert sorted(index.files) == ["File0.java", "File1.java", "File2.java"]
+        assert [s["name"] for s in await lsp.request_workspace_symbols("file1")] == ["File1"]
+        assert len(await lsp.request_workspace_symbols("ile")) == 3
+
+        with lsp.open_file("File1.java"):
+            lsp.insert_text_at_position("File1.java", 2, 0, "class HelperFile1 {\n}\n")
+            symbols = await lsp.request_workspace_symbols("file1")
+        assert [s["name"] for s in symbols] == ["File1", "HelperFile1"]
+        assert symbols[1]["location"]["range"]["start"] == {"line": 2, "character": 6}
+        assert symbols[1]["location"]["relativePath"] == "File1.java"
+
+        pathlib.Path(repository, "File2.java").unlink()
+        lsp.notify_did_change_watched_files([{"uri": pathlib.Path(repository, "File2.java").as_uri(), "type": 3}])
+        assert await lsp.request_workspace_symbols("file2") == []
+        assert sorted(index.files) == ["File0.java", "File1.java"]
+
+
+@pytest.mark.asyncio
+async def test_crawl_document_symbols(tmp_path) -> None:
+    """
+    Test that the crawl streams the symbols of every source file within the in-flight bound, and resumes from its checkpoint
+    """
+    for i in range(40):
+        package = tmp_path / "src" / f"pkg{i % 4}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"File{i}.java").write_text(f"class File{i} {{\n}}\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "Generated.java").write_text("class Generated {\n}\n")
+    (tmp_path / "README.md").write_text("class NotJava\n")
+    checkpoint_path = str(tmp_path / "crawl.checkpoint")
+
+    lsp = FakeLanguageServer(str(tmp_path))
+    async with lsp.start_server():
+        crawled = {}
+        crawl = lsp.crawl_document_symbols(max_in_flight=5, checkpoint_path=checkpoint_path)
+        async for relative_file_path, symbols in crawl:
+            crawled[relative_file_path] = [symbol["name"] for symbol in symbols]
+            if len(crawled) == 25:
+                break
+        await crawl.aclose()
+        assert lsp.max_observed_in_flight <= 5
+
+        # The file being consumed when the crawl stopped is crawled again
+        last_file_path = list(crawled)[-1]
+        async for relative_file_path, symbols in lsp.crawl_document_symbols(checkpoint_path=checkpoint_path):
+            assert relative_file_path not in crawled or relative_file_path == last_file_path
+            crawled[relative_file_path] = [symbol["name"] for symbol in symbols]
+
+    assert len(crawled) == 40
+    for relative_file_path, names in crawled.items():
+        assert names == [pathlib.PurePath(relative_file_path).stem]
+    assert lsp.open_file_buffers == {}
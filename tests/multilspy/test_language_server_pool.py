@@ -0,0 +1,109 @@
+"""
+This file contains tests for the pool of pre-initialized language servers
+"""
+
+import asyncio
+import types
+import pytest
+from contextlib import asynccontextmanager
+
+from multilspy import LanguageServer, LanguageServerPool
+from multilspy import language_server_pool
+from multilspy.lsp_protocol_handler.server import ProcessLaunchInfo
+from multilspy.multilspy_config import Language, MultilspyConfig
+from multilspy.multilspy_logger import MultilspyLogger
+
+
+class FakeLanguageServer(LanguageServer):
+    """
+    A LanguageServer that pretends to launch a process when started
+    """
+
+    started = []
+    stopped = []
+
+    def __init__(self, config, logger, repository_root_path: str):
+        super().__init__(config, logger, repository_root_path, ProcessLaunchInfo(cmd="true"), "java")
+
+    @asynccontextmanager
+    async def start_server(self):
+        async with super().start_server():
+            await asyncio.sleep(0.01)
+            self.server.process = types.SimpleNamespace(returncode=None)
+            FakeLanguageServer.started.append(self)
+            yield self
+            FakeLanguageServer.stopped.append(self)
+
+
+@pytest.fixture
+def fake_create(monkeypatch):
+    FakeLanguageServer.started, FakeLanguageServer.stopped = [], []
+    monkeypatch.setattr(LanguageServer, "create", classmethod(lambda cls, *args: FakeLanguageServer(*args)))
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_and_evicts(fake_create) -> None:
+    """
+    Test that warm language servers are reused per repository and evicted when the pool is full
+    """
+    config = MultilspyConfig(code_language=Language.JAVA)
+    async with LanguageServerPool(config, MultilspyLogger(), max_servers=2, max_leases_per_server=3) as pool:
+        await pool.prewarm("/repo/a", count=2)
+        assert len(FakeLanguageServer.started) == 2
+
+        async with pool.lease("/repo/a") as first:
+            async with pool.lease("/repo/a") as second:
+                assert first is not second
+                assert {first, second} == set(FakeLanguageServer.started)
+        async with pool.lease("/repo/a") as third:
+            assert third in (first, second)
+        assert len(FakeLanguageServer.started) == 2
+
+        # The pool is full, so the least recently used idle language server makes room for another repository
+        async with pool.lease("/repo/b") as other:
+            assert other.repository_root_path == "/repo/b"
+        assert len(FakeLanguageServer.started) == 3
+        assert len(FakeLanguageServer.stopped) == 1
+
+        # A language server leased max_leases_per_server times is recycled on return
+        for _ in range(3):
+            async with pool.lease("/repo/a"):
+                pass
+        assert len(FakeLanguageServer.stopped) == 2
+
+    assert len(FakeLanguageServer.stopped) == len(FakeLanguageServer.started)
+
+
+@pytest.mark.asyncio
+async def test_pool_stops_idle_servers_under_memory_pressure(fake_create, monkeypatch) -> None:
+    """
+    Test that idle language servers are stopped, least recently used first, while the available memory is low
+    """
+    # Each stopped language server frees 1 GiB
+    base_memory_mb = [4096]
+    monkeypatch.setattr(
+        language_server_pool,
+        "get_available_memory_mb",
+        lambda: base_memory_mb[0] + 1024 * len(FakeLanguageServer.stopped),
+    )
+    config = MultilspyConfig(code_language=Language.JAVA)
+    async with LanguageServerPool(config, MultilspyLogger(), max_servers=4, min_available_memory_mb=1024) as pool:
+        for repository_root_path in ["/repo/a", "/repo/b", "/repo/c"]:
+            await pool.prewarm(repository_root_path)
+        server_a, server_b, server_c = FakeLanguageServer.started
+
+        base_memory_mb[0] = 0
+        async with pool.lease("/repo/c") as leased:
+            assert leased is server_c
+            assert FakeLanguageServer.stopped == [server_a]
+
+        base_memory_mb[0] = -2048
+        await pool.prewarm("/repo/d")
+        assert FakeLanguageServer.stopped == [server_a, server_b, server_c]
+        assert len(FakeLanguageServer.started) == 4
+
+        # Nothing is started while the memory stays low
+        base_memory_mb[0] = -10240
+        await pool.prewarm("/repo/e")
+        assert len(FakeLanguageServer.started) == 4
+        assert len(FakeLanguageServer.stopped) == 4
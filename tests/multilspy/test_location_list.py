@@ -0,0 +1,59 @@
+"""
+This file contains tests for the columnar representation of definition and references results
+"""
+
+import copy
+import os
+import pathlib
+import pytest
+
+from multilspy.location_list import LocationList
+from multilspy.multilspy_utils import UriPathCache
+
+
+def lsp_range(line: int, character: int) -> dict:
+    return {"start": {"line": line, "character": character}, "end": {"line": line, "character": character + 3}}
+
+
+def test_location_list(tmp_path) -> None:
+    """
+    Test that locations are interned per file and converted to the same Locations as before
+    """
+    root = str(tmp_path)
+    uri_path_cache = UriPathCache(root)
+    uris = [pathlib.Path(root, "src", f"File{i}.java").as_uri() for i in range(3)]
+    response = [{"uri": uris[i % 3], "range": lsp_range(i, i % 7)} for i in range(100)]
+    response.append(
+        {
+            "originSelectionRange": lsp_range(0, 0),
+            "targetUri": uris[0],
+            "targetRange": lsp_range(0, 0),
+            "targetSelectionRange": lsp_range(200, 4),
+        }
+    )
+
+    locations = LocationList.from_lsp_response(response, uri_path_cache)
+    assert len(locations) == 101
+    assert locations.uris == uris
+    assert locations.relative_paths == [os.path.join("src", f"File{i}.java") for i in range(3)]
+    assert list(locations.count_by_file().values()) == [35, 33, 33]
+
+    expected = [
+        {
+            "uri": item.get("uri", item.get("targetUri")),
+            "range": item.get("range", item.get("targetSelectionRange")),
+            "absolutePath": os.path.join(root, "src", f"File{i % 3 if i < 100 else 0}.java"),
+            "relativePath": os.path.join("src", f"File{i % 3 if i < 100 else 0}.java"),
+        }
+        for i, item in enumerate(response)
+    ]
+    assert locations.to_locations() == expected
+    assert locations == expected and copy.deepcopy(locations) == expected
+    assert locations[-1] == expected[-1] and locations[10:12] == expected[10:12]
+    assert locations.relative_path(4) == os.path.join("src", "File1.java")
+    with pytest.raises(IndexError):
+        locations[101]
+
+    single = LocationList.from_lsp_response(response[5], uri_path_cache)
+    assert single.to_locations() == [expected[5]]
+    assert len(LocationList.from_lsp_response(None, uri_path_cache)) == 0
@@ -0,0 +1,74 @@
+"""
+This file contains tests for the per method metrics collected by LanguageServerHandler
+"""
+
+import asyncio
+import json
+import pytest
+
+from multilspy.lsp_protocol_handler.lsp_metrics import LatencyHistogram, LSPMetrics
+from multilspy.lsp_protocol_handler.server import Error, LanguageServerHandler, ProcessLaunchInfo
+
+
+def test_latency_histogram() -> None:
+    """
+    Test that every latency is counted in a bucket whose upper bound is within the histogram precision
+    """
+    histogram = LatencyHistogram()
+    values = list(range(0, 5000)) + [10**6, 123456789]
+    for value in values:
+        histogram.record(value)
+    assert histogram.count == len(values) and histogram.min == 0 and histogram.max == 123456789
+    assert sum(count for _, count in histogram.buckets()) == len(values)
+    for value in values:
+        upper_bound = LatencyHistogram._bucket_upper_bound(LatencyHistogram._bucket_index(value))
+        assert value <= upper_bound <= value * 1.04 + 1
+    assert abs(histogram.percentile(50) - 2500) <= 2500 * 0.04
+    assert histogram.percentile(100) == 123456789
+
+
+@pytest.mark.asyncio
+async def test_lsp_metrics() -> None:
+    """
+    Test that requests, notifications and responses are counted per method, and exported to Prometheus
+    """
+    metrics = LSPMetrics()
+    handler = LanguageServerHandler(ProcessLaunchInfo(cmd="true"), metrics=metrics)
+    sent = []
+    handler._send_payload_sync = sent.append
+
+    async def on_diagnostics(params) -> None:
+        await asyncio.sleep(0.01)
+
+    handler.on_notification("textDocument/publishDiagnostics", on_diagnostics)
+    hover = asyncio.create_task(handler.send_request("textDocument/hover", {}))
+    definition = asyncio.create_task(handler.send_request("textDocument/definition", {}))
+    await asyncio.sleep(0)
+    assert metrics.snapshot().in_flight == 2
+
+    references = [{"uri": "file:///a.java", "range": {}}] * 10
+    await handler._handle_body(json.dumps({"jsonrpc": "2.0", "id": 2, "result": references}).encode())
+    await handler._handle_body(json.dumps({"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "x"}}).encode())
+    notification = {"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {"diagnostics": []}}
+    await handler._handle_body(json.dumps(notification).encode())
+    assert await definition == references
+    with pytest.raises(Error):
+        await hover
+    with pytest.raises(asyncio.TimeoutError):
+        await handler.send_request("textDocument/references", {}, timeout=0.01)
+
+    snapshot = metrics.snapshot()
+    assert snapshot.in_flight == 0
+    definition_metrics = snapshot.methods["textDocument/definition"]
+    assert (definition_metrics.requests, definition_metrics.errors, definition_metrics.messages_in) == (1, 0, 1)
+    assert definition_metrics.bytes_in > 10 * len('{"uri": "file:///a.java", "range": {}}')
+    assert definition_metrics.latency.count == 1 and definition_metrics.latency.p50 is not None
+    assert snapshot.methods["textDocument/hover"].errors == 1
+    assert snapshot.methods["textDocument/references"].cancellations == 1
+    assert snapshot.methods["textDocument/references"].latency.min >= 0.01
+    assert snapshot.methods["textDocument/publishDiagnostics"].dispatch_seconds >= 0.01
+
+    text = metrics.to_prometheus_text(labels={"language": "java"})
+    assert 'multilspy_lsp_requests_total{method="textDocument/hover",language="java"} 1' in text
+    assert 'multilspy_lsp_request_duration_seconds_bucket{method="textDocument/references",language="java",le="+Inf"} 1' in text
+    assert 'multilspy_lsp_requests_in_flight{method="textDocument/definition",language="java"} 0' in text
@@ -0,0 +1,285 @@
+"""
+This file contains tests for the JSON-RPC plumbing used to communicate with the language server
+"""
+
+import asyncio
+import types
+import pytest
+
+from multilspy.lsp_protocol_handler.server import (
+    Error,
+    JsonCodec,
+    LanguageServerHandler,
+    MessageFramer,
+    MessageWriter,
+    MsgspecCodec,
+    OrjsonCodec,
+    ProcessLaunchInfo,
+    create_message,
+    get_default_codec,
+    outbound_kind,
+)
+
+
+def frame(body: bytes, extra_headers: bytes = b"") -> bytes:
+    return b"Content-Length: " + str(len(body)).encode() + b"\r\n" + extra_headers + b"\r\n" + body
+
+
+def test_multiple_frames_in_one_chunk() -> None:
+    """
+    Test that all the frames contained in a single chunk are returned at once
+    """
+    framer = MessageFramer()
+    bodies = [b'{"id":1}', b'{"id":2}', "{\"text\":\"ü\"}".encode("utf-8")]
+    assert framer.feed(b"".join(frame(body) for body in bodies)) == bodies
+    assert framer.pending() == 0
+
+
+def test_frames_split_across_chunks() -> None:
+    """
+    Test that frames split at arbitrary positions across chunks are reassembled
+    """
+    stream = b"".join(
+        frame(b'{"id":%d}' % i, b"Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n") for i in range(50)
+    )
+    framer = MessageFramer()
+    bodies = []
+    for i in range(0, len(stream), 7):
+        bodies.extend(framer.feed(stream[i : i + 7]))
+    assert bodies == [b'{"id":%d}' % i for i in range(50)]
+    assert framer.pending() == 0
+
+
+def test_malformed_header_is_skipped() -> None:
+    """
+    Test that a header block without a valid Content-Length does not stall the stream
+    """
+    framer = MessageFramer()
+    assert framer.feed(b"Content-Length: abc\r\n\r\n" + frame(b"{}")) == [b"{}"]
+
+
+@pytest.mark.parametrize("codec_cls", [JsonCodec, OrjsonCodec, MsgspecCodec])
+def test_codecs_roundtrip(codec_cls) -> None:
+    """
+    Test that every available codec produces frames that are parsed back to the original payload
+    """
+    try:
+        codec = codec_cls()
+    except ImportError:
+        pytest.skip(f"{codec_cls.__name__} is not installed")
+    payload = {"jsonrpc": "2.0", "id": 7, "method": "textDocument/didOpen", "params": {"text": "class Ü {}\n" * 10}}
+    message = create_message(payload, codec)
+    assert isinstance(message, bytes)
+    bodies = MessageFramer().feed(message)
+    assert len(bodies) == 1
+    assert codec.decode(bodies[0]) == payload
+    with pytest.raises(codec.decode_errors):
+        codec.decode(b'{"id": ')
+
+
+def test_default_codec() -> None:
+    """
+    Test that a codec is always available, falling back to the standard library
+    """
+    assert isinstance(get_default_codec(), JsonCodec)
+
+
+def create_handler() -> LanguageServerHandler:
+    """
+    Creates a handler that is not connected to a process, recording the payloads it sends
+    """
+    handler = LanguageServerHandler(ProcessLaunchInfo(cmd="true"))
+    handler.sent_payloads = []
+    handler._send_payload_sync = handler.sent_payloads.append
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_response_correlation() -> None:
+    """
+    Test that responses are routed to the request with the matching id, in any order
+    """
+    handler = create_handler()
+    first = asyncio.create_task(handler.send_request("textDocument/hover", {}))
+    second = asyncio.create_task(handler.send_request("textDocument/definition", {}))
+    await asyncio.sleep(0)
+
+    await handler._response_handler({"jsonrpc": "2.0", "id": 2, "result": ["definition"]})
+    await handler._response_handler({"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "failed"}})
+
+    assert await second == ["definition"]
+    with pytest.raises(Error):
+        await first
+    assert handler._response_handlers == {}
+
+
+@pytest.mark.asyncio
+async def test_notification_handler_cannot_await_response() -> None:
+    """
+    Test that a notification handler awaiting a request fails instead of deadlocking the reader, and that work run
+    in a task of its own gets its response
+    """
+    handler = create_handler()
+    errors = []
+    results = []
+
+    async def on_status(params) -> None:
+        try:
+            await handler.send_request("workspace/symbol", {})
+        except Error as error:
+            errors.append(error)
+
+        async def query() -> None:
+            results.append(await handler.send_request("workspace/symbol", {}))
+
+        asyncio.ensure_future(query())
+
+    handler.on_notification("language/status", on_status)
+    stdout = asyncio.StreamReader()
+    handler.process = types.SimpleNamespace(stdin=None, stdout=stdout)
+    stdout.feed_data(create_message({"jsonrpc": "2.0", "method": "language/status", "params": {}}))
+    reader = asyncio.ensure_future(handler.run_forever())
+    await asyncio.sleep(0.01)
+    assert len(errors) == 1
+
+    stdout.feed_data(create_message({"jsonrpc": "2.0", "id": 1, "result": ["symbol"]}))
+    stdout.feed_eof()
+    await asyncio.wait_for(reader, 1)
+    assert results == [["symbol"]]
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_sends_cancel() -> None:
+    """
+    Test that a request that times out is cancelled on the server
+    """
+    handler = create_handler()
+    with pytest.raises(asyncio.TimeoutError):
+        await handler.send_request("textDocument/references", {}, timeout=0.01)
+    assert handler.sent_payloads == [{"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 1}}]
+    assert handler._response_handlers == {}
+
+    # A late response for the cancelled request is ignored
+    await handler._response_handler({"jsonrpc": "2.0", "id": 1, "result": []})
+
+
+class FakeStreamWriter:
+    """
+    Records the writes made to it, with a drain that blocks until it is released
+    """
+
+    def __init__(self) -> None:
+        self.writes = []
+        self.released = asyncio.Event()
+        self.released.set()
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    async def drain(self) -> None:
+        await self.released.wait()
+
+
+def notification(method: str, uri=None) -> dict:
+    return {"jsonrpc": "2.0", "method": method, "params": {"textDocument": {"uri": uri}} if uri else {}}
+
+
+def queue(writer: MessageWriter, payload: dict) -> None:
+    writer.put(create_message(payload), outbound_kind(payload))
+
+
+def written_payloads(stream: FakeStreamWriter) -> list:
+    return [get_default_codec().decode(body) for body in MessageFramer().feed(b"".join(stream.writes))]
+
+
+@pytest.mark.asyncio
+async def test_writer_coalesces_frames() -> None:
+    """
+    Test that the frames queued while a write is being drained are written at once
+    """
+    stream = FakeStreamWriter()
+    stream.released.clear()
+    writer = MessageWriter(stream)
+    queue(writer, notification("initialized"))
+    await asyncio.sleep(0)
+    assert len(stream.writes) == 1
+
+    for i in range(10):
+        queue(writer, notification("textDocument/didOpen", f"file:///{i}.java"))
+    stream.released.set()
+    await writer.close(timeout=1)
+    assert len(stream.writes) == 2
+    assert len(written_payloads(stream)) == 11
+
+
+@pytest.mark.asyncio
+async def test_writer_prioritizes_control_messages() -> None:
+    """
+    Test that cancellations and responses overtake queued notifications, but not the requests queued ahead of them
+    """
+    stream = FakeStreamWriter()
+    stream.released.clear()
+    writer = MessageWriter(stream)
+    queue(writer, notification("$/progress"))
+    await asyncio.sleep(0)
+
+    queue(writer, notification("textDocument/didOpen", "file:///a.java"))
+    queue(writer, {"jsonrpc": "2.0", "id": "server-1", "result": None})
+    queue(writer, {"jsonrpc": "2.0", "id": 2, "method": "textDocument/hover", "params": {"textDocument": {"uri": "file:///a.java"}}})
+    queue(writer, notification("textDocument/didOpen", "file:///b.java"))
+    queue(writer, {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 2}})
+    stream.released.set()
+    await writer.close(timeout=1)
+
+    order = [(payload.get("method"), payload.get("id")) for payload in written_payloads(stream)]
+    assert order == [
+        ("$/progress", None),
+        (None, "server-1"),
+        ("textDocument/didOpen", None),
+        ("textDocument/hover", 2),
+        ("$/cancelRequest", None),
+        ("textDocument/didOpen", None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_writer_keeps_requests_after_edits_of_other_documents() -> None:
+    """
+    Test that a request about a document is not written before the edits of other documents queued ahead of it
+    """
+    stream = FakeStreamWriter()
+    stream.released.clear()
+    writer = MessageWriter(stream)
+    queue(writer, notification("$/progress"))
+    await asyncio.sleep(0)
+
+    queue(writer, {"jsonrpc": "2.0", "method": "textDocument/didChange", "params": {"textDocument": {"uri": "file:///a.java", "version": 2}}})
+    queue(writer, {"jsonrpc": "2.0", "id": 3, "method": "textDocument/references", "params": {"textDocument": {"uri": "file:///b.java"}}})
+    stream.released.set()
+    await writer.close(timeout=1)
+
+    assert [payload.get("method") for payload in written_payloads(stream)] == [
+        "$/progress",
+        "textDocument/didChange",
+        "textDocument/references",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_writer_backpressure() -> None:
+    """
+    Test that producers wait while the outbound queue is full
+    """
+    stream = FakeStreamWriter()
+    stream.released.clear()
+    writer = MessageWriter(stream, max_queued_bytes=1000)
+    for i in range(50):
+        queue(writer, notification("textDocument/didOpen", f"file:///{i}.java"))
+    waiter = asyncio.create_task(writer.wait_for_capacity())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    stream.released.set()
+    await asyncio.wait_for(waiter, 1)
+    await writer.close(timeout=1)
+    assert len(written_payloads(stream)) == 50
@@ -0,0 +1,64 @@
+"""
+This file contains tests for the recording of the messages exchanged with the language server, and for their replay
+by the stand-in replay server
+"""
+
+import asyncio
+import os
+import pathlib
+import pytest
+
+from multilspy.lsp_protocol_handler.lsp_recorder import load_recording
+from tests.replay_utils import ReplayLanguageServer, write_synthetic_recording, write_synthetic_repository
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path) -> None:
+    """
+    Test that the replay server answers the requests from the recording, with the URIs of the live repository,
+    and that the live session is recorded in turn
+    """
+    recording_path = str(tmp_path / "recording.jsonl")
+    live_recording_path = str(tmp_path / "live.jsonl")
+    repository = tmp_path / "repo"
+    repository.mkdir()
+    write_synthetic_recording(recording_path, num_files=3, num_references=10)
+    write_synthetic_repository(str(repository), num_files=3)
+
+    lsp = ReplayLanguageServer(
+        str(repository),
+        recording_path,
+        method_latencies={"textDocument/hover": 5.0},
+        lsp_recording_path=live_recording_path,
+    )
+    async with lsp.start_server():
+        definitions = await lsp.request_definition("File1.java", 1, 4)
+        assert definitions == [
+            {
+                "uri": pathlib.Path(repository, "File2.java").as_uri(),
+                "range": {"start": {"line": 0, "character": 6}, "end": {"line": 0, "character": 11}},
+                "absolutePath": os.path.join(str(repository), "File2.java"),
+                "relativePath": "File2.java",
+            }
+        ]
+        references = await lsp.request_references("File0.java", 1, 4)
+        assert [reference["relativePath"] for reference in references] == [f"File{j % 3}.java" for j in range(10)]
+        symbols, tree_repr = await lsp.request_document_symbols("File2.java")
+        assert [symbol["name"] for symbol in symbols] == ["File2", "run"] and tree_repr == [{0: [{1: []}]}]
+
+        # The slow hover is cancelled on the replay server once the client gives up on it
+        with pytest.raises(asyncio.TimeoutError):
+            await lsp.server.send_request(
+                "textDocument/hover",
+                {"textDocument": {"uri": pathlib.Path(repository, "File0.java").as_uri()}, "position": {"line": 1, "character": 4}},
+                timeout=0.05,
+            )
+
+    recorded = load_recording(live_recording_path)
+    methods = [message.message.get("method") for message in recorded if message.source == "client"]
+    assert methods[:2] == ["initialize", "initialized"] and methods[-2:] == ["shutdown", "exit"]
+    assert "$/cancelRequest" in methods
+    server_messages = [message.message for message in recorded if message.source == "server"]
+    assert {"jsonrpc": "2.0", "method": "language/status", "params": {"type": "Started", "message": "Ready"}} in server_messages
+    assert any(message.get("error", {}).get("code") == -32800 for message in server_messages)
+    assert [message.time for message in recorded] == sorted(message.time for message in recorded)
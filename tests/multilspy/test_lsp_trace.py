@@ -0,0 +1,75 @@
+"""
+This file contains tests for the sampled and truncated tracing of the messages exchanged with the language server
+"""
+
+import json
+import random
+import threading
+
+from multilspy.lsp_trace import LSPTracer, TraceRingBuffer, render_truncated_json
+from multilspy.multilspy_config import LSPTraceConfig
+from multilspy.multilspy_logger import MultilspyLogger
+
+
+def test_render_truncated_json() -> None:
+    """
+    Test that bodies are serialized as JSON, and cut at the size limit without serializing the rest
+    """
+    payload = {"jsonrpc": "2.0", "id": 1, "params": {"uri": "file:///a\"b", "items": [1, None, True, 2.5]}}
+    assert json.loads(render_truncated_json(payload, 1000)) == payload
+
+    did_open = {"method": "textDocument/didOpen", "params": {"textDocument": {"text": "x" * 10_000_000}}}
+    rendered = render_truncated_json(did_open, 100)
+    assert len(rendered) == 100 + len("...(truncated)")
+    assert rendered.startswith('{"method": "textDocument/didOpen"') and rendered.endswith("xxx...(truncated)")
+
+
+def test_lsp_tracer(tmp_path) -> None:
+    """
+    Test the method filters, the sampling of requests along with their responses, the trace file and the ring buffer
+    """
+    trace_file_path = tmp_path / "lsp.trace"
+    dump_path = tmp_path / "lsp.dump"
+    config = LSPTraceConfig(
+        sample_rate=0.5,
+        method_sample_rates={"textDocument/hover": 1.0},
+        exclude_methods=["$/progress"],
+        max_body_size=200,
+        trace_file_path=str(trace_file_path),
+        ring_buffer_size=10_000,
+        ring_buffer_dump_path=str(dump_path),
+    )
+    tracer = LSPTracer(config, MultilspyLogger(), rng=random.Random(0))
+    tracer.start()
+    for request_id in range(100):
+        tracer("client", "server", {"jsonrpc": "2.0", "id": request_id, "method": "textDocument/definition"})
+        tracer("server", "client", {"jsonrpc": "2.0", "id": request_id, "result": None})
+        tracer("server", "client", {"jsonrpc": "2.0", "method": "$/progress", "params": {"token": request_id}})
+    tracer("client", "server", {"jsonrpc": "2.0", "id": 100, "method": "textDocument/hover", "params": {"x": "y" * 1000}})
+    tracer.close()
+
+    lines = trace_file_path.read_text().splitlines()
+    definitions = [line for line in lines if "textDocument/definition" in line]
+    assert 20 < len(definitions) / 2 < 80
+    # Each sampled request is traced along with its response
+    for line in definitions:
+        request_id = line.split(" id=")[1].split()[0]
+        assert sum(f" id={request_id} " in other for other in lines) == 2
+    assert not any("$/progress" in line for line in lines)
+    assert lines[-1].endswith("...(truncated)") and "textDocument/hover id=100" in lines[-1]
+
+    # The ring buffer keeps every message, and is dumped when the server returns an error
+    ring_buffer = TraceRingBuffer(100)
+    for i in range(10):
+        ring_buffer.append(f"entry {i:02}")
+    assert ring_buffer.size <= 100 and ring_buffer.drain().split(b"\n")[-1] == b"entry 09"
+    tracer = LSPTracer(config, MultilspyLogger(), rng=random.Random(0))
+    tracer("client", "server", {"jsonrpc": "2.0", "method": "$/progress", "params": {}})
+    tracer("client", "server", {"jsonrpc": "2.0", "id": 7, "method": "textDocument/definition"})
+    tracer("server", "client", {"jsonrpc": "2.0", "id": 7, "error": {"code": -32603, "message": "boom"}})
+    for thread in threading.enumerate():
+        if thread.name == "multilspy-lsp-trace-dump":
+            thread.join()
+    dump = dump_path.read_text().splitlines()
+    assert len(dump) == 3 and "$/progress" in dump[0] and "boom" in dump[2]
+    assert len(tracer.ring_buffer) == 0
@@ -294,7 +294,7 @@ async def test_multilspy_java_example_repo_document_symbols() -> None:
                         "detail": " : String",
                     },
                 ],
-                None,
+                [{0: [{1: []}, {2: []}, {3: []}]}],
             )
 
             filepath = str(PurePath("Student.java"))
@@ -355,7 +355,7 @@ async def test_multilspy_java_example_repo_document_symbols() -> None:
                         "detail": " : int",
                     },
                 ],
-                None,
+                [{0: [{1: []}, {2: []}, {3: []}]}],
             )
 
 @pytest.mark.asyncio
@@ -0,0 +1,60 @@
+"""
+This file contains tests for the lazy formatting and the background logging of MultilspyLogger
+"""
+
+import json
+import logging
+import pytest
+
+from multilspy.multilspy_logger import MultilspyLogger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+
+
+class UnprintableMessage:
+    def __str__(self) -> str:
+        raise AssertionError("the message of a disabled level must not be formatted")
+
+
+def test_multilspy_logger() -> None:
+    """
+    Test that log lines keep their format and caller information, and that disabled levels are not formatted
+    """
+    logger = MultilspyLogger()
+    handler = ListHandler()
+    logger.logger.addHandler(handler)
+    try:
+        logger.log("Opened 'File.java'\nin workspace", logging.INFO)
+        logger.log(UnprintableMessage(), logging.DEBUG)
+        assert not logger.is_enabled_for(logging.DEBUG)
+
+        assert len(handler.lines) == 1
+        log_line = json.loads(handler.lines[0])
+        assert sorted(log_line) == ["caller_file", "caller_line", "caller_name", "level", "message", "time"]
+        assert log_line["level"] == "INFO"
+        assert log_line["caller_file"] == "test_multilspy_logger.py"
+        assert log_line["caller_name"] == "test_multilspy_logger"
+        assert log_line["message"] == 'Opened "File.java" in workspace'
+
+        with pytest.warns(DeprecationWarning):
+            logger.log("Failed", logging.DEBUG, "sanitized")
+
+        logger.start_background_logging()
+        assert logger.logger.handlers != [handler]
+        for i in range(100):
+            logger.log(f"Message {i}", logging.WARNING)
+        logger.stop_background_logging()
+        assert logger.logger.handlers == [handler]
+        assert [json.loads(line)["message"] for line in handler.lines[1:]] == [
+            f"Message {i}" for i in range(100)
+        ]
+    finally:
+        logger.stop_background_logging()
+        logger.logger.removeHandler(handler)
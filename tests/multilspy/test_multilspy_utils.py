@@ -0,0 +1,93 @@
+"""
+This file contains tests for the text and path utilities used to track the contents of open files
+"""
+
+import os
+import pathlib
+import random
+
+from multilspy.multilspy_utils import LineIndex, PathUtils, TextRope, TextUtils, UriPathCache
+
+
+def assert_index_matches(line_index: LineIndex, text: str) -> None:
+    assert len(line_index) == text.count("\n") + 1
+    for index in range(len(text) + 1):
+        line, col = TextUtils.get_line_col_from_index(text, index)
+        assert line_index.get_line_col_from_index(index) == (line, col)
+        assert line_index.get_index_from_line_col(line, col) == index
+        assert TextUtils.get_index_from_line_col(text, line, col) == index
+
+
+def test_line_index_random_edits() -> None:
+    """
+    Test that the line index stays consistent with the text across random insertions and deletions
+    """
+    rng = random.Random(0)
+    text = "class A {\n    int x;\n\n    void f() {}\n}\n"
+    line_index = LineIndex(text)
+    assert_index_matches(line_index, text)
+    for _ in range(300):
+        if text and rng.random() < 0.4:
+            start = rng.randrange(len(text))
+            end = min(len(text), start + rng.randrange(1, 12))
+            text = text[:start] + text[end:]
+            line_index.delete(start, end)
+        else:
+            index = rng.randrange(len(text) + 1)
+            inserted = rng.choice(["a", "b;", "\n", "x\ny", "\n\n  ", "token"])
+            text = text[:index] + inserted + text[index:]
+            line_index.insert(index, inserted)
+        assert_index_matches(line_index, text)
+
+
+class SmallChunkTextRope(TextRope):
+    CHUNK_SIZE = 4
+
+
+def test_text_rope_random_edits() -> None:
+    """
+    Test that the rope stays consistent with the text across random insertions and deletions spanning chunks
+    """
+    rng = random.Random(1)
+    text = "public class Main {\n    public static void main(String[] args) {}\n}\n"
+    rope = SmallChunkTextRope(text)
+    for _ in range(500):
+        if text and rng.random() < 0.4:
+            start = rng.randrange(len(text))
+            end = min(len(text), start + rng.randrange(1, 20))
+            assert rope.delete(start, end) == text[start:end]
+            text = text[:start] + text[end:]
+        else:
+            index = rng.randrange(len(text) + 1)
+            inserted = rng.choice(["a", "tok", "\n", "a much longer generated snippet;\n"])
+            rope.insert(index, inserted)
+            text = text[:index] + inserted + text[index:]
+        assert len(rope) == len(text)
+        assert str(rope) == text
+        start = rng.randrange(len(text) + 1)
+        end = rng.randrange(start, len(text) + 1)
+        assert rope.slice(start, end) == text[start:end]
+
+
+def test_uri_path_cache(tmp_path) -> None:
+    """
+    Test that the cached conversions between URIs and paths match the conversions done with pathlib and urllib
+    """
+    root = str(tmp_path / "my repo")
+    uri_path_cache = UriPathCache(root, max_size=4)
+    relative_file_paths = [
+        os.path.join("src", "Main.java"),
+        os.path.join("src", "with space", "Caf\u00e9.java"),
+        "A#B%C.java",
+        os.path.join("src", ".", "Dot.java"),
+        os.path.join("..", "Outside.java"),
+        ".",
+    ]
+    for _ in range(2):
+        for relative_file_path in relative_file_paths:
+            uri = pathlib.Path(os.path.join(root, relative_file_path)).as_uri()
+            assert uri_path_cache.uri_for_relative_path(relative_file_path) == uri
+            absolute_path = PathUtils.uri_to_path(uri)
+            relative_path = str(pathlib.PurePath(os.path.relpath(absolute_path, root)))
+            assert uri_path_cache.paths_for_uri(uri) == (absolute_path, relative_path)
+    assert len(uri_path_cache._uri_by_relative_path) <= 4 and len(uri_path_cache._paths_by_uri) <= 4
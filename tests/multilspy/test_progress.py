@@ -0,0 +1,71 @@
+"""
+This file contains tests for the tracking of the progress notifications sent by language servers
+"""
+
+from multilspy.progress import ProgressTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_progress_tracker() -> None:
+    """
+    Test that work done progress is timed per token and summarized in the snapshot and the timeline report
+    """
+    clock = FakeClock()
+    tracker = ProgressTracker(clock)
+    tracker.handle_status("Starting", "Init...")
+    assert tracker.handle_progress({"token": "import", "value": {"kind": "begin", "title": "Importing Maven project(s)"}})
+    clock.now += 2
+    tracker.handle_progress({"token": "build", "value": {"kind": "begin", "title": "Building", "percentage": 0}})
+    clock.now += 1
+    tracker.handle_progress({"token": "build", "value": {"kind": "report", "message": "Compiling", "percentage": 40}})
+    assert tracker.handle_progress({"token": "unknown", "value": {"kind": "end"}}) is None
+
+    snapshot = tracker.snapshot()
+    assert snapshot.elapsed == 3
+    assert [(task.title, task.percentage, task.elapsed) for task in snapshot.active_tasks] == [
+        ("Importing Maven project(s)", None, 3),
+        ("Building", 40, 1),
+    ]
+    assert snapshot.completed_task_count == 0
+    assert snapshot.last_status.type == "Starting"
+
+    clock.now += 4
+    task = tracker.handle_progress({"token": "import", "value": {"kind": "end"}})
+    assert task.duration == 7
+    tracker.handle_status("ServiceReady", "ServiceReady")
+    assert tracker.snapshot().completed_task_count == 1
+
+    report = tracker.timeline_report().splitlines()
+    assert report[0] == "Timeline over 7.00s:"
+    assert report[1].endswith("[Starting] Init...")
+    assert report[2].endswith("7.00s  Importing Maven project(s)")
+    assert report[3].endswith("running  Building")
+    assert report[4].endswith("[ServiceReady] ServiceReady")
+    assert report[5:] == ["Time per task:", "       7.00s  Importing Maven project(s)"]
+
+
+def test_progress_tracker_is_bounded() -> None:
+    """
+    Test that the tracker only keeps the most recent events, while totalling the time of all the completed tasks
+    """
+    clock = FakeClock()
+    tracker = ProgressTracker(clock, max_timeline_events=3)
+    for index in range(10):
+        tracker.handle_progress({"token": index, "value": {"kind": "begin", "title": "Building"}})
+        clock.now += 1
+        tracker.handle_progress({"token": index, "value": {"kind": "end"}})
+    tracker.handle_status("ServiceReady", "ServiceReady")
+
+    assert len(tracker.timeline) == 3
+    assert tracker.snapshot().completed_task_count == 10
+    assert tracker.snapshot().active_tasks == []
+    report = tracker.timeline_report().splitlines()
+    assert report[1] == "  (8 earlier events dropped)"
+    assert report[-2:] == ["Time per task:", "      10.00s  Building"]
@@ -0,0 +1,47 @@
+"""
+This file contains tests for the client-side index of workspace symbols
+"""
+
+import random
+import string
+
+from multilspy.symbol_index import SymbolIndex
+
+
+def test_symbol_index_matches_linear_scan() -> None:
+    """
+    Test that trigram lookups return the same symbols as a substring scan, as files are replaced and removed
+    """
+    rng = random.Random(0)
+    index = SymbolIndex()
+    files = {}
+    for step in range(300):
+        relative_file_path = f"File{rng.randrange(20)}.java"
+        if rng.random() < 0.2:
+            index.remove_file(relative_file_path)
+            files.pop(relative_file_path, None)
+        else:
+            names = ["".join(rng.choice("abcAB") for _ in range(rng.randrange(1, 8))) for _ in range(rng.randrange(5))]
+            symbols = [{"name": name, "kind": 12} for name in names]
+            index.set_file_symbols(relative_file_path, symbols)
+            files[relative_file_path] = symbols
+
+        query = "".join(rng.choice("abAB") for _ in range(rng.randrange(1, 5)))
+        expected = [s for symbols in files.values() for s in symbols if query.lower() in s["name"].lower()]
+        found = index.search(query)
+        assert sorted(map(id, found)) == sorted(map(id, expected))
+        assert len(index) == sum(len(symbols) for symbols in files.values())
+
+
+def test_symbol_index_ranking() -> None:
+    """
+    Test that exact and prefix matches are ranked first
+    """
+    index = SymbolIndex()
+    index.set_file_symbols("A.java", [{"name": n, "kind": 5} for n in ["MyParser", "Parser", "ParserFactory", "parse"]])
+    assert [s["name"] for s in index.search("parser")] == ["Parser", "ParserFactory", "MyParser"]
+    assert [s["name"] for s in index.search("PARSER", limit=1)] == ["Parser"]
+    index.mark_stale("A.java")
+    assert index.stale_files == {"A.java"}
+    index.remove_file("A.java")
+    assert index.stale_files == set() and index.search("pa") == []
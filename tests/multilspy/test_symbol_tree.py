@@ -0,0 +1,56 @@
+"""
+This file contains tests for the compact representation of the hierarchy of document symbols
+"""
+
+import copy
+import sys
+
+from multilspy.symbol_tree import SymbolTree
+
+
+def symbol(name: str, *children) -> dict:
+    position = {"line": 0, "character": 0}
+    return {"name": name, "kind": 5, "range": {"start": position, "end": position}, "children": list(children)}
+
+
+def test_symbol_tree_views() -> None:
+    """
+    Test that the flat view is in preorder, the tree view matches the nesting, and the response is not modified
+    """
+    response = [symbol("A", symbol("A1", symbol("A1a")), symbol("A2")), symbol("B")]
+    original = copy.deepcopy(response)
+    tree = SymbolTree.from_document_symbols(response)
+
+    assert response == original
+    assert [s["name"] for s in tree.symbols] == ["A", "A1", "A1a", "A2", "B"]
+    assert all("children" not in s for s in tree.symbols)
+    assert tree.parents == [-1, 0, 1, 0, -1]
+    assert tree.roots() == [0, 4]
+    assert tree.children(0) == [1, 3] and tree.children(4) == []
+    assert list(tree.ancestors(2)) == [1, 0]
+    assert tree.to_tree_repr() == [{0: [{1: [{2: []}]}, {3: []}]}, {4: []}]
+    assert tree.is_hierarchical
+
+    cached = copy.deepcopy(tree)
+    assert cached.symbols == tree.symbols and cached.parents == tree.parents and cached.children(0) == [1, 3]
+
+    flat = SymbolTree.from_document_symbols([{"name": "f", "kind": 12, "location": {}}])
+    assert not flat.is_hierarchical and flat.to_tree_repr() == [{0: []}]
+
+
+def test_deeply_nested_symbols() -> None:
+    """
+    Test that symbols nested deeper than the recursion limit are supported
+    """
+    depth = sys.getrecursionlimit() * 2
+    root = innermost = symbol("C0")
+    for i in range(1, depth):
+        child = symbol(f"C{i}")
+        innermost["children"].append(child)
+        innermost = child
+
+    tree = SymbolTree.from_document_symbols([root])
+    assert len(tree) == depth
+    assert tree.parents[-1] == depth - 2
+    assert len(list(tree.ancestors(depth - 1))) == depth - 1
+    assert len(tree.to_tree_repr()) == 1
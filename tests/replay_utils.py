@@ -0,0 +1,133 @@
+"""
+Provides a LanguageServer backed by the replay server, and a synthetic recording of a Java session, to exercise
+and benchmark the client without network access or a JVM.
+"""
+
+import os
+import pathlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from multilspy.language_server import LanguageServer
+from multilspy.lsp_protocol_handler.lsp_recorder import LSPRecorder
+from multilspy.lsp_protocol_handler.replay_server import replay_server_launch_info
+from multilspy.multilspy_config import Language, MultilspyConfig
+from multilspy.multilspy_logger import MultilspyLogger
+
+# Root of the repository of the synthetic recording, rewritten by the replay server to the root of the client
+RECORDED_ROOT = "/recorded/repo"
+
+
+class ReplayLanguageServer(LanguageServer):
+    """
+    A LanguageServer whose requests are answered by the replay server, from the given recording
+    """
+
+    def __init__(
+        self,
+        repository_root_path: str,
+        recording_path: str,
+        latency: float = 0.0,
+        method_latencies: Optional[Dict[str, float]] = None,
+        **config,
+    ) -> None:
+        super().__init__(
+            MultilspyConfig(code_language=Language.JAVA, **config),
+            MultilspyLogger(),
+            repository_root_path,
+            replay_server_launch_info(recording_path, latency, method_latencies, cwd=repository_root_path),
+            "java",
+        )
+
+    @asynccontextmanager
+    async def start_server(self) -> AsyncIterator["ReplayLanguageServer"]:
+        async with super().start_server():
+            await self.server.start()
+            init_response = await self.server.send.initialize(
+                {
+                    "processId": os.getpid(),
+                    "rootUri": pathlib.Path(self.repository_root_path).as_uri(),
+                    "capabilities": {},
+                }
+            )
+            self.server_capabilities = init_response["capabilities"]
+            self.server.notify.initialized({})
+            try:
+                yield self
+            finally:
+                await self.server.shutdown()
+                await self.server.stop()
+
+
+def file_uri(relative_file_path: str) -> str:
+    return pathlib.PurePosixPath(RECORDED_ROOT, relative_file_path).as_uri()
+
+
+def lsp_range(line: int, character: int, length: int = 5) -> dict:
+    return {"start": {"line": line, "character": character}, "end": {"line": line, "character": character + length}}
+
+
+def write_synthetic_recording(recording_path: str, num_files: int, num_references: int) -> None:
+    """
+    Writes the recording of a session on a repository of num_files files, File<i>.java, with a definition, references,
+    hover and document symbols request on each file. References requests return num_references locations.
+    """
+    recorder = LSPRecorder(recording_path)
+    recorder.start()
+    request_id = 0
+
+    def request(method: str, params: dict, result) -> None:
+        nonlocal request_id
+        request_id += 1
+        recorder.record_payload("client", "server", {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        recorder.record_payload("server", "client", {"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    request(
+        "initialize",
+        {"processId": 1, "rootUri": pathlib.PurePosixPath(RECORDED_ROOT).as_uri(), "capabilities": {}},
+        {"capabilities": {"definitionProvider": True, "referencesProvider": True, "hoverProvider": True}},
+    )
+    recorder.record_payload("client", "server", {"jsonrpc": "2.0", "method": "initialized", "params": {}})
+    recorder.record_payload(
+        "server", "client", {"jsonrpc": "2.0", "method": "language/status", "params": {"type": "Started", "message": "Ready"}}
+    )
+    for i in range(num_files):
+        relative_file_path = f"File{i}.java"
+        text_document = {"uri": file_uri(relative_file_path)}
+        position = {"line": 1, "character": 4}
+        request(
+            "textDocument/definition",
+            {"textDocument": text_document, "position": position},
+            [{"uri": file_uri(f"File{(i + 1) % num_files}.java"), "range": lsp_range(0, 6)}],
+        )
+        request(
+            "textDocument/references",
+            {"context": {"includeDeclaration": False}, "textDocument": text_document, "position": position},
+            [{"uri": file_uri(f"File{j % num_files}.java"), "range": lsp_range(j, 8)} for j in range(num_references)],
+        )
+        request(
+            "textDocument/hover",
+            {"textDocument": text_document, "position": position},
+            {"contents": {"kind": "markdown", "value": f"class File{i}"}},
+        )
+        request(
+            "textDocument/documentSymbol",
+            {"textDocument": text_document},
+            [
+                {
+                    "name": f"File{i}",
+                    "kind": 5,
+                    "range": lsp_range(0, 0, 20),
+                    "selectionRange": lsp_range(0, 6),
+                    "children": [{"name": "run", "kind": 6, "range": lsp_range(1, 4), "selectionRange": lsp_range(1, 4)}],
+                }
+            ],
+        )
+    request("shutdown", None, None)
+    recorder.close()
+
+
+def write_synthetic_repository(repository_root_path: str, num_files: int) -> None:
+    for i in range(num_files):
+        with open(os.path.join(repository_root_path, f"File{i}.java"), "w") as f:
+            f.write(f"class File{i} {{\n    void run() {{}}\n}}\n")